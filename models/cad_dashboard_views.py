@@ -5,7 +5,32 @@ Integration with existing CAD AI system
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods
-from .mongodb import db, to_object_id
+from django.core.cache import caches
+from .mongodb import (
+    db, to_object_id, project_stats_key, DESIGN_PROJECT_RECENT_FIELDS,
+    PROJECT_STATS_CACHE_TIMEOUT
+)
+
+IN_PROGRESS_STATUSES = ['concept_approved', 'overall_approved', 'parts_generated']
+
+
+def _count_project_stats(user_id):
+    """Count total, completed and in-progress projects in one aggregation round-trip"""
+    pipeline = [
+        {'$match': {'user_id': user_id}},
+        {'$group': {
+            '_id': None,
+            'total': {'$sum': 1},
+            'completed': {'$sum': {'$cond': [{'$eq': ['$status', 'completed']}, 1, 0]}},
+            'in_progress': {'$sum': {'$cond': [{'$in': ['$status', IN_PROGRESS_STATUSES]}, 1, 0]}},
+        }},
+    ]
+    result = next(db.design_projects.aggregate(pipeline), None) or {}
+    return {
+        'total': result.get('total', 0),
+        'completed': result.get('completed', 0),
+        'in_progress': result.get('in_progress', 0)
+    }
 
 
 @login_required
@@ -15,7 +40,8 @@ def api_get_recent_projects(request):
     try:
         # Get user's recent projects
         projects = list(db.design_projects.find(
-            {'user_id': str(request.user.id)}
+            {'user_id': str(request.user.id)},
+            DESIGN_PROJECT_RECENT_FIELDS
         ).sort('created_at', -1).limit(5))
         
         project_list = []
@@ -45,23 +71,15 @@ def api_get_recent_projects(request):
 def api_get_project_stats(request):
     """Get CAD project statistics for dashboard"""
     try:
-        total_projects = db.design_projects.count_documents({'user_id': str(request.user.id)})
-        completed_projects = db.design_projects.count_documents({
-            'user_id': str(request.user.id),
-            'status': 'completed'
-        })
-        in_progress_projects = db.design_projects.count_documents({
-            'user_id': str(request.user.id),
-            'status': {'$in': ['concept_approved', 'overall_approved', 'parts_generated']}
-        })
+        user_id = str(request.user.id)
+        stats = caches['counts'].get(project_stats_key(user_id))
+        if stats is None:
+            stats = _count_project_stats(user_id)
+            caches['counts'].set(project_stats_key(user_id), stats, PROJECT_STATS_CACHE_TIMEOUT)
         
         return JsonResponse({
             'success': True,
-            'stats': {
-                'total': total_projects,
-                'completed': completed_projects,
-                'in_progress': in_progress_projects
-            }
+            'stats': stats
         })
     except Exception as e:
         return JsonResponse({
@@ -6,11 +6,15 @@ from django.shortcuts import render
 from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.conf import settings
-from models.mongodb import db, to_object_id, doc_to_dict
+from models.mongodb import (
+    db, to_object_id, doc_to_dict, invalidate_project_stats,
+    get_project_parts, migrate_legacy_parts
+)
 from models.design_schemas import PartSchema
 from models.views import session_login_required
 from services.cadquery_agent import CadQueryAgent
 from services.cadquery_executor import CadQueryExecutor
+from pymongo import ReturnDocument
 from datetime import datetime
 from pathlib import Path
 import logging
@@ -19,6 +23,16 @@ import os
 logger = logging.getLogger(__name__)
 
 
+def _mark_part_generating(part_filter):
+    """Set a part's status to generating, returning the part as it was before."""
+    return db.parts.find_one_and_update(
+        part_filter,
+        {'$set': {'status': 'generating', 'updated_at': datetime.utcnow()}},
+        projection={'cadquery_code': 0},
+        return_document=ReturnDocument.BEFORE
+    )
+
+
 @session_login_required
 @require_http_methods(["POST"])
 def api_generate_part_cadquery(request, project_id, part_number):
@@ -27,34 +41,32 @@ def api_generate_part_cadquery(request, project_id, part_number):
     This replaces Meshy API for precise parametric CAD generation.
     """
     try:
-        # Get project and part breakdown
-        project = db.design_projects.find_one({
-            '_id': to_object_id(project_id),
-            'user_id': str(request.user.id)
-        })
+        # Get project (ownership check only)
+        project = db.design_projects.find_one(
+            {'_id': to_object_id(project_id), 'user_id': str(request.user.id)},
+            {'_id': 1}
+        )
         
         if not project:
             return HttpResponse('Project not found', status=404)
         
-        breakdown = db.part_breakdowns.find_one({'project_id': to_object_id(project_id)})
-        if not breakdown:
-            return HttpResponse('Part breakdown not found', status=404)
-        
-        # Find the specific part
-        part = None
-        for p in breakdown['parts']:
-            if p['part_number'] == int(part_number):
-                part = p
-                break
+        # Mark the part as generating and fetch it in one round-trip
+        part_filter = {'project_id': to_object_id(project_id), 'part_number': int(part_number)}
+        part = _mark_part_generating(part_filter)
+        if part is None and migrate_legacy_parts(project_id):
+            part = _mark_part_generating(part_filter)
         
         if not part:
-            return HttpResponse('Part not found', status=404)
+            if db.part_breakdowns.count_documents({'project_id': to_object_id(project_id)}, limit=1):
+                return HttpResponse('Part not found', status=404)
+            return HttpResponse('Part breakdown not found', status=404)
         
-        # Update part status to generating
-        db.part_breakdowns.update_one(
-            {'project_id': to_object_id(project_id), 'parts.part_number': int(part_number)},
-            {'$set': {'parts.$.status': 'generating'}}
-        )
+        # Regenerating a completed part takes it out of the generated count
+        if part.get('status') == 'completed':
+            db.design_projects.update_one(
+                {'_id': to_object_id(project_id)},
+                {'$inc': {'generated_parts': -1}}
+            )
         
         # Generate CadQuery code using AI
         logger.info(f"Generating CadQuery code for part {part_number}: {part['name']}")
@@ -73,13 +85,14 @@ def api_generate_part_cadquery(request, project_id, part_number):
         code_result = agent.generate_code(description)
         
         if not code_result or 'code' not in code_result:
-            # Update part with error
+            # Update part with error (unless a concurrent request completed it)
             error_msg = 'Failed to generate CadQuery code'
-            db.part_breakdowns.update_one(
-                {'project_id': to_object_id(project_id), 'parts.part_number': int(part_number)},
+            db.parts.update_one(
+                {**part_filter, 'status': {'$ne': 'completed'}},
                 {'$set': {
-                    'parts.$.status': 'failed',
-                    'parts.$.generation_error': error_msg
+                    'status': 'failed',
+                    'generation_error': error_msg,
+                    'updated_at': datetime.utcnow()
                 }}
             )
             return HttpResponse(f"Failed to generate code: {error_msg}", status=500)
@@ -106,12 +119,13 @@ def api_generate_part_cadquery(request, project_id, part_number):
         )
         
         if not exec_result['success']:
-            # Update part with error
-            db.part_breakdowns.update_one(
-                {'project_id': to_object_id(project_id), 'parts.part_number': int(part_number)},
+            # Update part with error (unless a concurrent request completed it)
+            db.parts.update_one(
+                {**part_filter, 'status': {'$ne': 'completed'}},
                 {'$set': {
-                    'parts.$.status': 'failed',
-                    'parts.$.generation_error': exec_result.get('error', 'Unknown error')
+                    'status': 'failed',
+                    'generation_error': exec_result.get('error', 'Unknown error'),
+                    'updated_at': datetime.utcnow()
                 }}
             )
             return HttpResponse(f"Failed to execute code: {exec_result.get('error', 'Unknown error')}", status=500)
@@ -120,41 +134,53 @@ def api_generate_part_cadquery(request, project_id, part_number):
         step_file = exec_result['files'].get('step', '')
         stl_file = exec_result['files'].get('stl', '')
         
-        # Update part with success data
-        db.part_breakdowns.update_one(
-            {'project_id': to_object_id(project_id), 'parts.part_number': int(part_number)},
+        # Always store this request's result (the last one to finish wins);
+        # generated_parts only counts the part if it was not completed already
+        previous = db.parts.find_one_and_update(
+            part_filter,
             {'$set': {
-                'parts.$.status': 'completed',
-                'parts.$.cadquery_code': code_result['code'],
-                'parts.$.step_file_path': step_file,
-                'parts.$.stl_file_path': stl_file,
-                'parts.$.generation_error': None
-            }}
-        )
-        
-        # Update project progress
-        breakdown = db.part_breakdowns.find_one({'project_id': to_object_id(project_id)})
-        completed_parts = sum(1 for p in breakdown['parts'] if p['status'] == 'completed')
-        total_parts = len(breakdown['parts'])
-        
-        db.design_projects.update_one(
-            {'_id': to_object_id(project_id)},
-            {'$set': {
-                'generated_parts': completed_parts,
+                'status': 'completed',
+                'cadquery_code': code_result['code'],
+                'step_file_path': step_file,
+                'stl_file_path': stl_file,
+                'generation_error': None,
                 'updated_at': datetime.utcnow()
-            }}
+            }},
+            projection={'status': 1},
+            return_document=ReturnDocument.BEFORE
         )
+        newly_completed = bool(previous) and previous.get('status') != 'completed'
         
-        # Check if all parts are done
-        if completed_parts == total_parts:
-            db.design_projects.update_one(
-                {'_id': to_object_id(project_id)},
+        # Update project progress and detect completion server-side
+        now = datetime.utcnow()
+        all_done = {'$and': [
+            {'$gt': ['$total_parts', 0]},
+            {'$gte': ['$generated_parts', '$total_parts']}
+        ]}
+        project = db.design_projects.find_one_and_update(
+            {'_id': to_object_id(project_id)},
+            [
+                {'$set': {
+                    'generated_parts': {'$add': [
+                        {'$ifNull': ['$generated_parts', 0]},
+                        1 if newly_completed else 0
+                    ]},
+                    'updated_at': now
+                }},
                 {'$set': {
-                    'stage': 'completed',
-                    'status': 'completed',
-                    'completed_at': datetime.utcnow()
+                    'stage': {'$cond': [all_done, 'completed', '$stage']},
+                    'status': {'$cond': [all_done, 'completed', '$status']},
+                    'completed_at': {'$cond': [all_done, now, '$completed_at']}
                 }}
-            )
+            ],
+            projection={'generated_parts': 1, 'total_parts': 1, 'status': 1},
+            return_document=ReturnDocument.AFTER
+        )
+        completed_parts = project.get('generated_parts', 0)
+        total_parts = project.get('total_parts', 0)
+        
+        if project.get('status') == 'completed':
+            invalidate_project_stats(str(request.user.id))
         
         # Return success HTML with download links (cross-platform)
         # Convert absolute paths to URLs
@@ -228,11 +254,12 @@ def api_generate_part_cadquery(request, project_id, part_number):
         
         # Update part with error
         try:
-            db.part_breakdowns.update_one(
-                {'project_id': to_object_id(project_id), 'parts.part_number': int(part_number)},
+            db.parts.update_one(
+                {'project_id': to_object_id(project_id), 'part_number': int(part_number)},
                 {'$set': {
-                    'parts.$.status': 'failed',
-                    'parts.$.generation_error': str(e)
+                    'status': 'failed',
+                    'generation_error': str(e),
+                    'updated_at': datetime.utcnow()
                 }}
             )
             
@@ -240,17 +267,17 @@ def api_generate_part_cadquery(request, project_id, part_number):
             from services.data_logger import DataLogger
             
             # Re-fetch project to get prompt if we can
-            project = db.design_projects.find_one({'_id': to_object_id(project_id)})
+            project = db.design_projects.find_one({'_id': to_object_id(project_id)}, {'original_prompt': 1})
             prompt = project.get('original_prompt', 'Unknown Prompt') if project else 'Unknown Prompt'
             
             # Try to get specific part description
             part_desc = ''
             try:
-                breakdown = db.part_breakdowns.find_one({'project_id': to_object_id(project_id)})
-                for p in breakdown['parts']:
-                    if p['part_number'] == int(part_number):
-                        part_desc = p['description']
-                        break
+                part_doc = db.parts.find_one(
+                    {'project_id': to_object_id(project_id), 'part_number': int(part_number)},
+                    {'description': 1}
+                )
+                part_desc = part_doc['description']
             except:
                 pass
                 
@@ -294,11 +321,11 @@ def api_approve_parts_cadquery(request, project_id):
             {'$set': {'status': 'approved', 'approved_at': datetime.utcnow()}}
         )
         
-        # Get parts breakdown
-        breakdown = db.part_breakdowns.find_one({'project_id': to_object_id(project_id)})
-        parts_list = breakdown['parts']
+        # Get parts (generated code is not needed here)
+        parts_list = get_project_parts(project_id, {'cadquery_code': 0})
         
-        # Update project stage
+        # Update project stage; parts completed before a re-approval stay
+        # completed, so they keep counting (regenerating one takes it out again)
         db.design_projects.update_one(
             {'_id': to_object_id(project_id)},
             {'$set': {
@@ -306,10 +333,11 @@ def api_approve_parts_cadquery(request, project_id):
                 'parts_approved_at': datetime.utcnow(),
                 'status': 'generating',
                 'total_parts': len(parts_list),
-                'generated_parts': 0,
+                'generated_parts': sum(1 for part in parts_list if part.get('status') == 'completed'),
                 'updated_at': datetime.utcnow()
             }}
         )
+        invalidate_project_stats(str(request.user.id))
         
         # Generate parts HTML with CadQuery generation buttons
         parts_html = ''.join([
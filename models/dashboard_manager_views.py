@@ -5,7 +5,7 @@ Handles creating, editing, and switching between room-specific dashboards
 
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods
-from models.mongodb import db, to_object_id
+from models.mongodb import db, to_object_id, DASHBOARD_LIST_FIELDS
 from models.views import session_login_required
 from datetime import datetime
 import json
@@ -20,7 +20,8 @@ def api_get_dashboards(request):
         
         # Get all dashboards for this user
         dashboards = list(db.dashboards.find(
-            {'user_id': user_id}
+            {'user_id': user_id},
+            DASHBOARD_LIST_FIELDS
         ).sort('is_default', -1).sort('name', 1))
         
         # Convert to JSON-serializable format
@@ -32,7 +33,7 @@ def api_get_dashboards(request):
                 'room': dashboard.get('room', ''),
                 'icon': dashboard.get('icon', '🏠'),
                 'is_default': dashboard.get('is_default', False),
-                'widget_count': len(dashboard.get('widgets', [])),
+                'widget_count': dashboard.get('widget_count', 0),
                 'created_at': dashboard.get('created_at', '').isoformat() if dashboard.get('created_at') else '',
                 'updated_at': dashboard.get('updated_at', '').isoformat() if dashboard.get('updated_at') else ''
             })
@@ -81,9 +81,9 @@ class PartBreakdownSchema:
     @staticmethod
     def create(project_id, parts_list, **kwargs):
         """Create a new part breakdown document."""
+        # The parts themselves are stored in the parts collection
         return {
             'project_id': ObjectId(project_id) if isinstance(project_id, str) else project_id,
-            'parts': parts_list,  # List of part objects with manufacturing info
             'total_parts': len(parts_list),
             'parts_by_method': {
                 '3d_print': sum(1 for p in parts_list if p.get('manufacturing_method') == '3d_print'),
@@ -101,7 +101,7 @@ class PartBreakdownSchema:
 
 
 class PartSchema:
-    """Schema for individual part within a breakdown."""
+    """Schema for individual part within a breakdown (parts collection)."""
     
     @staticmethod
     def create(name, description, manufacturing_method, **kwargs):
@@ -127,6 +127,16 @@ class PartSchema:
             
             'status': 'pending',  # 'pending', 'generating', 'completed', 'failed'
         }
+    
+    @staticmethod
+    def to_document(project_id, part, **kwargs):
+        """Create a parts collection document from a part object."""
+        doc = dict(part)
+        doc['project_id'] = ObjectId(project_id) if isinstance(project_id, str) else project_id
+        doc['breakdown_id'] = kwargs.get('breakdown_id')
+        doc['created_at'] = datetime.utcnow()
+        doc['updated_at'] = datetime.utcnow()
+        return doc
 
 
 # Display name mappings
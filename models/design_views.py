@@ -6,7 +6,12 @@ from django.shortcuts import render
 from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.conf import settings
-from models.mongodb import db, to_object_id, doc_to_dict
+from pymongo import UpdateOne
+from models.mongodb import (
+    db, to_object_id, doc_to_dict, find_page, cached_count, invalidate_count,
+    invalidate_model_counts, invalidate_project_stats, design_projects_count_key,
+    get_project_parts, InvalidCursor, DESIGN_PROJECT_LIST_FIELDS, MODEL_CARD_FIELDS
+)
 from models.design_schemas import (
     DesignProjectSchema, DesignConceptSchema, PartBreakdownSchema, PartSchema
 )
@@ -26,13 +31,50 @@ logger = logging.getLogger(__name__)
 @session_login_required
 @require_http_methods(["GET"])
 def design_projects(request):
-    """Design projects page - shows all user's design projects."""
-    projects = list(db.design_projects.find({'user_id': str(request.user.id)}).sort('created_at', -1))
+    """Design projects page - shows the first page of the user's design projects."""
+    user_id = str(request.user.id)
+    projects, next_cursor = find_page(
+        db.design_projects, {'user_id': user_id}, DESIGN_PROJECT_LIST_FIELDS
+    )
+    
+    for project in projects:
+        project = doc_to_dict(project)
+    
+    total_projects = cached_count(
+        design_projects_count_key(user_id), db.design_projects, {'user_id': user_id}
+    )
+    
+    return render(request, 'design_projects.html', {
+        'projects': projects,
+        'next_cursor': next_cursor,
+        'total_projects': total_projects
+    })
+
+
+@session_login_required
+@require_http_methods(["GET"])
+def api_design_projects_page(request):
+    """
+    HTMX endpoint for infinite scroll on the design projects page.
+    Returns the next page of project cards after the given cursor.
+    """
+    try:
+        projects, next_cursor = find_page(
+            db.design_projects,
+            {'user_id': str(request.user.id)},
+            DESIGN_PROJECT_LIST_FIELDS,
+            cursor=request.GET.get('cursor')
+        )
+    except InvalidCursor:
+        return HttpResponse('Invalid page cursor', status=400)
     
     for project in projects:
         project = doc_to_dict(project)
     
-    return render(request, 'design_projects.html', {'projects': projects})
+    return render(request, 'partials/design_project_cards.html', {
+        'projects': projects,
+        'next_cursor': next_cursor
+    })
 
 
 @session_login_required
@@ -71,16 +113,17 @@ def design_project_detail(request, project_id):
         breakdown = db.part_breakdowns.find_one({'project_id': to_object_id(project_id)})
         if breakdown:
             breakdown = doc_to_dict(breakdown)
+            breakdown['parts'] = [doc_to_dict(part) for part in get_project_parts(project_id)]
             # Convert file paths to URLs for each part
             part_media_root = str(Path(settings.MEDIA_ROOT))
-            for part in breakdown.get('parts', []):
+            for part in breakdown['parts']:
                 if part.get('step_file_path'):
                     part['step_url'] = part['step_file_path'].replace(part_media_root, '/media').replace('\\\\', '/')
                 if part.get('stl_file_path'):
                     part['stl_url'] = part['stl_file_path'].replace(part_media_root, '/media').replace('\\\\', '/')
     
     if project['stage'] in ['generation', 'completed']:
-        models = list(db.models.find({'project_id': to_object_id(project_id)}))
+        models = list(db.models.find({'project_id': to_object_id(project_id)}, MODEL_CARD_FIELDS))
         for model in models:
             model = doc_to_dict(model)
     
@@ -115,6 +158,8 @@ def api_create_design_project(request):
         )
         result = db.design_projects.insert_one(project_doc)
         project_id = result.inserted_id
+        invalidate_count(design_projects_count_key(str(request.user.id)))
+        invalidate_project_stats(str(request.user.id))
         
         # Generate design concept using AI
         logger.info(f"Generating design concept for project {project_id}")
@@ -330,6 +375,7 @@ def api_approve_concept(request, project_id):
                 'updated_at': datetime.utcnow()
             }}
         )
+        invalidate_project_stats(str(request.user.id))
         
         # Redirect to project detail page to show overall model stage
         return HttpResponse(f'''
@@ -374,9 +420,8 @@ def api_approve_parts(request, project_id):
             {'$set': {'status': 'approved', 'approved_at': datetime.utcnow()}}
         )
         
-        # Get parts breakdown
-        breakdown = db.part_breakdowns.find_one({'project_id': to_object_id(project_id)})
-        parts_list = breakdown['parts']
+        # Get parts (generated code is not needed here)
+        parts_list = get_project_parts(project_id, {'cadquery_code': 0})
         
         # Update project stage
         db.design_projects.update_one(
@@ -388,10 +433,12 @@ def api_approve_parts(request, project_id):
                 'updated_at': datetime.utcnow()
             }}
         )
+        invalidate_project_stats(str(request.user.id))
         
         # Start generating 3D models for each part
         meshy_client = MeshyClient()
         generated_count = 0
+        part_updates = []
         
         for part in parts_list:
             try:
@@ -412,6 +459,7 @@ def api_approve_parts(request, project_id):
                 
                 result = db.models.insert_one(model_doc)
                 model_id = result.inserted_id
+                invalidate_model_counts(str(request.user.id))
                 
                 # Start Meshy generation with Meshy-6
                 meshy_result = meshy_client.create_text_to_3d_task(
@@ -431,21 +479,24 @@ def api_approve_parts(request, project_id):
                 db.generation_jobs.insert_one(job_doc)
                 
                 # Update part with model_id
-                part['model_id'] = str(model_id)
-                part['status'] = 'generating'
+                part_updates.append(UpdateOne(
+                    {'_id': part['_id']},
+                    {'$set': {'model_id': str(model_id), 'status': 'generating', 'updated_at': datetime.utcnow()}}
+                ))
                 
                 generated_count += 1
                 logger.info(f"Started generation for part {part['part_number']}: {part['name']}")
             
             except Exception as e:
                 logger.error(f"Failed to start generation for part {part['name']}: {e}")
-                part['status'] = 'failed'
+                part_updates.append(UpdateOne(
+                    {'_id': part['_id']},
+                    {'$set': {'status': 'failed', 'updated_at': datetime.utcnow()}}
+                ))
         
-        # Update parts in breakdown
-        db.part_breakdowns.update_one(
-            {'project_id': to_object_id(project_id)},
-            {'$set': {'parts': parts_list}}
-        )
+        # Update parts
+        if part_updates:
+            db.parts.bulk_write(part_updates, ordered=False)
         
         return HttpResponse(f'''
             <div class="cad-card mb-6">
@@ -5,7 +5,7 @@ Collects user ratings and corrections for generated models.
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.conf import settings
-from models.mongodb import db, to_object_id
+from models.mongodb import db, to_object_id, get_project_part
 from models.views import session_login_required
 from pathlib import Path
 from datetime import datetime
@@ -78,19 +78,14 @@ def submit_feedback(request, project_id):
                     'error': 'part_number is required for part feedback'
                 }, status=400)
                 
-            # Find the part in the breakdown
-            breakdown = db.part_breakdowns.find_one({'project_id': to_object_id(project_id)})
-            if not breakdown:
+            # Find the part
+            if not db.part_breakdowns.count_documents({'project_id': to_object_id(project_id)}, limit=1):
                 return JsonResponse({
                     'success': False,
                     'error': 'Part breakdown not found'
                 }, status=404)
             
-            part_data = None
-            for p in breakdown.get('parts', []):
-                if p.get('part_number') == int(part_number):
-                    part_data = p
-                    break
+            part_data = get_project_part(project_id, part_number)
             
             if not part_data:
                 return JsonResponse({
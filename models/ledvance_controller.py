@@ -6,14 +6,41 @@ Uses TinyTuya protocol 3.5 for local network control
 import tinytuya
 import colorsys
 import time
-from typing import Dict, List, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import select
+import logging
+import functools
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _serialized(method):
+    """
+    Run a LedvanceLight method holding the light's lock: one command at a time
+    per bulb. Lights without keep_alive disconnect when the outermost call ends.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            self._depth += 1
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self._depth -= 1
+                if not self._depth and not self.keep_alive:
+                    self.close()
+    return wrapper
 
 
 class LedvanceLight:
     """Controller for a single Ledvance Smart+ WiFi bulb"""
     
-    def __init__(self, dev_id: str, ip: str, local_key: str, name: str = None, version: float = 3.3):
+    def __init__(self, dev_id: str, ip: str, local_key: str, name: str = None, version: float = 3.3,
+                 keep_alive: bool = True):
         """
         Initialize Ledvance light controller
         
@@ -23,26 +50,60 @@ class LedvanceLight:
             local_key: Local encryption key from Ledvance app
             name: Friendly name for the light
             version: Protocol version (3.3 or 3.5, default 3.3)
+            keep_alive: Keep the connection open between commands. Bulbs
+                usually accept a single local connection, so only one process
+                per host should do this (see models/ledvance_service.py)
         """
         self.dev_id = dev_id
         self.ip = ip
         self.local_key = local_key
         self.name = name or dev_id
         self.version = version
+        self.keep_alive = keep_alive
+        # Connected lazily on first use
         self.bulb = None
-        self._connect()
+        # Held for every exchange with the bulb; the socket is not safe to share
+        self._lock = threading.RLock()
+        self._depth = 0
+        # State cache: last status read or pushed (served marked stale when the bulb is slow)
+        self.last_status: Optional[Dict] = None
+        # Set while LightListener holds this bulb's connection and hears from it
+        self.listened = False
+        self.last_seen = 0.0
     
     def _connect(self):
         """Establish connection to the bulb"""
         try:
-            self.bulb = tinytuya.BulbDevice(self.dev_id, self.ip, self.local_key)
-            self.bulb.set_version(self.version)
-            self.bulb.set_socketPersistent(True)
+            bulb = tinytuya.BulbDevice(self.dev_id, self.ip, self.local_key)
+            bulb.set_version(self.version)
+            bulb.set_socketPersistent(True)
+            self.bulb = bulb
             print(f"Connected to {self.name} using protocol version {self.version}")
         except Exception as e:
             print(f"Failed to connect to {self.name} ({self.ip}): {e}")
             raise
     
+    def _device(self) -> tinytuya.BulbDevice:
+        """The connected bulb, connecting on first use (or after an error)"""
+        if self.bulb is None:
+            self._connect()
+        return self.bulb
+    
+    def close(self):
+        """Drop the connection; the next command reconnects"""
+        bulb, self.bulb = self.bulb, None
+        self.listened = False
+        if bulb is not None:
+            try:
+                bulb.close()
+            except Exception:
+                pass
+    
+    def matches(self, ip: str, local_key: str, version: float) -> bool:
+        """Whether this controller was created for the given connection settings"""
+        return (self.ip, self.local_key, self.version) == (ip, local_key, version)
+    
+    @_serialized
     def get_status(self) -> Dict:
         """
         Get current status of the bulb
@@ -51,52 +112,93 @@ class LedvanceLight:
             Dict with DPS values and parsed state
         """
         try:
-            status = self.bulb.status()
-            dps = status.get('dps', {})
-            
-            # Parse DPS into human-readable format
-            parsed = {
-                'online': status.get('online', False),
-                'power': dps.get('20', False),
-                'mode': dps.get('21', 'unknown'),
-                'brightness': dps.get('22', 0) // 10 if dps.get('22') else 0,
-                'color_temp_raw': dps.get('23', 0),
-                'color_temp_kelvin': self._dps23_to_kelvin(dps.get('23', 0)),
-                'color_hsv': dps.get('24', ''),
-                'raw_dps': dps
-            }
-            
+            status = self._device().status()
+            parsed = self._parse_dps(status.get('dps', {}), status.get('online', False))
+            self.last_status = parsed
+            self.last_seen = time.monotonic()
             return parsed
         except Exception as e:
             print(f"Failed to get status for {self.name}: {e}")
+            self.close()
             return {'online': False, 'error': str(e)}
     
+    def _parse_dps(self, dps: Dict, online: bool) -> Dict:
+        """Parse DPS into human-readable format"""
+        return {
+            'online': online,
+            'power': dps.get('20', False),
+            'mode': dps.get('21', 'unknown'),
+            'brightness': dps.get('22', 0) // 10 if dps.get('22') else 0,
+            'color_temp_raw': dps.get('23', 0),
+            'color_temp_kelvin': self._dps23_to_kelvin(dps.get('23', 0)),
+            'color_hsv': dps.get('24', ''),
+            'raw_dps': dps
+        }
+    
+    def apply_dps(self, dps: Dict):
+        """
+        Merge changed DPS values (a status push or a command just sent) into
+        the state cache
+        """
+        if not self.last_status:
+            # Only a partial picture; the next status read fills it in
+            return
+        merged = dict(self.last_status.get('raw_dps') or {}, **dps)
+        self.last_status = self._parse_dps(merged, self.last_status.get('online', True))
+    
+    def _send_dps(self, payload: Dict):
+        """
+        Set several DPS in one message and wait for the bulb's reply, so the
+        next command never races a mode switch still being applied
+
+        The commanded values go into the state cache before sending, so status
+        reads reflect the command at once. The bulb's push or the next status
+        read reconciles it; on failure the caller closes the connection, which
+        stops the cache being served until the listener has re-read the bulb.
+        """
+        self.apply_dps(payload)
+        result = self._device().set_multiple_values(payload)
+        if isinstance(result, dict) and result.get('Error'):
+            raise ConnectionError(result['Error'])
+    
+    def cached_status(self) -> Optional[Dict]:
+        """The cached state while LightListener keeps it current, else None"""
+        if self.listened and self.last_status:
+            return dict(self.last_status)
+        return None
+    
+    @_serialized
     def turn_on(self) -> bool:
         """Turn the light on"""
         try:
-            self.bulb.set_value('20', True)
+            self._send_dps({'20': True})
             return True
         except Exception as e:
             print(f"Failed to turn on {self.name}: {e}")
+            self.close()
             return False
     
+    @_serialized
     def turn_off(self) -> bool:
         """Turn the light off"""
         try:
-            self.bulb.set_value('20', False)
+            self._send_dps({'20': False})
             return True
         except Exception as e:
             print(f"Failed to turn off {self.name}: {e}")
+            self.close()
             return False
     
+    @_serialized
     def toggle(self) -> bool:
         """Toggle the light on/off"""
-        status = self.get_status()
+        status = self.cached_status() or self.get_status()
         if status.get('power'):
             return self.turn_off()
         else:
             return self.turn_on()
     
+    @_serialized
     def set_brightness(self, brightness: int) -> bool:
         """
         Set brightness in white mode
@@ -110,12 +212,14 @@ class LedvanceLight:
                 '21': 'white',
                 '22': brightness * 10
             }
-            self.bulb.set_multiple_values(payload)
+            self._send_dps(payload)
             return True
         except Exception as e:
             print(f"Failed to set brightness for {self.name}: {e}")
+            self.close()
             return False
     
+    @_serialized
     def set_color_temperature(self, kelvin: int) -> bool:
         """
         Set color temperature in white mode
@@ -130,12 +234,14 @@ class LedvanceLight:
                 '21': 'white',
                 '23': dps23
             }
-            self.bulb.set_multiple_values(payload)
+            self._send_dps(payload)
             return True
         except Exception as e:
             print(f"Failed to set color temperature for {self.name}: {e}")
+            self.close()
             return False
     
+    @_serialized
     def set_white(self, brightness: int, kelvin: int) -> bool:
         """
         Set white mode with brightness and color temperature
@@ -154,12 +260,14 @@ class LedvanceLight:
                 '22': brightness * 10,
                 '23': dps23
             }
-            self.bulb.set_multiple_values(payload)
+            self._send_dps(payload)
             return True
         except Exception as e:
             print(f"Failed to set white mode for {self.name}: {e}")
+            self.close()
             return False
     
+    @_serialized
     def set_rgb(self, r: int, g: int, b: int, saturation: int = 100) -> bool:
         """
         Set RGB color
@@ -171,10 +279,6 @@ class LedvanceLight:
             saturation: 1-100 percentage
         """
         try:
-            # Switch to colour mode
-            self.bulb.set_multiple_values({'21': 'colour'})
-            time.sleep(0.3)  # Wait for mode switch
-            
             # Convert RGB to HSV
             r = max(0, min(255, r))
             g = max(0, min(255, g))
@@ -185,14 +289,16 @@ class LedvanceLight:
             hue = h * 360
             sat = saturation / 100
             
-            # Format as hex HSV
+            # Format as hex HSV; mode and colour in one payload
             hsv_hex = self._hsv_to_hex(hue, sat, 1.0)
-            self.bulb.set_value('24', hsv_hex)
+            self._send_dps({'21': 'colour', '24': hsv_hex})
             return True
         except Exception as e:
             print(f"Failed to set RGB for {self.name}: {e}")
+            self.close()
             return False
     
+    @_serialized
     def set_hsv(self, hue: float, saturation: float, value: float) -> bool:
         """
         Set HSV color directly
@@ -203,15 +309,12 @@ class LedvanceLight:
             value: 0-1 (0-100%)
         """
         try:
-            # Switch to colour mode
-            self.bulb.set_multiple_values({'21': 'colour'})
-            time.sleep(0.3)
-            
             hsv_hex = self._hsv_to_hex(hue, saturation, value)
-            self.bulb.set_value('24', hsv_hex)
+            self._send_dps({'21': 'colour', '24': hsv_hex})
             return True
         except Exception as e:
             print(f"Failed to set HSV for {self.name}: {e}")
+            self.close()
             return False
     
     # Helper methods
@@ -254,7 +357,7 @@ class LedvanceLight:
 class LightGroup:
     """Controller for a group of lights"""
     
-    def __init__(self, group_id: str, name: str, lights: List[LedvanceLight]):
+    def __init__(self, group_id: str, name: str, lights: List[LedvanceLight], fleet: 'LightFleet' = None):
         """
         Initialize light group
         
@@ -262,23 +365,37 @@ class LightGroup:
             group_id: Unique group identifier
             name: Group name
             lights: List of LedvanceLight objects
+            fleet: Fleet that talks to the bulbs (default: this process's light_fleet)
         """
         self.group_id = group_id
         self.name = name
         self.lights = lights
+        self.fleet = fleet
     
-    def get_status(self) -> Dict:
-        """Get status of all lights in group"""
-        statuses = []
+    def _fleet(self) -> 'LightFleet':
+        return self.fleet or light_fleet
+    
+    def get_status(self, statuses: Optional[Dict[str, Dict]] = None) -> Dict:
+        """
+        Get status of all lights in group
+        
+        Args:
+            statuses: dev_id -> status already collected (e.g. for all of a
+                user's lights at once); fetched concurrently when omitted
+        """
+        if statuses is None:
+            statuses = self._fleet().get_statuses(self.lights)
+        
+        light_statuses = []
         for light in self.lights:
-            status = light.get_status()
+            status = dict(statuses.get(light.dev_id) or {'online': False})
             status['light_name'] = light.name
             status['light_id'] = light.dev_id
-            statuses.append(status)
+            light_statuses.append(status)
         
         # Calculate group state
-        online_count = sum(1 for s in statuses if s.get('online'))
-        on_count = sum(1 for s in statuses if s.get('power'))
+        online_count = sum(1 for s in light_statuses if s.get('online'))
+        on_count = sum(1 for s in light_statuses if s.get('power'))
         
         return {
             'group_id': self.group_id,
@@ -288,170 +405,313 @@ class LightGroup:
             'lights_on': on_count,
             'all_on': on_count == len(self.lights),
             'any_on': on_count > 0,
-            'lights': statuses
+            'stale_lights': sum(1 for s in light_statuses if s.get('stale')),
+            'lights': light_statuses
         }
     
     def turn_on(self) -> Dict[str, bool]:
         """Turn on all lights in group in parallel"""
-        results = {}
-        
-        def turn_on_light(light):
-            return (light.dev_id, light.turn_on())
-        
-        with ThreadPoolExecutor(max_workers=len(self.lights)) as executor:
-            futures = [executor.submit(turn_on_light, light) for light in self.lights]
-            for future in as_completed(futures):
-                try:
-                    dev_id, success = future.result()
-                    results[dev_id] = success
-                except Exception as e:
-                    print(f"Error turning on light: {e}")
-        
-        return results
+        return self._fleet().run(self.lights, 'turn_on')
     
     def turn_off(self) -> Dict[str, bool]:
         """Turn off all lights in group in parallel"""
-        results = {}
-        
-        def turn_off_light(light):
-            return (light.dev_id, light.turn_off())
-        
-        with ThreadPoolExecutor(max_workers=len(self.lights)) as executor:
-            futures = [executor.submit(turn_off_light, light) for light in self.lights]
-            for future in as_completed(futures):
-                try:
-                    dev_id, success = future.result()
-                    results[dev_id] = success
-                except Exception as e:
-                    print(f"Error turning off light: {e}")
-        
-        return results
+        return self._fleet().run(self.lights, 'turn_off')
     
     def toggle(self) -> Dict[str, bool]:
         """Toggle all lights in group in parallel"""
-        results = {}
-        
-        def toggle_light(light):
-            return (light.dev_id, light.toggle())
-        
-        with ThreadPoolExecutor(max_workers=len(self.lights)) as executor:
-            futures = [executor.submit(toggle_light, light) for light in self.lights]
-            for future in as_completed(futures):
-                try:
-                    dev_id, success = future.result()
-                    results[dev_id] = success
-                except Exception as e:
-                    print(f"Error toggling light: {e}")
-        
-        return results
+        return self._fleet().run(self.lights, 'toggle')
     
     def set_brightness(self, brightness: int) -> Dict[str, bool]:
         """Set brightness for all lights in parallel"""
-        results = {}
-        
-        def set_light_brightness(light):
-            return (light.dev_id, light.set_brightness(brightness))
-        
-        # Execute all light commands in parallel
-        with ThreadPoolExecutor(max_workers=len(self.lights)) as executor:
-            futures = [executor.submit(set_light_brightness, light) for light in self.lights]
-            for future in as_completed(futures):
-                try:
-                    dev_id, success = future.result()
-                    results[dev_id] = success
-                except Exception as e:
-                    print(f"Error setting brightness: {e}")
-        
-        return results
+        return self._fleet().run(self.lights, 'set_brightness', brightness)
     
     def set_color_temperature(self, kelvin: int) -> Dict[str, bool]:
         """Set color temperature for all lights in parallel"""
-        results = {}
-        
-        def set_light_temperature(light):
-            return (light.dev_id, light.set_color_temperature(kelvin))
-        
-        with ThreadPoolExecutor(max_workers=len(self.lights)) as executor:
-            futures = [executor.submit(set_light_temperature, light) for light in self.lights]
-            for future in as_completed(futures):
-                try:
-                    dev_id, success = future.result()
-                    results[dev_id] = success
-                except Exception as e:
-                    print(f"Error setting temperature: {e}")
-        
-        return results
+        return self._fleet().run(self.lights, 'set_color_temperature', kelvin)
     
     def set_white(self, brightness: int, kelvin: int) -> Dict[str, bool]:
         """Set white mode for all lights in parallel"""
-        results = {}
-        
-        def set_light_white(light):
-            return (light.dev_id, light.set_white(brightness, kelvin))
-        
-        with ThreadPoolExecutor(max_workers=len(self.lights)) as executor:
-            futures = [executor.submit(set_light_white, light) for light in self.lights]
-            for future in as_completed(futures):
-                try:
-                    dev_id, success = future.result()
-                    results[dev_id] = success
-                except Exception as e:
-                    print(f"Error setting white mode: {e}")
-        
-        return results
+        return self._fleet().run(self.lights, 'set_white', brightness, kelvin)
     
     def set_rgb(self, r: int, g: int, b: int, saturation: int = 100) -> Dict[str, bool]:
         """Set RGB color for all lights in parallel"""
-        results = {}
-        
-        def set_light_rgb(light):
-            return (light.dev_id, light.set_rgb(r, g, b, saturation))
-        
-        with ThreadPoolExecutor(max_workers=len(self.lights)) as executor:
-            futures = [executor.submit(set_light_rgb, light) for light in self.lights]
-            for future in as_completed(futures):
-                try:
-                    dev_id, success = future.result()
-                    results[dev_id] = success
-                except Exception as e:
-                    print(f"Error setting RGB: {e}")
-        
-        return results
+        return self._fleet().run(self.lights, 'set_rgb', r, g, b, saturation)
     
     def set_hsv(self, hue: float, saturation: float, value: float) -> Dict[str, bool]:
         """Set HSV color for all lights in parallel"""
-        results = {}
-        
-        def set_light_hsv(light):
-            return (light.dev_id, light.set_hsv(hue, saturation, value))
+        return self._fleet().run(self.lights, 'set_hsv', hue, saturation, value)
+
+
+class LightFleet:
+    """
+    Fetches status from and sends commands to many lights concurrently
+    
+    One bounded pool is shared by every light and group command in the
+    process; each light's own lock keeps two commands to the same bulb from
+    racing on its socket.
+    
+    All lights are queried in parallel and the whole batch shares one deadline,
+    so a page of N lights costs roughly the slowest light (capped at the
+    deadline) instead of the sum of every offline bulb's socket timeout.
+    Lights that miss the deadline are reported with their last known status,
+    marked stale; their request keeps running and is reused by the next call
+    instead of queueing a second one.
+    """
+    
+    def __init__(self, max_workers: int = 16, deadline: float = 2.0):
+        self.max_workers = max_workers
+        self.deadline = deadline
+        self._executor = None
+        self._lock = threading.Lock()
+        # dev_id -> status request still running
+        self._in_flight: Dict[str, Future] = {}
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Shared worker pool, created on first use"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix='light-fleet'
+                    )
+        return self._executor
+    
+    def run(self, lights: Iterable[LedvanceLight], command: str, *args) -> Dict[str, bool]:
+        """
+        Send the same command to several lights in parallel
         
-        with ThreadPoolExecutor(max_workers=len(self.lights)) as executor:
-            futures = [executor.submit(set_light_hsv, light) for light in self.lights]
-            for future in as_completed(futures):
-                try:
-                    dev_id, success = future.result()
-                    results[dev_id] = success
-                except Exception as e:
-                    print(f"Error setting HSV: {e}")
+        Args:
+            lights: Lights to command
+            command: LedvanceLight method name, e.g. 'turn_on'
+            *args: Arguments for the method
         
+        Returns:
+            Dict mapping dev_id to whether the command succeeded
+        """
+        futures = {self.executor.submit(getattr(light, command), *args): light.dev_id for light in lights}
+        results = {}
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                logger.error(f"Error running {command} on light {futures[future]}: {e}")
+                results[futures[future]] = False
         return results
+    
+    def forget(self, dev_ids: Iterable[str]):
+        """Lights were removed; in-process there is nothing to do (LightManager.remove_light closes them)"""
+    
+    def refresh(self, light: LedvanceLight) -> Future:
+        """Read a light's status on the pool (joining a read already running)"""
+        executor = self.executor
+        with self._lock:
+            future = self._in_flight.get(light.dev_id)
+            if future is not None:
+                return future
+            future = executor.submit(light.get_status)
+            self._in_flight[light.dev_id] = future
+        future.add_done_callback(lambda _: self._forget(light.dev_id, future))
+        return future
+    
+    def _forget(self, dev_id: str, future: Future):
+        with self._lock:
+            if self._in_flight.get(dev_id) is future:
+                del self._in_flight[dev_id]
+    
+    @staticmethod
+    def _stale_status(light: LedvanceLight) -> Dict:
+        if light.last_status:
+            return dict(light.last_status, stale=True)
+        return {'online': False, 'stale': True, 'error': 'Status request timed out'}
+    
+    def get_statuses(self, lights: Iterable[LedvanceLight], deadline: float = None) -> Dict[str, Dict]:
+        """
+        Get the status of several lights at once
+        
+        Args:
+            lights: Lights to query
+            deadline: Seconds to wait for the whole batch (default: self.deadline)
+        
+        Returns:
+            Dict mapping dev_id to its status (from the state cache for
+            listened lights); lights that missed the deadline get their last
+            known status with 'stale': True
+        """
+        lights = {light.dev_id: light for light in lights}
+        statuses = {}
+        futures = {}
+        for dev_id, light in lights.items():
+            # Lights kept current by LightListener need no round-trip
+            cached = light.cached_status()
+            if cached is not None:
+                statuses[dev_id] = cached
+            else:
+                futures[self.refresh(light)] = dev_id
+        if not futures:
+            return statuses
+        
+        done, not_done = wait(futures, timeout=self.deadline if deadline is None else deadline)
+        
+        statuses.update((futures[future], future.result()) for future in done)
+        for future in not_done:
+            dev_id = futures[future]
+            logger.warning(f"Light {lights[dev_id].name} missed the status deadline")
+            statuses[dev_id] = self._stale_status(lights[dev_id])
+        return statuses
 
 
-class LightManager:
-    """Manager for all lights and groups"""
+class LightListener:
+    """
+    Background thread that keeps the state cache of every registered light
+    current from the bulbs' own status pushes.
+    
+    Tuya bulbs report every DPS change (from the app, a wall switch or
+    another controller) on their open connection. One thread waits on all
+    bulb sockets at once and merges whatever arrives into the light's
+    last_status; heartbeats keep idle connections open, and bulbs that go
+    quiet are closed and reconnected through the fleet pool. While a light is
+    listened, status reads come straight from its cache.
+    
+    It needs the manager's lights to keep their connections open, so it runs
+    only in the light service (models/ledvance_service.py), once per host.
+    """
+    
+    def __init__(self, fleet: 'LightFleet', heartbeat: float = 10.0, poll: float = 1.0):
+        self.fleet = fleet
+        self.heartbeat = heartbeat
+        self.poll = poll
+        self.manager = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._heartbeats: Dict[str, float] = {}
+        self._reconnects: Dict[str, float] = {}
+    
+    def start(self, manager: 'LightManager'):
+        """Listen to the manager's lights (no-op if already running)"""
+        with self._lock:
+            self.manager = manager
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='light-listener', daemon=True)
+                self._thread.start()
+    
+    def _run(self):
+        while True:
+            try:
+                self._step()
+            except Exception as e:
+                logger.error(f"Light listener error: {e}")
+                time.sleep(self.poll)
+    
+    def _step(self):
+        now = time.monotonic()
+        sockets = {}
+        for light in self.manager.get_all_lights():
+            sock = getattr(light.bulb, 'socket', None)
+            if sock is None:
+                light.listened = False
+                # Connect (and read the full state) on the pool, backing off for offline bulbs
+                if now >= self._reconnects.get(light.dev_id, 0):
+                    self._reconnects[light.dev_id] = now + self.heartbeat * 3
+                    self.fleet.refresh(light)
+                continue
+            if light.listened and now - light.last_seen > self.heartbeat * 3:
+                # No reply to our heartbeats: the bulb is gone, reconnect
+                with light._lock:
+                    light.close()
+                continue
+            if not light.listened:
+                # Newly connected: the heartbeat window starts now
+                light.listened = True
+                light.last_seen = now
+            sockets[sock] = light
+            if now - self._heartbeats.get(light.dev_id, 0) >= self.heartbeat:
+                self._send(light, 'heartbeat')
+                self._heartbeats[light.dev_id] = now
+        
+        if not sockets:
+            time.sleep(self.poll)
+            return
+        try:
+            readable, _, _ = select.select(list(sockets), [], [], self.poll)
+        except (OSError, ValueError):
+            # A socket was closed by a command thread meanwhile; rebuild the set
+            return
+        for sock in readable:
+            light = sockets[sock]
+            data = self._send(light, 'receive')
+            if isinstance(data, dict) and 'dps' in data:
+                light.apply_dps(data['dps'])
     
-    def __init__(self):
+    @staticmethod
+    def _send(light: LedvanceLight, call: str):
+        """Heartbeat or read a bulb unless a command holds it (that command sees the reply)"""
+        if not light._lock.acquire(blocking=False):
+            return None
+        try:
+            bulb = light.bulb
+            if bulb is None:
+                return None
+            # Single read: without this tinytuya waits out its retries on empty heartbeat replies
+            retry = bulb.retry
+            bulb.set_retry(False)
+            try:
+                data = getattr(bulb, call)()
+            finally:
+                bulb.set_retry(retry)
+            if isinstance(data, dict) and data.get('Error'):
+                light.close()
+                return None
+            if call == 'receive':
+                light.last_seen = time.monotonic()
+            return data
+        except Exception as e:
+            logger.warning(f"Lost connection to {light.name}: {e}")
+            light.close()
+            return None
+        finally:
+            light._lock.release()
+
+
+class LightManager:
+    """
+    Long-lived registry of all lights and groups, keyed by device ID.
+
+    Controllers live between requests. sync_user() brings a user's lights and
+    groups in line with their database documents, reusing every controller
+    whose connection settings are unchanged; it is only needed when the user's
+    stored version changes.
+    
+    Args:
+        fleet: Fleet the groups send commands through (default: light_fleet)
+        keep_alive: Whether lights keep their bulb connection open between
+            commands (only in the one process that owns the connections)
+    """
+    
+    def __init__(self, fleet: 'LightFleet' = None, keep_alive: bool = True):
+        self.fleet = fleet
+        self.keep_alive = keep_alive
         self.lights: Dict[str, LedvanceLight] = {}
         self.groups: Dict[str, LightGroup] = {}
+        # light_id (database ID) -> dev_id
+        self.light_ids: Dict[str, str] = {}
+        # user_id -> version the user's lights and groups were last synced at
+        self.versions: Dict[str, int] = {}
+        self._lock = threading.RLock()
     
     def add_light(self, light: LedvanceLight):
         """Add a light to the manager"""
         self.lights[light.dev_id] = light
+        if getattr(light, 'light_id', None):
+            self.light_ids[light.light_id] = light.dev_id
     
     def remove_light(self, dev_id: str):
         """Remove a light from the manager"""
-        if dev_id in self.lights:
-            del self.lights[dev_id]
+        light = self.lights.pop(dev_id, None)
+        if light:
+            self.light_ids.pop(getattr(light, 'light_id', None), None)
+            light.close()
     
     def get_light(self, dev_id: str) -> Optional[LedvanceLight]:
         """Get a light by device ID"""
@@ -484,6 +744,96 @@ class LightManager:
         if not lights:
             return None
         
-        group = LightGroup(group_id, name, lights)
+        group = LightGroup(group_id, name, lights, fleet=self.fleet)
         self.add_group(group)
         return group
+    
+    # Per-user registry
+    
+    def sync_light(self, light_data: Dict) -> LedvanceLight:
+        """
+        Controller for a light document, reusing the registered one (and its
+        open connection) unless the IP, key or protocol version changed
+        """
+        with self._lock:
+            dev_id = light_data['dev_id']
+            version = light_data.get('version', 3.3)
+            light = self.lights.get(dev_id)
+            if light is None or not light.matches(light_data['ip'], light_data['local_key'], version):
+                if light is not None:
+                    self.remove_light(dev_id)
+                light = LedvanceLight(
+                    dev_id=dev_id,
+                    ip=light_data['ip'],
+                    local_key=light_data['local_key'],
+                    name=light_data.get('name', dev_id),
+                    version=version,
+                    keep_alive=self.keep_alive
+                )
+            light.name = light_data.get('name', dev_id)
+            light.user_id = light_data.get('user_id')
+            light.light_id = str(light_data['_id'])
+            light.room = light_data.get('room', '')
+            self.add_light(light)
+            return light
+    
+    def sync_user(self, user_id: str, version: int, light_docs: List[Dict], group_docs: List[Dict]):
+        """Replace a user's lights and groups with the given database documents"""
+        with self._lock:
+            current = set()
+            for light_data in light_docs:
+                try:
+                    current.add(self.sync_light(light_data).dev_id)
+                except Exception as e:
+                    print(f"Failed to load light {light_data.get('name')}: {e}")
+            
+            for light in self.get_user_lights(user_id):
+                if light.dev_id not in current:
+                    self.remove_light(light.dev_id)
+            
+            for group in self.get_user_groups(user_id):
+                self.remove_group(group.group_id)
+            for group_data in group_docs:
+                lights = [self.lights[dev_id] for dev_id in group_data.get('light_ids', []) if dev_id in current]
+                if lights:
+                    group = LightGroup(
+                        group_id=str(group_data['_id']),
+                        name=group_data['name'],
+                        lights=lights,
+                        fleet=self.fleet
+                    )
+                    group.user_id = user_id
+                    group.room = group_data.get('room', '')
+                    self.add_group(group)
+            
+            self.versions[user_id] = version
+    
+    def get_user_lights(self, user_id: str) -> List[LedvanceLight]:
+        """All lights belonging to a user"""
+        return [l for l in self.get_all_lights() if getattr(l, 'user_id', None) == user_id]
+    
+    def get_user_light(self, user_id: str, light_id: str) -> Optional[LedvanceLight]:
+        """A user's light by its database ID"""
+        light = self.lights.get(self.light_ids.get(light_id))
+        if light is not None and getattr(light, 'user_id', None) == user_id:
+            return light
+        return None
+    
+    def get_user_groups(self, user_id: str) -> List[LightGroup]:
+        """All groups belonging to a user"""
+        return [g for g in self.get_all_groups() if getattr(g, 'user_id', None) == user_id]
+    
+    def get_user_group(self, user_id: str, group_id: str) -> Optional[LightGroup]:
+        """A user's group by ID"""
+        group = self.groups.get(group_id)
+        if group is not None and getattr(group, 'user_id', None) == user_id:
+            return group
+        return None
+
+
+# Shared by all light views
+light_fleet = LightFleet(
+    max_workers=settings.LEDVANCE_MAX_WORKERS,
+    deadline=settings.LEDVANCE_STATUS_DEADLINE
+)
+light_listener = LightListener(light_fleet, heartbeat=settings.LEDVANCE_HEARTBEAT)
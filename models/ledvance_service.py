@@ -0,0 +1,220 @@
+"""
+Ledvance Light Service
+
+Bulbs usually accept a single local connection at a time, so persistent
+connections only work when one process per host owns them. This service is
+that process: it keeps every light's connection open, runs their commands and
+status reads on its own LightFleet, keeps their state current with the one
+LightListener for the host, and answers the web workers over a small
+JSON-lines protocol on LEDVANCE_SERVICE_ADDRESS (one request and one reply
+per connection).
+
+Clients name lights by their database ID only; the service reads the IP and
+local key from MongoDB itself, so a client can never point it at another
+device. Every request must carry LEDVANCE_SERVICE_SECRET, and the service
+only binds to a loopback address unless told otherwise.
+
+Web workers talk to it through RemoteLightFleet, which has the same
+get_statuses/run/forget interface as LightFleet, so LightGroup and the views
+do not care which one they are given. Without a service configured the web
+workers use an in-process LightFleet and close each bulb connection after
+every command.
+"""
+
+import hmac
+import json
+import logging
+import socket
+import ipaddress
+import socketserver
+from typing import Dict, Iterable, List
+
+from bson import ObjectId
+
+from .ledvance_controller import LedvanceLight, LightFleet, LightListener, LightManager
+from .mongodb import db
+
+logger = logging.getLogger(__name__)
+
+# LedvanceLight methods the service will run for a client
+COMMANDS = {
+    'turn_on', 'turn_off', 'toggle', 'set_brightness', 'set_color_temperature',
+    'set_white', 'set_rgb', 'set_hsv',
+}
+
+
+def parse_address(address: str):
+    """'host:port' -> (host, port)"""
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def is_loopback(host: str) -> bool:
+    """True for 'localhost' and loopback IP addresses"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def secret_matches(secret, expected: str) -> bool:
+    """Constant-time comparison of a client's secret with the service's"""
+    return bool(expected) and hmac.compare_digest(str(secret or '').encode(), expected.encode())
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            reply = {'result': self.server.service.dispatch(request)}
+        except Exception as e:
+            logger.error(f"Light service request failed: {e}")
+            reply = {'error': str(e)}
+        self.wfile.write(json.dumps(reply).encode() + b'\n')
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class LightService:
+    """
+    Owns the bulb connections for one host
+
+    Args:
+        fleet: Local fleet that runs the commands
+        secret: Shared secret every request must carry
+        listener: Listener to keep the lights' state current (optional)
+    """
+
+    def __init__(self, fleet: LightFleet, secret: str, listener: LightListener = None):
+        if not secret:
+            raise ValueError('The light service needs a shared secret')
+        self.fleet = fleet
+        self.secret = secret
+        self.listener = listener
+        self.manager = LightManager(fleet=fleet, keep_alive=True)
+
+    def load(self) -> int:
+        """Register every stored light so their connections open up front"""
+        count = 0
+        for light_data in db.ledvance_lights.find():
+            try:
+                self.manager.sync_light(light_data)
+                count += 1
+            except Exception as e:
+                logger.error(f"Failed to load light {light_data.get('name')}: {e}")
+        return count
+
+    def _lights(self, light_ids: List[str]) -> List[LedvanceLight]:
+        # Read from the database on every request so edits made by the web
+        # workers apply at once; unknown IDs are skipped
+        ids = [ObjectId(light_id) for light_id in light_ids if ObjectId.is_valid(light_id)]
+        return [self.manager.sync_light(light_data) for light_data in db.ledvance_lights.find({'_id': {'$in': ids}})]
+
+    def dispatch(self, request: Dict):
+        """Run one client request"""
+        if not secret_matches(request.get('secret'), self.secret):
+            raise PermissionError('Invalid light service secret')
+        op = request.get('op')
+        if op == 'statuses':
+            return self.fleet.get_statuses(self._lights(request['light_ids']), request.get('deadline'))
+        if op == 'run':
+            if request['command'] not in COMMANDS:
+                raise ValueError(f"Unknown command {request['command']}")
+            return self.fleet.run(self._lights(request['light_ids']), request['command'], *request.get('args', []))
+        if op == 'forget':
+            for dev_id in request['dev_ids']:
+                self.manager.remove_light(dev_id)
+            return None
+        raise ValueError(f'Unknown op {op}')
+
+    def serve_forever(self, address: str, allow_remote: bool = False):
+        """Answer clients on address until interrupted (loopback only unless allow_remote)"""
+        host, port = parse_address(address)
+        if not allow_remote and not is_loopback(host):
+            raise ValueError(f'Refusing to serve lights on non-loopback address {host}')
+        if self.listener is not None:
+            self.listener.start(self.manager)
+        with _Server((host, port), _RequestHandler) as server:
+            server.service = self
+            server.serve_forever()
+
+
+class RemoteLightFleet:
+    """
+    LightFleet stand-in that forwards to the light service
+
+    When the service cannot be reached lights are reported offline and
+    commands as failed, as they would be for an unreachable bulb.
+
+    Args:
+        address: Service 'host:port'
+        secret: Shared secret sent with every request
+        timeout: Socket timeout for one request (seconds)
+        deadline: Default status deadline passed to the service
+    """
+
+    def __init__(self, address: str, secret: str, timeout: float = 30.0, deadline: float = 2.0):
+        self.address = parse_address(address)
+        self.secret = secret
+        self.timeout = timeout
+        self.deadline = deadline
+
+    def _call(self, request: Dict):
+        request = {**request, 'secret': self.secret}
+        with socket.create_connection(self.address, timeout=self.timeout) as conn:
+            conn.sendall(json.dumps(request).encode() + b'\n')
+            with conn.makefile('rb') as reply_file:
+                reply = json.loads(reply_file.readline())
+        if 'error' in reply:
+            raise RuntimeError(reply['error'])
+        return reply['result']
+
+    def get_statuses(self, lights: Iterable[LedvanceLight], deadline: float = None) -> Dict[str, Dict]:
+        """Statuses of several lights (see LightFleet.get_statuses)"""
+        lights = list(lights)
+        if not lights:
+            return {}
+        try:
+            statuses = self._call({
+                'op': 'statuses',
+                'light_ids': [light.light_id for light in lights],
+                'deadline': self.deadline if deadline is None else deadline,
+            })
+        except Exception as e:
+            logger.error(f"Light service unavailable: {e}")
+            return {light.dev_id: {'online': False, 'error': f'Light service unavailable: {e}'} for light in lights}
+        # Lights deleted since the client loaded them are not in the reply
+        for light in lights:
+            statuses.setdefault(light.dev_id, {'online': False, 'error': 'Light not found'})
+        return statuses
+
+    def run(self, lights: Iterable[LedvanceLight], command: str, *args) -> Dict[str, bool]:
+        """Send the same command to several lights (see LightFleet.run)"""
+        lights = list(lights)
+        if not lights:
+            return {}
+        try:
+            results = self._call({
+                'op': 'run',
+                'light_ids': [light.light_id for light in lights],
+                'command': command,
+                'args': list(args),
+            })
+        except Exception as e:
+            logger.error(f"Light service unavailable for {command}: {e}")
+            return {light.dev_id: False for light in lights}
+        for light in lights:
+            results.setdefault(light.dev_id, False)
+        return results
+
+    def forget(self, dev_ids: Iterable[str]):
+        """Close the service's connections to removed lights"""
+        try:
+            self._call({'op': 'forget', 'dev_ids': list(dev_ids)})
+        except Exception as e:
+            logger.warning(f"Light service unavailable to forget lights: {e}")
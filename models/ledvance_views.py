@@ -3,74 +3,58 @@ Ledvance Smart Light API Views
 Handles light control, groups, and device management
 """
 
+from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from models.mongodb import db
 from models.views import session_login_required
-from models.ledvance_controller import LedvanceLight, LightGroup, LightManager
+from models.ledvance_controller import LedvanceLight, LightManager
+from models.ledvance_controller import light_fleet as local_light_fleet
+from models.ledvance_service import RemoteLightFleet
 from datetime import datetime
 from bson import ObjectId
 import json
 
 
-# Global light manager instance
-light_manager = LightManager()
-
-
-def _load_user_lights(user_id: str):
-    """Load all lights for a user from database"""
-    lights = list(db.ledvance_lights.find({'user_id': user_id}))
-    
-    # Clear existing lights for this user
-    for light in light_manager.get_all_lights():
-        if hasattr(light, 'user_id') and light.user_id == user_id:
-            light_manager.remove_light(light.dev_id)
-    
-    # Add lights from database
-    for light_data in lights:
-        try:
-            light = LedvanceLight(
-                dev_id=light_data['dev_id'],
-                ip=light_data['ip'],
-                local_key=light_data['local_key'],
-                name=light_data.get('name', light_data['dev_id']),
-                version=light_data.get('version', 3.3)
-            )
-            light.user_id = user_id
-            light.light_id = str(light_data['_id'])
-            light.room = light_data.get('room', '')
-            light_manager.add_light(light)
-        except Exception as e:
-            print(f"Failed to load light {light_data.get('name')}: {e}")
-
-
-def _load_user_groups(user_id: str):
-    """Load all groups for a user from database"""
-    groups = list(db.ledvance_groups.find({'user_id': user_id}))
-    
-    # Clear existing groups for this user
-    for group in light_manager.get_all_groups():
-        if hasattr(group, 'user_id') and group.user_id == user_id:
-            light_manager.remove_group(group.group_id)
-    
-    # Add groups from database
-    for group_data in groups:
-        try:
-            light_ids = group_data.get('light_ids', [])
-            lights = [light_manager.get_light(lid) for lid in light_ids]
-            lights = [l for l in lights if l and hasattr(l, 'user_id') and l.user_id == user_id]
-            
-            if lights:
-                group = LightGroup(
-                    group_id=str(group_data['_id']),
-                    name=group_data['name'],
-                    lights=lights
-                )
-                group.user_id = user_id
-                group.room = group_data.get('room', '')
-                light_manager.add_group(group)
-        except Exception as e:
-            print(f"Failed to load group {group_data.get('name')}: {e}")
+# Commands go to the light service when one owns the bulb connections;
+# otherwise this process connects for each command and disconnects again, so
+# several web workers never hold competing connections to one bulb
+if settings.LEDVANCE_SERVICE_ADDRESS:
+    light_fleet = RemoteLightFleet(
+        settings.LEDVANCE_SERVICE_ADDRESS,
+        settings.LEDVANCE_SERVICE_SECRET,
+        timeout=settings.LEDVANCE_SERVICE_TIMEOUT,
+        deadline=settings.LEDVANCE_STATUS_DEADLINE
+    )
+else:
+    light_fleet = local_light_fleet
+
+# Process-wide light registry (controllers and groups, not connections)
+light_manager = LightManager(fleet=light_fleet, keep_alive=False)
+
+
+def _bump_version(user_id: str):
+    """Record that a user's lights or groups changed, so every process resyncs them"""
+    db.ledvance_versions.update_one({'_id': user_id}, {'$inc': {'version': 1}}, upsert=True)
+
+
+def _sync_user(user_id: str):
+    """
+    Bring the registry in line with the user's lights and groups in the
+    database. One small lookup when nothing changed; otherwise the documents
+    are reloaded and only lights whose connection settings changed are
+    recreated.
+    """
+    stamp = db.ledvance_versions.find_one({'_id': user_id}, {'version': 1})
+    version = stamp['version'] if stamp else 0
+    if light_manager.versions.get(user_id) == version:
+        return
+    light_manager.sync_user(
+        user_id,
+        version,
+        list(db.ledvance_lights.find({'user_id': user_id})),
+        list(db.ledvance_groups.find({'user_id': user_id}))
+    )
 
 
 @session_login_required
@@ -80,15 +64,15 @@ def api_list_lights(request):
     try:
         user_id = str(request.user.id)
         
-        # Load lights from database
-        _load_user_lights(user_id)
+        _sync_user(user_id)
+        user_lights = light_manager.get_user_lights(user_id)
         
-        # Get all lights for this user
-        user_lights = [l for l in light_manager.get_all_lights() if hasattr(l, 'user_id') and l.user_id == user_id]
+        # All bulbs at once, bounded by one deadline; slow ones come back stale
+        statuses = light_fleet.get_statuses(user_lights)
         
         lights_data = []
         for light in user_lights:
-            status = light.get_status()
+            status = statuses[light.dev_id]
             lights_data.append({
                 'id': light.light_id,
                 'dev_id': light.dev_id,
@@ -100,7 +84,8 @@ def api_list_lights(request):
                 'mode': status.get('mode', 'unknown'),
                 'brightness': status.get('brightness', 0),
                 'color_temp_kelvin': status.get('color_temp_kelvin', 0),
-                'color_hsv': status.get('color_hsv', '')
+                'color_hsv': status.get('color_hsv', ''),
+                'stale': status.get('stale', False)
             })
         
         return JsonResponse({
@@ -146,6 +131,7 @@ def api_add_light(request):
                 
                 test_light = LedvanceLight(dev_id, ip, local_key, name, version)
                 test_status = test_light.get_status()
+                test_light.close()
                 
                 logger.info(f"Connection test result: {test_status}")
                 
@@ -181,12 +167,9 @@ def api_add_light(request):
         result = db.ledvance_lights.insert_one(light_data)
         light_data['_id'] = result.inserted_id
         
-        # Add to manager
-        light = LedvanceLight(dev_id, ip, local_key, name, version)
-        light.user_id = user_id
-        light.light_id = str(result.inserted_id)
-        light.room = room
-        light_manager.add_light(light)
+        # Add to registry
+        _bump_version(user_id)
+        light_manager.sync_light(light_data)
         
         return JsonResponse({
             'success': True,
@@ -228,14 +211,16 @@ def api_remove_light(request, light_id):
         # Remove from database
         db.ledvance_lights.delete_one({'_id': ObjectId(light_id)})
         
-        # Remove from manager
+        # Remove from manager and drop the service's connection
         light_manager.remove_light(light_data['dev_id'])
+        light_fleet.forget([light_data['dev_id']])
         
         # Remove from groups
         db.ledvance_groups.update_many(
             {'user_id': user_id},
             {'$pull': {'light_ids': light_data['dev_id']}}
         )
+        _bump_version(user_id)
         
         return JsonResponse({
             'success': True,
@@ -255,14 +240,9 @@ def api_toggle_light(request, light_id):
     """Toggle a light on/off"""
     try:
         user_id = str(request.user.id)
-        _load_user_lights(user_id)
+        _sync_user(user_id)
         
-        # Find light
-        light = None
-        for l in light_manager.get_all_lights():
-            if hasattr(l, 'light_id') and l.light_id == light_id and l.user_id == user_id:
-                light = l
-                break
+        light = light_manager.get_user_light(user_id, light_id)
         
         if not light:
             return JsonResponse({
@@ -270,8 +250,8 @@ def api_toggle_light(request, light_id):
                 'error': 'Light not found'
             }, status=404)
         
-        success = light.toggle()
-        status = light.get_status()
+        success = light_fleet.run([light], 'toggle')[light.dev_id]
+        status = light_fleet.get_statuses([light])[light.dev_id]
         
         return JsonResponse({
             'success': success,
@@ -291,16 +271,11 @@ def api_set_light_brightness(request, light_id):
     """Set light brightness"""
     try:
         user_id = str(request.user.id)
-        _load_user_lights(user_id)
+        _sync_user(user_id)
         
         brightness = int(request.POST.get('brightness', 50))
         
-        # Find light
-        light = None
-        for l in light_manager.get_all_lights():
-            if hasattr(l, 'light_id') and l.light_id == light_id and l.user_id == user_id:
-                light = l
-                break
+        light = light_manager.get_user_light(user_id, light_id)
         
         if not light:
             return JsonResponse({
@@ -308,7 +283,7 @@ def api_set_light_brightness(request, light_id):
                 'error': 'Light not found'
             }, status=404)
         
-        success = light.set_brightness(brightness)
+        success = light_fleet.run([light], 'set_brightness', brightness)[light.dev_id]
         
         return JsonResponse({
             'success': success,
@@ -328,19 +303,14 @@ def api_set_light_color(request, light_id):
     """Set light RGB color"""
     try:
         user_id = str(request.user.id)
-        _load_user_lights(user_id)
+        _sync_user(user_id)
         
         r = int(request.POST.get('r', 255))
         g = int(request.POST.get('g', 255))
         b = int(request.POST.get('b', 255))
         saturation = int(request.POST.get('saturation', 100))
         
-        # Find light
-        light = None
-        for l in light_manager.get_all_lights():
-            if hasattr(l, 'light_id') and l.light_id == light_id and l.user_id == user_id:
-                light = l
-                break
+        light = light_manager.get_user_light(user_id, light_id)
         
         if not light:
             return JsonResponse({
@@ -348,7 +318,7 @@ def api_set_light_color(request, light_id):
                 'error': 'Light not found'
             }, status=404)
         
-        success = light.set_rgb(r, g, b, saturation)
+        success = light_fleet.run([light], 'set_rgb', r, g, b, saturation)[light.dev_id]
         
         return JsonResponse({
             'success': success,
@@ -368,16 +338,11 @@ def api_set_light_temperature(request, light_id):
     """Set light color temperature"""
     try:
         user_id = str(request.user.id)
-        _load_user_lights(user_id)
+        _sync_user(user_id)
         
         kelvin = int(request.POST.get('kelvin', 4000))
         
-        # Find light
-        light = None
-        for l in light_manager.get_all_lights():
-            if hasattr(l, 'light_id') and l.light_id == light_id and l.user_id == user_id:
-                light = l
-                break
+        light = light_manager.get_user_light(user_id, light_id)
         
         if not light:
             return JsonResponse({
@@ -385,7 +350,7 @@ def api_set_light_temperature(request, light_id):
                 'error': 'Light not found'
             }, status=404)
         
-        success = light.set_color_temperature(kelvin)
+        success = light_fleet.run([light], 'set_color_temperature', kelvin)[light.dev_id]
         
         return JsonResponse({
             'success': success,
@@ -408,24 +373,19 @@ def api_list_groups(request):
     try:
         user_id = str(request.user.id)
         
-        # Load lights and groups
-        _load_user_lights(user_id)
-        _load_user_groups(user_id)
+        _sync_user(user_id)
         
-        # Get all groups for this user
-        user_groups = [g for g in light_manager.get_all_groups() if hasattr(g, 'user_id') and g.user_id == user_id]
+        user_groups = light_manager.get_user_groups(user_id)
         
-        # Batch load all lights once to create dev_id -> MongoDB ID mapping
-        all_lights = list(db.ledvance_lights.find({'user_id': user_id}))
-        dev_id_to_mongo_id = {light['dev_id']: str(light['_id']) for light in all_lights}
+        # Every grouped light once, concurrently, shared by all the group summaries
+        grouped = {light.dev_id: light for group in user_groups for light in group.lights}
+        statuses = light_fleet.get_statuses(grouped.values())
         
         groups_data = []
         for group in user_groups:
-            status = group.get_status()
-            # Get light IDs (dev_ids) for this group
-            light_dev_ids = [light.dev_id for light in group.lights]
-            # Convert dev_ids to MongoDB IDs using the mapping (no DB queries!)
-            light_mongo_ids = [dev_id_to_mongo_id.get(dev_id) for dev_id in light_dev_ids if dev_id in dev_id_to_mongo_id]
+            status = group.get_status(statuses)
+            # MongoDB IDs for the frontend checkboxes (kept on the registered lights)
+            light_mongo_ids = [light.light_id for light in group.lights]
             
             groups_data.append({
                 'id': group.group_id,
@@ -437,7 +397,8 @@ def api_list_groups(request):
                 'online_lights': status['online_lights'],
                 'lights_on': status['lights_on'],
                 'all_on': status['all_on'],
-                'any_on': status['any_on']
+                'any_on': status['any_on'],
+                'stale_lights': status['stale_lights']
             })
         
         return JsonResponse({
@@ -506,9 +467,9 @@ def api_create_group(request):
         
         result = db.ledvance_groups.insert_one(group_data)
         
-        # Load into manager
-        _load_user_lights(user_id)
-        _load_user_groups(user_id)
+        # Load into registry
+        _bump_version(user_id)
+        _sync_user(user_id)
         
         return JsonResponse({
             'success': True,
@@ -598,8 +559,8 @@ def api_update_group(request, group_id):
         )
         
         # Reload groups
-        _load_user_lights(user_id)
-        _load_user_groups(user_id)
+        _bump_version(user_id)
+        _sync_user(user_id)
         
         return JsonResponse({
             'success': True,
@@ -639,6 +600,7 @@ def api_delete_group(request, group_id):
         
         # Remove from manager
         light_manager.remove_group(group_id)
+        _bump_version(user_id)
         
         return JsonResponse({
             'success': True,
@@ -658,15 +620,9 @@ def api_toggle_group(request, group_id):
     """Toggle all lights in a group"""
     try:
         user_id = str(request.user.id)
-        _load_user_lights(user_id)
-        _load_user_groups(user_id)
+        _sync_user(user_id)
         
-        # Find group
-        group = None
-        for g in light_manager.get_all_groups():
-            if g.group_id == group_id and hasattr(g, 'user_id') and g.user_id == user_id:
-                group = g
-                break
+        group = light_manager.get_user_group(user_id, group_id)
         
         if not group:
             return JsonResponse({
@@ -696,15 +652,9 @@ def api_turn_on_group(request, group_id):
     """Turn on all lights in a group"""
     try:
         user_id = str(request.user.id)
-        _load_user_lights(user_id)
-        _load_user_groups(user_id)
+        _sync_user(user_id)
         
-        # Find group
-        group = None
-        for g in light_manager.get_all_groups():
-            if g.group_id == group_id and hasattr(g, 'user_id') and g.user_id == user_id:
-                group = g
-                break
+        group = light_manager.get_user_group(user_id, group_id)
         
         if not group:
             return JsonResponse({
@@ -732,15 +682,9 @@ def api_turn_off_group(request, group_id):
     """Turn off all lights in a group"""
     try:
         user_id = str(request.user.id)
-        _load_user_lights(user_id)
-        _load_user_groups(user_id)
+        _sync_user(user_id)
         
-        # Find group
-        group = None
-        for g in light_manager.get_all_groups():
-            if g.group_id == group_id and hasattr(g, 'user_id') and g.user_id == user_id:
-                group = g
-                break
+        group = light_manager.get_user_group(user_id, group_id)
         
         if not group:
             return JsonResponse({
@@ -768,8 +712,7 @@ def api_set_group_brightness(request, group_id):
     """Set brightness for all lights in a group"""
     try:
         user_id = str(request.user.id)
-        _load_user_lights(user_id)
-        _load_user_groups(user_id)
+        _sync_user(user_id)
         
         # Accept both JSON and form data
         if request.content_type == 'application/json':
@@ -778,12 +721,7 @@ def api_set_group_brightness(request, group_id):
         else:
             brightness = int(request.POST.get('brightness', 50))
         
-        # Find group
-        group = None
-        for g in light_manager.get_all_groups():
-            if g.group_id == group_id and hasattr(g, 'user_id') and g.user_id == user_id:
-                group = g
-                break
+        group = light_manager.get_user_group(user_id, group_id)
         
         if not group:
             return JsonResponse({
@@ -812,20 +750,14 @@ def api_set_group_color(request, group_id):
     """Set RGB color for all lights in a group"""
     try:
         user_id = str(request.user.id)
-        _load_user_lights(user_id)
-        _load_user_groups(user_id)
+        _sync_user(user_id)
         
         r = int(request.POST.get('r', 255))
         g = int(request.POST.get('g', 255))
         b = int(request.POST.get('b', 255))
         saturation = int(request.POST.get('saturation', 100))
         
-        # Find group
-        group = None
-        for grp in light_manager.get_all_groups():
-            if grp.group_id == group_id and hasattr(grp, 'user_id') and grp.user_id == user_id:
-                group = grp
-                break
+        group = light_manager.get_user_group(user_id, group_id)
         
         if not group:
             return JsonResponse({
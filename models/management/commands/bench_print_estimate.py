@@ -0,0 +1,89 @@
+"""
+Management command to benchmark the print time/material estimator.
+Estimates a set of generated sample parts (plus any STL files given) and
+reports the estimate and how long it took.
+"""
+import timeit
+from pathlib import Path
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from services.print_estimator import PRINTER_PROFILES, PrintProfile, estimate_print
+from services.stl_mesh import read_stl
+
+
+def box(x, y, z):
+    vertices = np.array([[0, 0, 0], [x, 0, 0], [x, y, 0], [0, y, 0],
+                         [0, 0, z], [x, 0, z], [x, y, z], [0, y, z]], dtype=float)
+    faces = [[0, 2, 1], [0, 3, 2], [4, 5, 6], [4, 6, 7], [0, 1, 5], [0, 5, 4],
+             [1, 2, 6], [1, 6, 5], [2, 3, 7], [2, 7, 6], [3, 0, 4], [3, 4, 7]]
+    return vertices[faces]
+
+
+def cylinder(radius, height, segments):
+    angles = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+    ring = np.column_stack([radius * np.cos(angles), radius * np.sin(angles)])
+    nxt = np.roll(ring, -1, axis=0)
+    bottom = lambda xy: np.column_stack([xy, np.zeros(segments)])
+    top = lambda xy: np.column_stack([xy, np.full(segments, height)])
+    centre_bottom = np.zeros((segments, 3))
+    centre_top = np.tile([0.0, 0.0, height], (segments, 1))
+    return np.concatenate([
+        np.stack([centre_bottom, bottom(nxt), bottom(ring)], axis=1),
+        np.stack([centre_top, top(ring), top(nxt)], axis=1),
+        np.stack([bottom(ring), bottom(nxt), top(nxt)], axis=1),
+        np.stack([bottom(ring), top(nxt), top(ring)], axis=1),
+    ])
+
+
+def sphere(radius, rings):
+    polar = np.linspace(0, np.pi, rings + 1)
+    azimuth = np.linspace(0, 2 * np.pi, 2 * rings, endpoint=False)
+    p, a = np.meshgrid(polar, azimuth, indexing='ij')
+    grid = np.stack([np.sin(p) * np.cos(a), np.sin(p) * np.sin(a), np.cos(p)], axis=-1) * radius + radius
+    i = np.arange(rings)[:, None]
+    j = np.arange(2 * rings)[None, :]
+    j1 = (j + 1) % (2 * rings)
+    first = np.stack([grid[i, j], grid[i + 1, j], grid[i + 1, j1]], axis=-2).reshape(-1, 3, 3)
+    second = np.stack([grid[i, j], grid[i + 1, j1], grid[i, j1]], axis=-2).reshape(-1, 3, 3)
+    return np.concatenate([first, second])
+
+
+SAMPLE_PARTS = {
+    'cube 20mm': lambda: box(20, 20, 20),
+    'bracket plate 80x40x6': lambda: box(80, 40, 6),
+    'cylinder r15 h40': lambda: cylinder(15, 40, 256),
+    'sphere r25 (200k tris)': lambda: sphere(25, 224),
+    'tower 30x30x150': lambda: box(30, 30, 150),
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the print time and filament estimator on sample parts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('stl', nargs='*', help='Extra STL files to estimate')
+        parser.add_argument('--printer-type', default='prusa', choices=sorted(PRINTER_PROFILES),
+                            help='Printer profile to estimate with')
+        parser.add_argument('--material', default='PLA')
+        parser.add_argument('--number', type=int, default=5, help='Estimates per run')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per part (best is reported)')
+
+    def handle(self, *args, **options):
+        profile = PrintProfile.for_printer({'printer_type': options['printer_type']})
+        parts = {name: build() for name, build in SAMPLE_PARTS.items()}
+        for path in options['stl']:
+            parts[Path(path).name] = read_stl(path)
+
+        self.stdout.write(f"{'part':>24} {'triangles':>10} {'time':>9} {'filament':>9} {'layers':>7} {'estimate':>10}")
+        for name, triangles in parts.items():
+            estimate = estimate_print(triangles, profile, options['material'])
+            best = min(timeit.repeat(
+                lambda: estimate_print(triangles, profile, options['material']),
+                number=options['number'], repeat=options['repeat']
+            )) / options['number']
+            self.stdout.write(
+                f"{name:>24} {len(triangles):>10} {estimate.minutes:>6} min {estimate.grams:>7.1f} g "
+                f"{estimate.layers:>7} {best * 1000:>7.1f} ms"
+            )
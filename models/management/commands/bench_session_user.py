@@ -0,0 +1,93 @@
+"""
+Management command to measure the per-request cost of building request.user.
+Compares the old per-request SessionUser class against the module-level one.
+"""
+import timeit
+from django.core.management.base import BaseCommand
+from models.middleware import SessionUser
+
+
+SAMPLE_SESSION = {
+    '_id': '65a1f0c2e4b0a1b2c3d4e5f6',
+    'claims': {'username': 'alice', 'is_active': True, 'is_staff': False, 'is_superuser': False},
+}
+
+# Session contents as stored before the slim payload
+LEGACY_SESSION = {
+    '_id': '65a1f0c2e4b0a1b2c3d4e5f6',
+    'username': 'alice',
+    'email': 'alice@example.com',
+    'first_name': 'Alice',
+    'last_name': 'Smith',
+    'is_active': True,
+    'is_staff': False,
+    'is_superuser': False,
+}
+
+
+def build_user_per_request(user_data):
+    """The previous middleware body: a fresh class per request plus setattr per field."""
+    class SessionUser:
+        def __init__(self, user_data):
+            self._data = user_data or {}
+            if self._data:
+                for key, value in self._data.items():
+                    if not key.startswith('_'):
+                        setattr(self, key, value)
+                if '_id' in self._data:
+                    self.id = self._data['_id']
+
+        @property
+        def is_authenticated(self):
+            return bool(self._data and '_id' in self._data)
+
+        @property
+        def is_anonymous(self):
+            return not self.is_authenticated
+
+        def __getitem__(self, key):
+            if key in ('is_authenticated', 'is_anonymous'):
+                raise KeyError(key)
+            return self._data.get(key, None)
+
+        def get(self, key, default=None):
+            return self._data.get(key, default)
+
+        def __str__(self):
+            return self._data.get('username', 'Anonymous')
+
+    return SessionUser(user_data)
+
+
+def build_user_module_level(session_data):
+    return SessionUser(session_data)
+
+
+class Command(BaseCommand):
+    help = 'Microbenchmark request.user construction in SessionUserMiddleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=100000, help='Iterations per run')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per case (best is reported)')
+
+    def handle(self, *args, **options):
+        number = options['number']
+        repeat = options['repeat']
+
+        # A typical request touches the id, the auth flag and the username
+        def before():
+            user = build_user_per_request(LEGACY_SESSION)
+            return user.id, user.is_authenticated, user.username
+
+        def after():
+            user = build_user_module_level(SAMPLE_SESSION)
+            return user.id, user.is_authenticated, user.username
+
+        results = {}
+        for name, func in (('per-request class', before), ('module-level __slots__', after)):
+            best = min(timeit.repeat(func, number=number, repeat=repeat))
+            results[name] = best / number * 1e6
+            self.stdout.write(f'{name:>24}: {results[name]:.2f} µs/request')
+
+        speedup = results['per-request class'] / results['module-level __slots__']
+        self.stdout.write(self.style.SUCCESS(f'{speedup:.1f}x faster per request'))
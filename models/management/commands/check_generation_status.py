@@ -6,7 +6,7 @@ Run this periodically to update model statuses.
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.conf import settings
-from models.mongodb import db, to_object_id
+from models.mongodb import db, to_object_id, invalidate_model_counts
 from services.meshy_client import MeshyClient
 from services.notifications import notify_owner
 from datetime import datetime
@@ -138,6 +138,7 @@ class Command(BaseCommand):
                                             'thumbnail_url': task_status.get('thumbnail_url')
                                         }}
                                     )
+                                    invalidate_model_counts(model['user_id'])
                                     
                                     self.stdout.write(self.style.SUCCESS(f'  ✓ Model {model_id} completed and downloaded!'))
                                     
@@ -166,6 +167,7 @@ class Command(BaseCommand):
                                 'error_message': f'{current_stage} failed: {error_message}'
                             }}
                         )
+                        invalidate_model_counts(model['user_id'])
                         
                         self.stdout.write(self.style.ERROR(f'  ✗ Model {model_id} failed at {current_stage}: {error_message}'))
                         
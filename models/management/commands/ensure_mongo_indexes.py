@@ -0,0 +1,19 @@
+"""
+Management command to create MongoDB indexes.
+Run once after deploying (or whenever indexes change) instead of on every process start.
+"""
+from django.core.management.base import BaseCommand
+from models.mongodb import db
+
+
+class Command(BaseCommand):
+    help = 'Create MongoDB indexes for all app collections'
+    
+    def handle(self, *args, **options):
+        try:
+            db.create_indexes()
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Failed to create indexes: {e}'))
+            raise
+        
+        self.stdout.write(self.style.SUCCESS('MongoDB indexes are up to date'))
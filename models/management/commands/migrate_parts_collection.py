@@ -0,0 +1,43 @@
+"""
+Management command to move embedded part breakdown arrays into the parts collection.
+Breakdowns are also migrated lazily when first read, so this only needs to run once
+to finish the job for projects nobody has opened since the upgrade.
+"""
+from django.core.management.base import BaseCommand
+from models.mongodb import db, migrate_legacy_parts
+
+
+class Command(BaseCommand):
+    help = 'Move embedded parts from part_breakdowns into the parts collection'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many breakdowns still embed parts'
+        )
+    
+    def handle(self, *args, **options):
+        legacy_query = {'parts.0': {'$exists': True}}
+        
+        if options['dry_run']:
+            count = db.part_breakdowns.count_documents(legacy_query)
+            self.stdout.write(f'{count} breakdown(s) still embed parts')
+            return
+        
+        db.parts.create_index([('project_id', 1), ('part_number', 1)], unique=True)
+        
+        migrated_breakdowns = 0
+        migrated_parts = 0
+        for breakdown in db.part_breakdowns.find(legacy_query, {'project_id': 1}):
+            try:
+                migrated_parts += migrate_legacy_parts(breakdown['project_id'])
+                migrated_breakdowns += 1
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(
+                    f"Failed to migrate project {breakdown['project_id']}: {e}"
+                ))
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Migrated {migrated_parts} part(s) from {migrated_breakdowns} breakdown(s)'
+        ))
@@ -0,0 +1,36 @@
+"""
+Django management command to keep live printer status up to date.
+Run alongside the web server; the printers page reads the snapshots it writes.
+"""
+from django.core.management.base import BaseCommand
+from models.printer_poller import PrinterPoller
+
+
+class Command(BaseCommand):
+    help = 'Poll configured printers in the background and store their latest status'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Poll every printer once and exit',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=None,
+            help='Seconds between polls of an online printer (default: PRINTER_POLL_INTERVAL)',
+        )
+
+    def handle(self, *args, **options):
+        poller = PrinterPoller(interval=options['interval'])
+
+        if options['once']:
+            count = poller.poll_once()
+            self.stdout.write(self.style.SUCCESS(f'Polled {count} printer(s)'))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Polling printers every {poller.interval}s (offline backoff up to {poller.max_backoff}s)'
+        ))
+        poller.run_forever()
@@ -0,0 +1,37 @@
+"""
+Django management command to resume printer file transfers.
+Restarts uploads interrupted by a restart and retries that are due.
+"""
+from django.core.management.base import BaseCommand
+from models.print_transfer import resume_transfers, wait_for_transfers
+from datetime import datetime
+import time
+
+
+class Command(BaseCommand):
+    help = 'Resume interrupted or due printer file transfers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Run continuously in a loop',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=30,
+            help='Interval in seconds between checks (default: 30)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            count = resume_transfers()
+            if count:
+                self.stdout.write(self.style.SUCCESS(f'{datetime.utcnow()}: resumed {count} transfer(s)'))
+
+            if not options['loop']:
+                wait_for_transfers()
+                break
+
+            time.sleep(options['interval'])
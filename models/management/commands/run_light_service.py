@@ -0,0 +1,40 @@
+"""
+Django management command that owns the Ledvance bulb connections for this host.
+Run one per host alongside the web server and point LEDVANCE_SERVICE_ADDRESS at it.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from models.ledvance_controller import light_fleet, light_listener
+from models.ledvance_service import LightService, is_loopback, parse_address
+
+
+class Command(BaseCommand):
+    help = 'Keep persistent connections to the Ledvance lights and serve the web workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--address',
+            default=None,
+            help='host:port to listen on (default: LEDVANCE_SERVICE_ADDRESS)',
+        )
+        parser.add_argument(
+            '--allow-remote',
+            action='store_true',
+            help='Allow listening on a non-loopback address',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.LEDVANCE_SERVICE_SECRET:
+            raise CommandError('Set LEDVANCE_SERVICE_SECRET before starting the light service')
+        address = options['address'] or settings.LEDVANCE_SERVICE_ADDRESS or '127.0.0.1:8765'
+        host, _ = parse_address(address)
+        if not options['allow_remote'] and not is_loopback(host):
+            raise CommandError(f'{host} is not a loopback address; pass --allow-remote to listen on it')
+        service = LightService(
+            light_fleet,
+            settings.LEDVANCE_SERVICE_SECRET,
+            light_listener if settings.LEDVANCE_LISTENER else None
+        )
+        count = service.load()
+        self.stdout.write(self.style.SUCCESS(f'Serving {count} light(s) on {address}'))
+        service.serve_forever(address, allow_remote=options['allow_remote'])
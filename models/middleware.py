@@ -1,6 +1,97 @@
 """
 Custom middleware for session-based authentication with MongoDB
 """
+from bson import ObjectId
+from models.mongodb import db
+
+# The session only carries the user id and a few claims needed on most pages;
+# the full user document is loaded from MongoDB the first time anything else
+# is asked for.
+SESSION_USER_KEY = 'user'
+# Claim -> value for user documents that lack the field (as listusers_mongo reads them)
+SESSION_CLAIM_DEFAULTS = {'username': '', 'is_active': True, 'is_staff': False, 'is_superuser': False}
+
+
+def session_claims(data):
+    """Every claim, taken from data (a user document or flat session) or its default."""
+    return {field: data.get(field, default) for field, default in SESSION_CLAIM_DEFAULTS.items()}
+
+
+def session_payload(user):
+    """Build the slim session payload for a MongoDB user document."""
+    return {
+        '_id': str(user['_id']),
+        'claims': session_claims(user),
+    }
+
+
+class SessionUser:
+    """
+    request.user replacement backed by the session payload.
+    Claims are available immediately; any other field triggers a single
+    lookup of the user document.
+    """
+    __slots__ = ('id', '_claims', '_user')
+
+    def __init__(self, session_data):
+        session_data = session_data or {}
+        self.id = session_data.get('_id')
+        # Sessions created before the slim payload stored the user fields flat
+        self._claims = session_claims(session_data.get('claims') or session_data) if self.id else {}
+        self._user = None
+
+    def _load(self):
+        """Fetch the full user document (without the password hash) once."""
+        if self._user is None:
+            user = None
+            if self.id and ObjectId.is_valid(self.id):
+                user = db.users.find_one({'_id': ObjectId(self.id)}, {'password': 0})
+            self._user = user or {}
+        return self._user
+
+    def __getattr__(self, name):
+        # Only reached for attributes not set in __init__
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name in self._claims:
+            return self._claims[name]
+        user = self._load()
+        if name in user:
+            return user[name]
+        raise AttributeError(name)
+
+    @property
+    def is_authenticated(self):
+        """
+        Return True if user has valid session data with _id.
+        This MUST be a property, not a simple boolean attribute,
+        because Django templates check for callable/property attributes.
+        """
+        return bool(self.id)
+
+    @property
+    def is_anonymous(self):
+        """Return True if user is not authenticated."""
+        return not self.is_authenticated
+
+    def __getitem__(self, key):
+        # Don't intercept property/method lookups
+        if key in ('is_authenticated', 'is_anonymous'):
+            raise KeyError(key)
+        return self.get(key)
+
+    def get(self, key, default=None):
+        if key == '_id':
+            return self.id
+        if key in self._claims:
+            return self._claims[key]
+        if not self.id:
+            return default
+        return self._load().get(key, default)
+
+    def __str__(self):
+        return self._claims.get('username') or 'Anonymous'
+
 
 class SessionUserMiddleware:
     """
@@ -11,50 +102,8 @@ class SessionUserMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
-        # Get user from session
-        user_data = request.session.get('user', None)
-        
-        # Create a SessionUser object
-        class SessionUser:
-            def __init__(self, user_data):
-                self._data = user_data or {}
-                # Copy all user data as attributes for easy access
-                if self._data:
-                    for key, value in self._data.items():
-                        if not key.startswith('_'):
-                            setattr(self, key, value)
-                    # Store _id as id for Django compatibility
-                    if '_id' in self._data:
-                        self.id = self._data['_id']
-            
-            @property
-            def is_authenticated(self):
-                """
-                Return True if user has valid session data with _id.
-                This MUST be a property, not a simple boolean attribute,
-                because Django templates check for callable/property attributes.
-                """
-                return bool(self._data and '_id' in self._data)
-            
-            @property
-            def is_anonymous(self):
-                """Return True if user is not authenticated."""
-                return not self.is_authenticated
-            
-            def __getitem__(self, key):
-                # Don't intercept property/method lookups
-                if key in ('is_authenticated', 'is_anonymous'):
-                    raise KeyError(key)
-                return self._data.get(key, None)
-            
-            def get(self, key, default=None):
-                return self._data.get(key, default)
-            
-            def __str__(self):
-                return self._data.get('username', 'Anonymous')
-        
         # Replace request.user with our session user
-        request.user = SessionUser(user_data)
-        
+        request.user = SessionUser(request.session.get(SESSION_USER_KEY))
+
         response = self.get_response(request)
         return response
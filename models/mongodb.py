@@ -2,11 +2,15 @@
 MongoDB database helper using PyMongo.
 Provides direct access to MongoDB collections for app data.
 """
-from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo import MongoClient, ReplaceOne, UpdateOne, ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError
 from django.conf import settings
+from django.core.cache import caches
 from datetime import datetime
 from bson import ObjectId
+from models.design_schemas import PartSchema
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -15,132 +19,194 @@ class MongoDB:
     """
     MongoDB connection and collection access.
     Singleton pattern to reuse connection.
+    
+    The client is created lazily on first collection access, so importing
+    this module (every worker boot and management command) does no network I/O.
+    Indexes are managed by the ``ensure_mongo_indexes`` management command.
     """
     _instance = None
     _client = None
     _db = None
+    _lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(MongoDB, cls).__new__(cls)
-            cls._instance._connect()
         return cls._instance
     
     def _connect(self):
-        """Establish MongoDB connection."""
+        """Establish MongoDB connection using pool settings from Django settings."""
         try:
-            self._client = MongoClient(settings.MONGO_URI)
+            self._client = MongoClient(
+                settings.MONGO_URI,
+                maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+                minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+                maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+                connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+                serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                socketTimeoutMS=settings.MONGO_SOCKET_TIMEOUT_MS,
+                connect=False,
+            )
             self._db = self._client[settings.MONGO_DB_NAME]
-            logger.info(f"Connected to MongoDB: {settings.MONGO_DB_NAME}")
-            self._create_indexes()
+            logger.info(f"MongoDB client initialized: {settings.MONGO_DB_NAME}")
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
             raise
     
-    def _create_indexes(self):
-        """Create indexes for better query performance."""
-        try:
-            # Models collection indexes
-            self.models.create_index([("user_id", ASCENDING), ("created_at", DESCENDING)])
-            self.models.create_index([("status", ASCENDING)])
-            
-            # Printers collection indexes
-            self.printers.create_index([("user_id", ASCENDING), ("name", ASCENDING)])
-            self.printers.create_index([("status", ASCENDING)])
-            
-            # Print jobs collection indexes
-            self.print_jobs.create_index([('user_id', ASCENDING), ('created_at', DESCENDING)])
-            self.print_jobs.create_index([('printer_id', ASCENDING), ('status', ASCENDING)])
-            self.print_jobs.create_index([('status', ASCENDING)])
-            
-            # Users collection indexes
-            # Case-insensitive unique index on username
-            self.users.create_index(
-                [('username', ASCENDING)], 
-                unique=True,
-                collation={'locale': 'en', 'strength': 2}
+    @property
+    def database(self):
+        """Underlying PyMongo database, connecting on first use."""
+        if self._db is None:
+            with self._lock:
+                if self._db is None:
+                    self._connect()
+        return self._db
+    
+    def create_indexes(self):
+        """
+        Create indexes for better query performance.
+        Run once per deployment via ``python manage.py ensure_mongo_indexes``.
+        """
+        # Models collection indexes
+        self.models.create_index([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)])
+        self.models.create_index([("status", ASCENDING)])
+        
+        # Printers collection indexes
+        self.printers.create_index([("user_id", ASCENDING), ("name", ASCENDING)])
+        self.printers.create_index([("status", ASCENDING)])
+        
+        # Print jobs collection indexes
+        self.print_jobs.create_index([('user_id', ASCENDING), ('created_at', DESCENDING)])
+        self.print_jobs.create_index([('printer_id', ASCENDING), ('status', ASCENDING)])
+        self.print_jobs.create_index([('status', ASCENDING), ('created_at', ASCENDING)])
+        
+        # Users collection indexes
+        # Case-insensitive unique index on username
+        self.users.create_index(
+            [('username', ASCENDING)], 
+            unique=True,
+            collation={'locale': 'en', 'strength': 2}
+        )
+        self.users.create_index([('email', ASCENDING)])
+        
+        # Design workflow collection indexes
+        self.design_projects.create_index([('user_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)])
+        self.design_projects.create_index([('stage', ASCENDING), ('status', ASCENDING)])
+        self.design_concepts.create_index([('project_id', ASCENDING)])
+        self.part_breakdowns.create_index([('project_id', ASCENDING)])
+        self.parts.create_index([('project_id', ASCENDING), ('part_number', ASCENDING)], unique=True)
+        
+        # Printer telemetry: raw samples in a time-series collection (MongoDB 5.0+),
+        # rollup buckets as plain documents. All expire via TTL.
+        if 'printer_telemetry' not in self.database.list_collection_names():
+            self.database.create_collection(
+                'printer_telemetry',
+                timeseries={'timeField': 'ts', 'metaField': 'printer_id', 'granularity': 'seconds'},
+                expireAfterSeconds=settings.PRINTER_TELEMETRY_RAW_TTL
             )
-            self.users.create_index([('email', ASCENDING)])
-            
-            # Design workflow collection indexes
-            self.design_projects.create_index([('user_id', ASCENDING), ('created_at', DESCENDING)])
-            self.design_projects.create_index([('stage', ASCENDING), ('status', ASCENDING)])
-            self.design_concepts.create_index([('project_id', ASCENDING)])
-            self.part_breakdowns.create_index([('project_id', ASCENDING)])
-            
-            logger.info("MongoDB indexes created successfully")
-        except Exception as e:
-            logger.warning(f"Failed to create indexes: {e}")
+        for rollup, ttl in ((self.printer_telemetry_1m, settings.PRINTER_TELEMETRY_1M_TTL),
+                            (self.printer_telemetry_15m, settings.PRINTER_TELEMETRY_15M_TTL)):
+            rollup.create_index([('printer_id', ASCENDING), ('ts', ASCENDING)], unique=True)
+            rollup.create_index([('ts', ASCENDING)], expireAfterSeconds=ttl)
+        
+        logger.info("MongoDB indexes created successfully")
     
     @property
     def dashboards(self):
         """Dashboards collection."""
-        return self._db.dashboards
+        return self.database.dashboards
 
     @property
     def ledvance_lights(self):
         """Ledvance lights collection."""
-        return self._db.ledvance_lights
+        return self.database.ledvance_lights
 
     @property
     def ledvance_groups(self):
         """Ledvance groups collection."""
-        return self._db.ledvance_groups
+        return self.database.ledvance_groups
+
+    @property
+    def ledvance_versions(self):
+        """Per-user change counters for Ledvance lights and groups."""
+        return self.database.ledvance_versions
 
     @property
     def models(self):
         """3D models collection."""
-        return self._db.models_3d
+        return self.database.models_3d
     
     @property
     def printers(self):
         """Printers collection."""
-        return self._db.printers
+        return self.database.printers
     
     @property
     def print_jobs(self):
         """Print jobs collection."""
-        return self._db.print_jobs
+        return self.database.print_jobs
+    
+    @property
+    def printer_telemetry(self):
+        """Raw printer status samples (time-series collection)."""
+        return self.database.printer_telemetry
+    
+    @property
+    def printer_telemetry_1m(self):
+        """Printer telemetry aggregated into 1 minute buckets."""
+        return self.database.printer_telemetry_1m
+    
+    @property
+    def printer_telemetry_15m(self):
+        """Printer telemetry aggregated into 15 minute buckets."""
+        return self.database.printer_telemetry_15m
     
     @property
     def generation_jobs(self):
         """Generation jobs collection."""
-        return self._db.generation_jobs
+        return self.database.generation_jobs
     
     @property
     def users(self):
         """Users collection."""
-        return self._db.users
+        return self.database.users
     
     @property
     def design_projects(self):
         """Design projects collection (3-stage workflow)."""
-        return self._db.design_projects
+        return self.database.design_projects
     
     @property
     def tvs(self):
         """TVs collection."""
-        return self._db.tvs
+        return self.database.tvs
     
     @property
     def lights(self):
         """Lights collection (alias for ledvance_lights)."""
-        return self._db.ledvance_lights
+        return self.database.ledvance_lights
     
     @property
     def design_concepts(self):
         """Design concepts collection (Stage 1)."""
-        return self._db.design_concepts
+        return self.database.design_concepts
     
     @property
     def part_breakdowns(self):
         """Part breakdowns collection (Stage 2)."""
-        return self._db.part_breakdowns
+        return self.database.part_breakdowns
+    
+    @property
+    def parts(self):
+        """Individual parts of a breakdown, one document per part."""
+        return self.database.parts
     
     def close(self):
         """Close MongoDB connection."""
         if self._client:
             self._client.close()
+            self._client = None
+            self._db = None
             logger.info("MongoDB connection closed")
 
 
@@ -148,6 +214,39 @@ class MongoDB:
 db = MongoDB()
 
 
+# Field projections for list and dashboard pages.
+# Each page declares only the fields it renders so large payloads
+# (design_analysis, overall_model_ai_code, meshy_response, part code)
+# are left on the server. Detail pages fetch full documents.
+
+def fields(*names):
+    """Build an inclusion projection from field names."""
+    return {name: 1 for name in names}
+
+
+# design_projects.html project cards
+DESIGN_PROJECT_LIST_FIELDS = fields(
+    'original_prompt', 'stage', 'status', 'total_parts', 'generated_parts', 'created_at'
+)
+
+# CAD dashboard "recent projects" widget
+DESIGN_PROJECT_RECENT_FIELDS = fields(
+    'description', 'status', 'created_at', 'overall_model_stl'
+)
+
+# partials/model_card.html
+MODEL_CARD_FIELDS = fields(
+    'prompt', 'status', 'part_name', 'manufacturing_method', 'material_suggestion',
+    'estimated_dimensions', 'glb_url', 'thumbnail_url', 'created_at'
+)
+
+# Dashboard switcher (widget list is reduced to a count server-side)
+DASHBOARD_LIST_FIELDS = {
+    **fields('name', 'room', 'icon', 'is_default', 'created_at', 'updated_at'),
+    'widget_count': {'$size': {'$ifNull': ['$widgets', []]}},
+}
+
+
 # Helper functions for common operations
 
 def to_object_id(id_str):
@@ -169,3 +268,252 @@ def doc_to_dict(doc):
 def docs_to_list(cursor):
     """Convert MongoDB cursor to list of dicts."""
     return [doc_to_dict(doc) for doc in cursor]
+
+
+# Keyset pagination (newest first on created_at, _id as tie-breaker)
+
+DEFAULT_PAGE_SIZE = 24
+
+# Counters live in the shared 'counts' cache and are invalidated on insert,
+# delete and status change by whichever process makes the write (web workers,
+# the generation worker); the timeout only bounds drift from writes that skip
+# invalidation (shell, direct database edits).
+COUNT_CACHE_TIMEOUT = 300
+
+
+class InvalidCursor(ValueError):
+    """A page cursor that was not produced by encode_page_cursor."""
+
+
+def encode_page_cursor(doc):
+    """Build an opaque cursor pointing just after the given document."""
+    return f"{doc['created_at'].isoformat()}_{doc['_id']}"
+
+
+def decode_page_cursor(token):
+    """Parse a page cursor into (created_at, ObjectId); raises InvalidCursor if malformed."""
+    try:
+        created_at, oid = token.rsplit('_', 1)
+        return datetime.fromisoformat(created_at), ObjectId(oid)
+    except Exception:
+        raise InvalidCursor(f'Invalid page cursor: {token!r}')
+
+
+def find_page(collection, query, projection=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Fetch one page of documents sorted by (created_at, _id) descending.
+    
+    Uses a keyset condition instead of skip(), so the cost of a page does
+    not grow with how far the user has scrolled.
+    
+    Returns:
+        (docs, next_cursor) where next_cursor is None on the last page
+    
+    Raises:
+        InvalidCursor: cursor is malformed (rather than silently serving page 1 again)
+    """
+    if cursor:
+        created_at, oid = decode_page_cursor(cursor)
+        query = {
+            '$and': [query, {'$or': [
+                {'created_at': {'$lt': created_at}},
+                {'created_at': created_at, '_id': {'$lt': oid}},
+            ]}]
+        }
+    
+    docs = list(
+        collection.find(query, projection)
+        .sort([('created_at', DESCENDING), ('_id', DESCENDING)])
+        .limit(limit + 1)
+    )
+    
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_page_cursor(docs[-1])
+    return docs, next_cursor
+
+
+def cached_count(cache_key, collection, query):
+    """Count documents, caching the result under cache_key in the shared 'counts' cache."""
+    count = caches['counts'].get(cache_key)
+    if count is None:
+        count = collection.count_documents(query)
+        caches['counts'].set(cache_key, count, COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def invalidate_count(cache_key):
+    """Drop a cached counter so the next read recounts."""
+    caches['counts'].delete(cache_key)
+
+
+def design_projects_count_key(user_id):
+    """Cache key for a user's design project total."""
+    return f"count:design_projects:{user_id}"
+
+
+# Per-user CAD dashboard counters, in the shared 'counts' cache; short-lived
+# and dropped on any project status change so the widget never lags a user's
+# own action, whichever worker served it.
+PROJECT_STATS_CACHE_TIMEOUT = 30
+
+
+def project_stats_key(user_id):
+    """Cache key for a user's CAD dashboard project stats."""
+    return f"stats:design_projects:{user_id}"
+
+
+def invalidate_project_stats(user_id):
+    """Drop cached CAD dashboard stats after a project is created or changes status."""
+    caches['counts'].delete(project_stats_key(user_id))
+
+
+MODEL_COUNT_STATUSES = ('all', 'pending', 'processing', 'completed', 'failed')
+
+
+def models_count_key(user_id, status='all'):
+    """Cache key for a user's 3D model total, optionally per status filter."""
+    return f"count:models:{user_id}:{status}"
+
+
+def invalidate_model_counts(user_id):
+    """Drop every cached model counter for a user (insert, delete or status change)."""
+    caches['counts'].delete_many([models_count_key(user_id, status) for status in MODEL_COUNT_STATUSES])
+
+
+# Part storage
+# Parts live in their own collection keyed by (project_id, part_number), so
+# writing one part's code no longer rewrites the whole breakdown. Breakdowns
+# created before the split still embed a ``parts`` array; the read path moves
+# those into the collection the first time the project is touched.
+
+def _as_object_id(value):
+    return value if isinstance(value, ObjectId) else to_object_id(value)
+
+
+def _valid_part_number(value):
+    return value if isinstance(value, int) and not isinstance(value, bool) and value > 0 else None
+
+
+def number_parts(parts_list):
+    """
+    Copies of the parts, each with a unique positive part_number.
+    
+    LLM breakdowns can repeat or leave out part numbers. The first part to
+    claim a valid number keeps it; the others get the next free numbers, in
+    list order.
+    """
+    taken = set()
+    numbered = []
+    for part in parts_list:
+        part = dict(part)
+        number = _valid_part_number(part.get('part_number'))
+        if number in taken:
+            number = None
+        if number is not None:
+            taken.add(number)
+        numbered.append(part)
+        part['part_number'] = number
+    next_number = 1
+    for part in numbered:
+        if part['part_number'] is None:
+            while next_number in taken:
+                next_number += 1
+            part['part_number'] = next_number
+            taken.add(next_number)
+    return numbered
+
+
+def _ignore_duplicate_keys(error):
+    """Re-raise a bulk write error unless every failure is a duplicate key (a concurrent writer won)"""
+    if any(err.get('code') != 11000 for err in error.details.get('writeErrors', [])):
+        raise error
+
+
+def insert_project_parts(project_id, parts_list, breakdown_id=None):
+    """
+    Store a breakdown's parts as individual documents, replacing any parts of
+    an earlier breakdown of the same project (approving again regenerates them).
+    Parts are numbered with number_parts() first; pass already numbered parts
+    to keep the breakdown document and the parts in step.
+    """
+    project_id = _as_object_id(project_id)
+    parts_list = number_parts(parts_list)
+    numbers = [part['part_number'] for part in parts_list]
+    
+    if parts_list:
+        try:
+            db.parts.bulk_write([
+                ReplaceOne(
+                    {'project_id': project_id, 'part_number': part['part_number']},
+                    PartSchema.to_document(project_id, part, breakdown_id=breakdown_id),
+                    upsert=True
+                )
+                for part in parts_list
+            ], ordered=False)
+        except BulkWriteError as e:
+            _ignore_duplicate_keys(e)
+    db.parts.delete_many({'project_id': project_id, 'part_number': {'$nin': numbers}})
+
+
+def migrate_legacy_parts(project_id):
+    """
+    Move a breakdown's embedded parts array into the parts collection.
+    
+    Safe to run concurrently or repeatedly: parts are upserted on
+    (project_id, part_number) and existing documents are left untouched.
+    
+    Returns:
+        Number of embedded parts found (0 if nothing to migrate)
+    """
+    project_id = _as_object_id(project_id)
+    breakdown = db.part_breakdowns.find_one(
+        {'project_id': project_id, 'parts.0': {'$exists': True}},
+        {'parts': 1}
+    )
+    if not breakdown:
+        return 0
+    
+    # Legacy parts may lack (or repeat) a part_number; missing ones follow list order
+    parts = number_parts(breakdown['parts'])
+    ops = [
+        UpdateOne(
+            {'project_id': project_id, 'part_number': part['part_number']},
+            {'$setOnInsert': PartSchema.to_document(project_id, part, breakdown_id=breakdown['_id'])},
+            upsert=True
+        )
+        for part in parts
+    ]
+    try:
+        db.parts.bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        # Duplicate keys mean another request migrated the same parts first
+        _ignore_duplicate_keys(e)
+    
+    db.part_breakdowns.update_one(
+        {'_id': breakdown['_id']},
+        {'$unset': {'parts': ''}, '$set': {'parts_migrated_at': datetime.utcnow()}}
+    )
+    logger.info(f"Migrated {len(ops)} embedded parts for project {project_id}")
+    return len(ops)
+
+
+def get_project_parts(project_id, projection=None):
+    """All parts of a project ordered by part_number (migrating legacy breakdowns)."""
+    project_id = _as_object_id(project_id)
+    query = {'project_id': project_id}
+    parts = list(db.parts.find(query, projection).sort('part_number', ASCENDING))
+    if not parts and migrate_legacy_parts(project_id):
+        parts = list(db.parts.find(query, projection).sort('part_number', ASCENDING))
+    return parts
+
+
+def get_project_part(project_id, part_number, projection=None):
+    """A single part of a project, or None (migrating legacy breakdowns)."""
+    project_id = _as_object_id(project_id)
+    query = {'project_id': project_id, 'part_number': int(part_number)}
+    part = db.parts.find_one(query, projection)
+    if part is None and migrate_legacy_parts(project_id):
+        part = db.parts.find_one(query, projection)
+    return part
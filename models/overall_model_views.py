@@ -6,7 +6,7 @@ Handles Stage 2: Overall 3D Model generation and approval.
 
 from django.http import HttpResponse
 from django.views.decorators.http import require_http_methods
-from models.mongodb import db, to_object_id, doc_to_dict
+from models.mongodb import db, to_object_id, doc_to_dict, invalidate_project_stats, insert_project_parts, number_parts
 from models.design_schemas import PartBreakdownSchema
 from services.overall_model_generator import generate_overall_model
 from services.enhanced_design_analyzer import break_down_into_parts, generate_part_prompts
@@ -14,6 +14,7 @@ from models.views import session_login_required
 from datetime import datetime
 from pathlib import Path
 from django.conf import settings
+from pymongo import ReturnDocument
 import logging
 
 logger = logging.getLogger(__name__)
@@ -90,6 +91,7 @@ def api_generate_overall_model(request, project_id):
                     'updated_at': datetime.utcnow()
                 }}
             )
+            invalidate_project_stats(str(request.user.id))
             
             return HttpResponse(f'''
                 <div class="bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded">
@@ -154,6 +156,7 @@ def api_generate_overall_model(request, project_id):
                 'updated_at': datetime.utcnow()
             }}
         )
+        invalidate_project_stats(str(request.user.id))
         
         logger.info(f"✓ Overall model generated successfully for project {project_id}")
         
@@ -284,15 +287,22 @@ def api_approve_overall_model(request, project_id):
             original_prompt=project['original_prompt']
         )
         
-        # Add refined prompts to parts
-        parts_list = generate_part_prompts(parts_list, concept)
+        # Add refined prompts to parts; validate numbering before anything is stored
+        parts_list = number_parts(generate_part_prompts(parts_list, concept))
         
-        # Save part breakdown
+        # Save part breakdown (approving again replaces the project's breakdown and parts)
         breakdown_doc = PartBreakdownSchema.create(
             project_id=project_id,
             parts_list=parts_list
         )
-        db.part_breakdowns.insert_one(breakdown_doc)
+        breakdown_id = db.part_breakdowns.find_one_and_replace(
+            {'project_id': to_object_id(project_id)},
+            breakdown_doc,
+            projection={'_id': 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )['_id']
+        insert_project_parts(project_id, parts_list, breakdown_id=breakdown_id)
         
         # Update project
         db.design_projects.update_one(
@@ -305,6 +315,7 @@ def api_approve_overall_model(request, project_id):
                 'updated_at': datetime.utcnow()
             }}
         )
+        invalidate_project_stats(str(request.user.id))
         
         logger.info(f"✓ Overall model approved, generated {len(parts_list)} parts")
         
@@ -7,17 +7,42 @@ Handles sending CAD models to physical printers via PrusaLink and Snapmaker APIs
 from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_http_methods
 from models.views import session_login_required
-from models.mongodb import db, to_object_id, doc_to_dict
+from models.mongodb import db, to_object_id, doc_to_dict, get_project_part, get_project_parts
 from models.schemas import PrintJobSchema, PrinterSchema
 from services.prusalink_client import PrusaLinkClient
 from services.snapmaker_client import SnapmakerClient
+from models.printer_api_service import PrinterClientRegistry
+from models.print_scheduler import dispatch_pending, estimate_queue, estimate_stl, fits_build_volume, is_compatible
+from services.plate_packer import pack_stl_files, write_plate
+from services.stl_mesh import analyze_stl
+from services.print_orientation import orient_stl
+from django.conf import settings
+import uuid
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
 
+def _create_printer_client(printer_type, ip_address, api_key):
+    """Build a PrusaLinkClient or SnapmakerClient (used by the client registry)."""
+    if printer_type == 'prusa':
+        return PrusaLinkClient(ip_address=ip_address, api_key=api_key)
+    elif printer_type == 'snapmaker':
+        return SnapmakerClient(ip_address=ip_address, token=api_key)
+    else:
+        raise ValueError(f"Unknown printer type: {printer_type}")
+
+
+# One client (and HTTP session) per printer, reused across requests
+printer_job_clients = PrinterClientRegistry(
+    _create_printer_client,
+    pool_maxsize=settings.PRINTER_CLIENT_POOL_SIZE
+)
+
+
 def get_printer_client(printer):
     """
     Get the appropriate API client for a printer.
@@ -34,18 +59,89 @@ def get_printer_client(printer):
     if not printer.get('api_key'):
         raise ValueError("Printer has no API key configured")
     
-    if printer['printer_type'] == 'prusa':
-        return PrusaLinkClient(
-            ip_address=printer['ip_address'],
-            api_key=printer['api_key']
-        )
-    elif printer['printer_type'] == 'snapmaker':
-        return SnapmakerClient(
-            ip_address=printer['ip_address'],
-            token=printer['api_key']
-        )
-    else:
-        raise ValueError(f"Unknown printer type: {printer['printer_type']}")
+    return printer_job_clients.get(
+        printer['printer_type'],
+        printer['ip_address'],
+        printer['api_key']
+    )
+
+
+def orient_part(part):
+    """
+    Rotate a part's STL into its best print orientation (services.print_orientation).
+    
+    The oriented copy is written next to the export and cached on the part
+    document until the exported STL changes.
+    
+    Returns:
+        Path of the STL to print (the export itself when PRINT_AUTO_ORIENT is off)
+    """
+    stl_path = part['stl_file_path']
+    if not settings.PRINT_AUTO_ORIENT:
+        return stl_path
+    
+    stl_mtime = Path(stl_path).stat().st_mtime
+    cached = part.get('orientation')
+    if cached and cached.get('stl_mtime') == stl_mtime and Path(cached['path']).exists():
+        return cached['path']
+    
+    oriented_path = str(Path(stl_path).with_suffix('.oriented.stl'))
+    orientation = orient_stl(stl_path, oriented_path).to_dict()
+    orientation.update({'path': oriented_path, 'stl_mtime': stl_mtime})
+    db.parts.update_one({'_id': part['_id']}, {'$set': {'orientation': orientation}})
+    part['orientation'] = orientation
+    return oriented_path
+
+
+def orient_project_parts(project_id, workers=4):
+    """
+    Orient every generated part of a project in one batch.
+    
+    NumPy releases the GIL, so parts are processed on a small thread pool.
+    
+    Returns:
+        {part_number: orientation dict or {'error': ...}}
+    """
+    parts = [
+        part for part in get_project_parts(project_id, {'cadquery_code': 0})
+        if part.get('stl_file_path') and Path(part['stl_file_path']).exists()
+    ]
+    
+    def orient(part):
+        try:
+            orient_part(part)
+            return part['part_number'], part.get('orientation')
+        except Exception as e:
+            logger.error(f"Failed to orient part {part['part_number']} of project {project_id}: {e}")
+            return part['part_number'], {'error': str(e)}
+    
+    if not parts:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(workers, len(parts))) as executor:
+        return dict(executor.map(orient, parts))
+
+
+def get_part_analysis(part, stl_path=None):
+    """
+    Mesh analysis of the STL a part is printed from (see services.stl_mesh.analyze_mesh).
+    
+    Cached on the part document and recomputed when that file changes.
+    """
+    stl_path = stl_path or part['stl_file_path']
+    stl_mtime = Path(stl_path).stat().st_mtime
+    cached = part.get('mesh_analysis')
+    if cached and cached.get('path') == stl_path and cached.get('stl_mtime') == stl_mtime:
+        return cached
+    
+    analysis = analyze_stl(stl_path).to_dict()
+    analysis.update({'path': stl_path, 'stl_mtime': stl_mtime})
+    db.parts.update_one({'_id': part['_id']}, {'$set': {'mesh_analysis': analysis}})
+    return analysis
+
+
+def format_dimensions(dimensions):
+    """'120 × 80 × 45 mm' from an {x, y, z} dict"""
+    return ' × '.join(f"{dimensions.get(axis) or 0:g}" for axis in 'xyz') + ' mm'
 
 
 @session_login_required
@@ -57,8 +153,10 @@ def api_send_to_printer(request, project_id, part_number):
     POST /api/design/send-to-printer/<project_id>/<part_number>/
     Body: printer_id=<printer_id>
     
+    The upload runs as a background transfer job; this returns right away.
+    
     Returns:
-        HTML with success/error message
+        HTML transfer progress card (polls /api/print-jobs/<job_id>/status/)
     """
     try:
         # Get the design project
@@ -72,95 +170,262 @@ def api_send_to_printer(request, project_id, part_number):
         
         # Get the part
         part_number = int(part_number)
-        parts = project.get('parts', [])
+        part = get_project_part(project_id, part_number, {'cadquery_code': 0})
         
-        if part_number < 1 or part_number > len(parts):
+        if not part:
             return HttpResponse('Part not found', status=404)
         
-        part = parts[part_number - 1]
-        
         # Check if part has STL file
-        if not part.get('stl_file_path'):
+        if not part.get('stl_file_path') or not Path(part['stl_file_path']).exists():
             return HttpResponse('''
                 <div class="bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded">
                     ❌ This part has no STL file. Generate the CAD model first.
                 </div>
             ''')
         
-        # Get printer
+        # Print the part in its best orientation, then measure that mesh;
+        # its bounding box decides which printers fit
+        stl_file_path = orient_part(part)
+        analysis = get_part_analysis(part, stl_file_path)
+        dimensions = analysis['dimensions']
+        
+        # Get printer ('auto' queues the job for the next compatible printer)
         printer_id = request.POST.get('printer_id')
         if not printer_id:
             return HttpResponse('No printer selected', status=400)
         
-        printer = db.printers.find_one({
-            '_id': to_object_id(printer_id),
-            'user_id': str(request.user.id)
-        })
+        printer = None
+        if printer_id != 'auto':
+            printer = db.printers.find_one({
+                '_id': to_object_id(printer_id),
+                'user_id': str(request.user.id)
+            })
+            
+            if not printer:
+                return HttpResponse('Printer not found', status=404)
+            
+            # Check if printer can print 3D
+            if not PrinterSchema.can_print_3d(printer):
+                return HttpResponse('''
+                    <div class="bg-yellow-100 border border-yellow-400 text-yellow-700 px-4 py-3 rounded">
+                        ⚠️ This printer is not in 3D printing mode.
+                    </div>
+                ''')
+            
+            if not fits_build_volume(printer, dimensions):
+                return HttpResponse(f'''
+                    <div class="bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded">
+                        ❌ Part is {format_dimensions(dimensions)} but {printer['name']} only fits
+                        {format_dimensions({axis: printer.get(f'build_volume_{axis}') for axis in 'xyz'})}.
+                    </div>
+                ''')
+            
+            # Validate the printer client up front so config errors show immediately
+            try:
+                get_printer_client(printer)
+            except ValueError as e:
+                return HttpResponse(f'''
+                    <div class="bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded">
+                        ❌ Printer configuration error: {str(e)}
+                    </div>
+                ''')
         
-        if not printer:
-            return HttpResponse('Printer not found', status=404)
+        # Queue the print job; the scheduler sends it once a matching printer is idle
+        filename = f"{part['name']}.stl"
+        
+        estimate = estimate_stl(stl_file_path, printer, part.get('material_recommendation'))
         
-        # Check if printer can print 3D
-        if not PrinterSchema.can_print_3d(printer):
+        job_doc = PrintJobSchema.create(
+            user_id=str(request.user.id),
+            model_id=None,  # Not from old 3D model system
+            printer_id=printer['_id'] if printer else None,
+            status='queued',
+            notes=f"Part {part_number}: {part['name']} from project {project.get('original_prompt', project_id)}",
+            material=part.get('material_recommendation'),
+            dimensions=dimensions,
+            estimated_duration=estimate['minutes'],
+            estimate=estimate,
+            file_path=stl_file_path,
+            filename=filename,
+            total_bytes=Path(stl_file_path).stat().st_size
+        )
+        
+        # Refuse jobs that no configured printer could ever take
+        user_printers = db.printers.find({'user_id': str(request.user.id)})
+        if not any(is_compatible(p, job_doc) and p.get('ip_address') and p.get('api_key') for p in user_printers):
             return HttpResponse('''
-                <div class="bg-yellow-100 border border-yellow-400 text-yellow-700 px-4 py-3 rounded">
-                    ⚠️ This printer is not in 3D printing mode.
+                <div class="bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded">
+                    ❌ No configured printer can take this part (mode, build volume or material).
                 </div>
             ''')
         
-        # Get printer client
-        try:
-            client = get_printer_client(printer)
-        except ValueError as e:
-            return HttpResponse(f'''
+        job_id = db.print_jobs.insert_one(job_doc).inserted_id
+        dispatch_pending(str(request.user.id))
+        
+        logger.info(f"Queued print job {job_id} for {filename}")
+        
+        printer_name = printer['name'] if printer else 'the next available printer'
+        response = render_transfer_status(db.print_jobs.find_one({'_id': job_id}), printer_name)
+        if not analysis['watertight']:
+            # Still queued: slicers usually repair small gaps, but the user should know
+            response.content = f'''
+                <div class="bg-yellow-100 border border-yellow-400 text-yellow-700 px-4 py-3 rounded mb-2">
+                    ⚠️ Mesh is not watertight ({analysis['open_edges']} open edges); the print may have holes.
+                </div>
+            '''.encode() + response.content
+        return response
+    
+    except Exception as e:
+        logger.error(f"Error sending to printer: {e}", exc_info=True)
+        return HttpResponse(f'''
+            <div class="bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded">
+                ❌ Error: {str(e)}
+            </div>
+        ''', status=500)
+
+
+@session_login_required
+@require_http_methods(["POST"])
+def api_send_plate_to_printer(request, project_id):
+    """
+    Pack a project's generated parts onto shared build plates and queue one
+    print job per plate.
+    
+    POST /api/design/send-plate-to-printer/<project_id>/
+    Body: printer_id=<printer_id or 'auto'>, part_numbers=<comma list, optional>
+    
+    Parts are grouped by recommended material (one material per plate) and
+    packed for the chosen printer's build plate; with 'auto' the largest
+    3D-capable printer sets the plate size and any printer the packed layout
+    fits can take the job. Plates no configured printer can take (height or
+    material) are refused instead of queued.
+    
+    Returns:
+        HTML transfer progress cards, one per plate
+    """
+    try:
+        user_id = str(request.user.id)
+        project = db.design_projects.find_one({
+            '_id': to_object_id(project_id),
+            'user_id': user_id
+        })
+        
+        if not project:
+            return HttpResponse('Project not found', status=404)
+        
+        parts = [
+            part for part in get_project_parts(project_id, {'cadquery_code': 0})
+            if part.get('stl_file_path') and Path(part['stl_file_path']).exists()
+        ]
+        wanted = request.POST.get('part_numbers')
+        if wanted:
+            numbers = {int(n) for n in wanted.split(',') if n.strip()}
+            parts = [part for part in parts if part['part_number'] in numbers]
+        
+        if not parts:
+            return HttpResponse('''
                 <div class="bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded">
-                    ❌ Printer configuration error: {str(e)}
+                    ❌ No generated parts to print. Generate the CAD models first.
                 </div>
             ''')
         
-        # Send file to printer
-        stl_file_path = part['stl_file_path']
-        filename = f"{part['name']}.stl"
+        printer_id = request.POST.get('printer_id')
+        if not printer_id:
+            return HttpResponse('No printer selected', status=400)
         
-        logger.info(f"Sending {filename} to printer {printer['name']}...")
+        # Printers a job could be sent to
+        configured = [p for p in db.printers.find({'user_id': user_id}) if p.get('ip_address') and p.get('api_key')]
         
-        result = client.upload_and_print(stl_file_path, filename)
+        if printer_id == 'auto':
+            printers = [p for p in configured if PrinterSchema.can_print_3d(p)]
+            printer = None
+            plate_printer = max(printers, key=lambda p: (p.get('build_volume_x') or 0) * (p.get('build_volume_y') or 0), default=None)
+        else:
+            printer = db.printers.find_one({'_id': to_object_id(printer_id), 'user_id': user_id})
+            if not printer:
+                return HttpResponse('Printer not found', status=404)
+            plate_printer = printer if PrinterSchema.can_print_3d(printer) else None
         
-        if result['success']:
-            # Create print job record
-            job_doc = PrintJobSchema.create(
-                user_id=str(request.user.id),
-                model_id=None,  # Not from old 3D model system
-                printer_id=printer['_id'],
-                status='printing',
-                notes=f"Part {part_number}: {part['name']} from project {project['name']}"
-            )
-            db.print_jobs.insert_one(job_doc)
-            
-            # Update printer status
-            db.printers.update_one(
-                {'_id': printer['_id']},
-                {'$set': {'status': 'printing'}}
-            )
-            
-            return HttpResponse(f'''
-                <div class="bg-green-100 border border-green-400 text-green-700 px-4 py-3 rounded">
-                    ✅ Successfully sent to {printer['name']}!
-                    <br><small>File: {filename}</small>
+        if not plate_printer or not plate_printer.get('build_volume_x') or not plate_printer.get('build_volume_y'):
+            return HttpResponse('''
+                <div class="bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded">
+                    ❌ No 3D printer with a configured build volume to pack a plate for.
                 </div>
             ''')
-        else:
-            error_msg = result.get('error', 'Unknown error')
-            logger.error(f"Failed to send to printer: {error_msg}")
+        
+        plate_x = plate_printer['build_volume_x']
+        plate_y = plate_printer['build_volume_y']
+        plate_dir = Path(settings.MEDIA_ROOT) / 'print_plates'
+        plate_dir.mkdir(parents=True, exist_ok=True)
+        
+        by_material = {}
+        for part in parts:
+            material = (part.get('material_recommendation') or '').upper() or None
+            by_material.setdefault(material, {})[str(part['part_number'])] = orient_part(part)
+        
+        cards = []
+        oversized = []
+        refused = []
+        for material, files in by_material.items():
+            layout = pack_stl_files(files, plate_x, plate_y, settings.PRINT_PLATE_SPACING)
+            oversized.extend(layout.oversized)
             
-            return HttpResponse(f'''
+            for plate in layout.plates:
+                label = '-'.join(plate.keys)
+                filename = f"plate-{str(project['_id'])[-6:]}-{label}-{uuid.uuid4().hex[:6]}.stl"
+                plate_path = plate_dir / filename
+                write_plate(plate, plate_path, plate_x, plate_y)
+                estimate = estimate_stl(plate_path, printer or plate_printer, material)
+                
+                job_doc = PrintJobSchema.create(
+                    user_id=user_id,
+                    model_id=None,
+                    printer_id=printer['_id'] if printer else None,
+                    status='queued',
+                    notes=f"Plate with parts {', '.join(plate.keys)} from project {project.get('original_prompt', project_id)}",
+                    material=material,
+                    dimensions=plate.extents(),
+                    estimated_duration=estimate['minutes'],
+                    estimate=estimate,
+                    file_path=str(plate_path),
+                    filename=filename,
+                    total_bytes=plate_path.stat().st_size
+                )
+                
+                # Refuse plates that no configured printer could ever take
+                if not any(is_compatible(p, job_doc) for p in configured):
+                    plate_path.unlink(missing_ok=True)
+                    refused.extend(plate.keys)
+                    continue
+                
+                cards.append(db.print_jobs.insert_one(job_doc).inserted_id)
+        
+        dispatch_pending(user_id)
+        
+        printer_name = printer['name'] if printer else 'the next available printer'
+        html = ''.join(
+            render_transfer_status(db.print_jobs.find_one({'_id': job_id}), printer_name).content.decode()
+            for job_id in cards
+        )
+        if oversized:
+            html += f'''
+                <div class="bg-yellow-100 border border-yellow-400 text-yellow-700 px-4 py-3 rounded">
+                    ⚠️ Part(s) {', '.join(sorted(oversized, key=int))} do not fit the build plate and were not queued.
+                </div>
+            '''
+        if refused:
+            html += f'''
                 <div class="bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded">
-                    ❌ Failed to send to printer: {error_msg}
+                    ❌ No configured printer can take the plate(s) with part(s) {', '.join(sorted(refused, key=int))}
+                    (mode, build volume or material); they were not queued.
                 </div>
-            ''')
+            '''
+        
+        logger.info(f"Queued {len(cards)} plate(s) for project {project_id}")
+        return HttpResponse(html)
     
     except Exception as e:
-        logger.error(f"Error sending to printer: {e}", exc_info=True)
+        logger.error(f"Error sending plate to printer: {e}", exc_info=True)
         return HttpResponse(f'''
             <div class="bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded">
                 ❌ Error: {str(e)}
@@ -168,6 +433,233 @@ def api_send_to_printer(request, project_id, part_number):
         ''', status=500)
 
 
+@session_login_required
+@require_http_methods(["GET"])
+def api_estimate_part(request, project_id, part_number):
+    """
+    Print time and filament estimate for a generated part.
+    
+    GET /api/design/estimate/<project_id>/<part_number>/?printer_id=<id>
+    
+    Uses the printer's profile and calibration when printer_id is given,
+    default settings otherwise. The part is estimated in its print orientation.
+    
+    Returns:
+        JSON PrintEstimate (minutes, grams, filament_meters, layers, ...)
+    """
+    project = db.design_projects.find_one(
+        {'_id': to_object_id(project_id), 'user_id': str(request.user.id)},
+        {'_id': 1}
+    )
+    if not project:
+        return JsonResponse({'error': 'Project not found'}, status=404)
+    
+    part = get_project_part(project_id, part_number, {'cadquery_code': 0})
+    if not part or not part.get('stl_file_path') or not Path(part['stl_file_path']).exists():
+        return JsonResponse({'error': 'Part has no STL file'}, status=404)
+    
+    printer = None
+    printer_id = request.GET.get('printer_id')
+    if printer_id:
+        printer = db.printers.find_one({'_id': to_object_id(printer_id), 'user_id': str(request.user.id)})
+        if not printer:
+            return JsonResponse({'error': 'Printer not found'}, status=404)
+    
+    try:
+        estimate = estimate_stl(orient_part(part), printer, part.get('material_recommendation'))
+    except Exception as e:
+        logger.error(f"Error estimating part {part_number}: {e}", exc_info=True)
+        return JsonResponse({'error': str(e)}, status=500)
+    
+    return JsonResponse(estimate)
+
+
+@session_login_required
+@require_http_methods(["POST"])
+def api_orient_parts(request, project_id):
+    """
+    Compute print orientations for all generated parts of a project.
+    
+    POST /api/design/orient-parts/<project_id>/
+    
+    Returns:
+        JSON {part_number: orientation} (rotation, overhang/contact area,
+        height, score vs. the exported orientation)
+    """
+    project = db.design_projects.find_one(
+        {'_id': to_object_id(project_id), 'user_id': str(request.user.id)},
+        {'_id': 1}
+    )
+    if not project:
+        return JsonResponse({'error': 'Project not found'}, status=404)
+    
+    try:
+        orientations = orient_project_parts(project['_id'])
+    except Exception as e:
+        logger.error(f"Error orienting parts: {e}", exc_info=True)
+        return JsonResponse({'error': str(e)}, status=500)
+    
+    return JsonResponse({'parts': {str(number): result for number, result in orientations.items()}})
+
+
+def format_wait(minutes):
+    """Human-readable queue wait, e.g. '1h 20m'"""
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours}h {minutes}m' if hours else f'{minutes}m'
+
+
+def render_transfer_status(job, printer_name):
+    """
+    HTML progress card for a print job's transfer.
+    While the upload is running the card polls itself via HTMX.
+    """
+    job_id = str(job['_id'])
+    total = job.get('total_bytes') or 0
+    sent = job.get('bytes_sent') or 0
+    percent = int(sent * 100 / total) if total else 0
+    state = job.get('transfer_state')
+    
+    if job['status'] == 'failed':
+        return HttpResponse(f'''
+            <div class="bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded">
+                ❌ Failed to send to {printer_name}: {job.get('transfer_error') or 'Unknown error'}
+                <br><small>Gave up after {job.get('transfer_attempts', 0)} attempt(s)</small>
+            </div>
+        ''')
+    
+    if state == 'done':
+        return HttpResponse(f'''
+            <div class="bg-green-100 border border-green-400 text-green-700 px-4 py-3 rounded">
+                ✅ Successfully sent to {printer_name}!
+                <br><small>File: {job['filename']}</small>
+            </div>
+        ''')
+    
+    if job['status'] == 'queued':
+        estimated_start = estimate_queue(job['user_id']).get(job_id)
+        if estimated_start is None:
+            wait = 'waiting for a compatible printer to come online'
+        else:
+            minutes = max(0, int((estimated_start - datetime.utcnow()).total_seconds() // 60))
+            wait = 'starting shortly' if minutes < 1 else f'estimated wait {format_wait(minutes)}'
+        estimate = job.get('estimate')
+        details = f"<br><small>Print ≈ {format_wait(estimate['minutes'])}, {estimate['grams']:g} g filament</small>" if estimate else ''
+        return HttpResponse(f'''
+            <div class="bg-yellow-50 border border-yellow-300 text-yellow-800 px-4 py-3 rounded"
+                 hx-get="/api/print-jobs/{job_id}/status/"
+                 hx-trigger="every 5s"
+                 hx-swap="outerHTML">
+                🕒 {job['filename']} is queued for {printer_name} ({wait}){details}
+            </div>
+        ''')
+    
+    if state == 'slicing':
+        return HttpResponse(f'''
+            <div class="bg-blue-50 border border-blue-300 text-blue-800 px-4 py-3 rounded"
+                 hx-get="/api/print-jobs/{job_id}/status/"
+                 hx-trigger="every 2s"
+                 hx-swap="outerHTML">
+                ⚙️ Slicing {job['filename']} for {printer_name}...
+            </div>
+        ''')
+    
+    if state == 'retrying':
+        detail = f"Retrying after error: {job.get('transfer_error')} (attempt {job.get('transfer_attempts', 0)})"
+    else:
+        detail = f"{sent // 1024:,} / {total // 1024:,} KB"
+    
+    return HttpResponse(f'''
+        <div class="bg-blue-50 border border-blue-300 text-blue-800 px-4 py-3 rounded"
+             hx-get="/api/print-jobs/{job_id}/status/"
+             hx-trigger="every 1s"
+             hx-swap="outerHTML">
+            ⏳ Sending {job['filename']} to {printer_name}... {percent}%
+            <div class="w-full bg-blue-100 rounded h-2 mt-2">
+                <div class="bg-blue-600 h-2 rounded" style="width: {percent}%"></div>
+            </div>
+            <small>{detail}</small>
+        </div>
+    ''')
+
+
+@session_login_required
+@require_http_methods(["GET"])
+def api_print_job_status(request, job_id):
+    """
+    Transfer progress for a print job.
+    
+    GET /api/print-jobs/<job_id>/status/
+    
+    Returns:
+        HTML progress card for HTMX requests, JSON otherwise
+    """
+    job = db.print_jobs.find_one(
+        {'_id': to_object_id(job_id), 'user_id': str(request.user.id)},
+        {'status': 1, 'user_id': 1, 'printer_id': 1, 'filename': 1, 'transfer_state': 1, 'transfer_attempts': 1,
+         'transfer_error': 1, 'bytes_sent': 1, 'total_bytes': 1, 'next_attempt_at': 1, 'estimate': 1}
+    )
+    
+    if not job:
+        return JsonResponse({'error': 'Print job not found'}, status=404)
+    
+    if 'HX-Request' in request.headers:
+        printer = db.printers.find_one({'_id': job['printer_id']}, {'name': 1}) if job.get('printer_id') else None
+        printer_name = printer['name'] if printer else 'the next available printer'
+        return render_transfer_status(job, printer_name)
+    
+    total = job.get('total_bytes') or 0
+    return JsonResponse({
+        'id': str(job['_id']),
+        'status': job['status'],
+        'transfer_state': job.get('transfer_state'),
+        'bytes_sent': job.get('bytes_sent', 0),
+        'total_bytes': total,
+        'progress': round(job.get('bytes_sent', 0) * 100 / total, 1) if total else 0,
+        'attempts': job.get('transfer_attempts', 0),
+        'error': job.get('transfer_error'),
+        'next_attempt_at': job.get('next_attempt_at'),
+        'estimate': job.get('estimate'),
+    })
+
+
+@session_login_required
+@require_http_methods(["GET"])
+def api_print_queue(request):
+    """
+    The user's queued print jobs with estimated start times.
+    
+    GET /api/print-queue/
+    
+    Returns:
+        JSON list of queued jobs in dispatch order
+    """
+    user_id = str(request.user.id)
+    estimates = estimate_queue(user_id)
+    jobs = db.print_jobs.find(
+        {'user_id': user_id, 'status': 'queued'},
+        {'printer_id': 1, 'filename': 1, 'material': 1, 'created_at': 1, 'estimate': 1}
+    ).sort([('created_at', 1), ('_id', 1)])
+    
+    now = datetime.utcnow()
+    queue = []
+    for position, job in enumerate(jobs, start=1):
+        estimated_start = estimates.get(str(job['_id']))
+        queue.append({
+            'id': str(job['_id']),
+            'position': position,
+            'filename': job.get('filename'),
+            'material': job.get('material'),
+            'printer_id': str(job['printer_id']) if job.get('printer_id') else None,
+            'queued_at': job['created_at'],
+            'estimated_start': estimated_start,
+            'estimated_wait_minutes': int(max(0, (estimated_start - now).total_seconds()) // 60) if estimated_start else None,
+            'estimated_print_minutes': (job.get('estimate') or {}).get('minutes'),
+            'estimated_grams': (job.get('estimate') or {}).get('grams'),
+        })
+    
+    return JsonResponse({'queue': queue})
+
+
 @session_login_required
 @require_http_methods(["GET"])
 def api_get_printer_status(request, printer_id):
@@ -0,0 +1,343 @@
+"""
+Print Scheduler
+
+Holds queued print jobs and hands each one to a compatible idle printer:
+3D-print capable (PrinterSchema.can_print_3d), large enough for the part and
+loaded with a material it accepts. Jobs are taken in FIFO order; the smallest
+printer that fits is preferred so large build volumes stay free for large
+parts. Dispatch runs when a job is queued and from the printer poller, which
+also closes out jobs when a printer finishes (printing -> idle).
+
+Web workers and the poller dispatch concurrently, so a printer is reserved
+(printers.reserved_job, set atomically) before a job is sent to it.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from services.print_estimator import MATERIAL_DENSITY, PrintProfile, estimate_print, material_words
+from services.stl_mesh import read_stl
+from .mongodb import db
+from .schemas import PrinterSchema
+from .printer_poller import get_live_status
+from .printer_telemetry import printing_minutes
+from .print_transfer import start_transfer
+
+logger = logging.getLogger(__name__)
+
+# A reservation younger than this is never treated as stale (covers the gap
+# between reserving the printer and moving the job out of 'queued')
+RESERVATION_SETTLE_SECONDS = 60
+
+
+def fits_build_volume(printer: dict, dimensions: Optional[dict]) -> bool:
+    """
+    Whether a part's bounding box fits the printer (rotation about Z allowed).
+    Unknown part or printer dimensions (including legacy '100x50x20mm'
+    strings) are treated as fitting.
+    """
+    if not isinstance(dimensions, dict):
+        return True
+    try:
+        x, y, z = (float(dimensions.get(axis) or 0) for axis in ('x', 'y', 'z'))
+    except (TypeError, ValueError):
+        return True
+    bx, by, bz = (printer.get(f'build_volume_{axis}') or 0 for axis in ('x', 'y', 'z'))
+    if not (bx and by and bz):
+        return True
+    return z <= bz and ((x <= bx and y <= by) or (x <= by and y <= bx))
+
+
+def material_tokens(text: str) -> set:
+    """Upper-case words of a material description ('PLA or PETG', 'PLA+' -> {'PLA', 'OR', 'PETG'}, {'PLA'})"""
+    return set(material_words(text))
+
+
+def supports_material(printer: dict, material: Optional[str]) -> bool:
+    """
+    Whether the printer takes any material the job names. Job materials are
+    often free text from the design step ("PLA or PETG"), so both sides are
+    split into words; text naming no material we know is accepted, as are
+    printers without a material list.
+    """
+    materials = printer.get('materials') or []
+    if not material or not materials:
+        return True
+    loaded = set().union(*(material_tokens(m) for m in materials))
+    named = material_tokens(material) & (loaded | set(MATERIAL_DENSITY))
+    return not named or bool(named & loaded)
+
+
+def is_compatible(printer: dict, job: dict) -> bool:
+    """Whether a printer could ever run this job (ignores current state)"""
+    if job.get('printer_id') and job['printer_id'] != printer['_id']:
+        return False
+    return (PrinterSchema.can_print_3d(printer)
+            and fits_build_volume(printer, job.get('dimensions'))
+            and supports_material(printer, job.get('material')))
+
+
+def printer_state(printer: dict) -> str:
+    """
+    Current state from the poller snapshot. Without a fresh snapshot the
+    printer counts as idle unless one of our jobs is uploading to or printing
+    on it (the stored status is only a label and is never reset after a print).
+    """
+    live = get_live_status(printer)
+    if live and live.get('online'):
+        return live.get('status', 'idle')
+    if live:
+        return 'offline'
+    active = db.print_jobs.find_one(
+        {'printer_id': printer['_id'], 'status': {'$in': ['uploading', 'printing']}},
+        {'status': 1}
+    )
+    return 'printing' if active else 'idle'
+
+
+def _build_volume(printer: dict) -> int:
+    return (printer.get('build_volume_x') or 0) * (printer.get('build_volume_y') or 0) * (printer.get('build_volume_z') or 0)
+
+
+def _busy_jobs(printer_ids: List) -> List[dict]:
+    """
+    Jobs keeping a printer busy: a transfer in flight or a print that only just
+    started. Older 'printing' jobs are trusted to the live status (the poller
+    closes them).
+    """
+    recent = datetime.utcnow() - timedelta(seconds=settings.PRINT_QUEUE_START_GRACE)
+    return list(db.print_jobs.find({
+        'printer_id': {'$in': printer_ids},
+        '$or': [
+            {'status': 'uploading'},
+            {'status': 'printing', 'started_at': {'$gte': recent}},
+        ]
+    }, {'printer_id': 1}))
+
+
+def _busy_printer_ids(printer_ids: List) -> set:
+    return {job['printer_id'] for job in _busy_jobs(printer_ids)}
+
+
+def reserve_printer(printer_id, job_id) -> bool:
+    """Atomically claim a free printer for a job; False if another dispatcher has it"""
+    return db.printers.find_one_and_update(
+        {'_id': printer_id, 'reserved_job': None},
+        {'$set': {'reserved_job': job_id, 'reserved_at': datetime.utcnow()}}
+    ) is not None
+
+
+def release_printer(printer_id, job_id):
+    """Drop the printer's reservation if it is still held for this job"""
+    db.printers.update_one(
+        {'_id': printer_id, 'reserved_job': job_id},
+        {'$set': {'reserved_job': None, 'reserved_at': None}}
+    )
+
+
+def _release_stale_reservations(printers: List[dict], busy_job_ids: set):
+    """
+    Free reservations whose job no longer keeps the printer busy (finished,
+    failed, cancelled or deleted). Fresh reservations are left alone: their
+    job may not have left 'queued' yet.
+    """
+    settle_before = datetime.utcnow() - timedelta(seconds=RESERVATION_SETTLE_SECONDS)
+    for printer in printers:
+        job_id = printer.get('reserved_job')
+        if job_id is None or job_id in busy_job_ids:
+            continue
+        reserved_at = printer.get('reserved_at')
+        if reserved_at and reserved_at > settle_before:
+            continue
+        release_printer(printer['_id'], job_id)
+        printer['reserved_job'] = None
+
+
+def estimate_stl(stl_path, printer=None, material=None):
+    """Print time/filament estimate (services.print_estimator) for an STL on a printer's profile"""
+    return estimate_print(read_stl(stl_path), PrintProfile.for_printer(printer), material).to_dict()
+
+
+def _estimate_on(job: dict, printer: dict) -> dict:
+    """
+    Fields to store when a job queued for any printer is assigned one: its
+    estimate redone on that printer's profile, so the queue shows the real
+    time and calibrate_estimates compares the printer against its own numbers
+    """
+    if job.get('printer_id') == printer['_id'] or not (job.get('file_path') or '').lower().endswith('.stl'):
+        return {}
+    try:
+        estimate = estimate_stl(job['file_path'], printer, job.get('material'))
+    except Exception as e:
+        logger.warning(f"Could not re-estimate print job {job['_id']} for printer {printer.get('name')}: {e}")
+        return {}
+    return {'estimate': estimate, 'estimated_duration': estimate['minutes']}
+
+
+def _queued_jobs(user_id: str = None):
+    query = {'status': 'queued'}
+    if user_id:
+        query['user_id'] = user_id
+    return list(db.print_jobs.find(query).sort([('created_at', 1), ('_id', 1)]))
+
+
+def dispatch_pending(user_id: str = None) -> int:
+    """
+    Assign queued jobs to idle compatible printers and start their transfers.
+
+    Args:
+        user_id: Only dispatch this user's jobs (default: everyone's)
+
+    Returns:
+        Number of jobs dispatched
+    """
+    jobs = _queued_jobs(user_id)
+    if not jobs:
+        return 0
+
+    printers = list(db.printers.find({'user_id': {'$in': list({job['user_id'] for job in jobs})}}))
+    busy_jobs = _busy_jobs([printer['_id'] for printer in printers])
+    busy = {job['printer_id'] for job in busy_jobs}
+    _release_stale_reservations(printers, {job['_id'] for job in busy_jobs})
+    idle = [
+        printer for printer in printers
+        if printer['_id'] not in busy and not printer.get('reserved_job') and printer_state(printer) == 'idle'
+    ]
+    # Smallest printer first, so big build volumes stay free for big parts
+    idle.sort(key=_build_volume)
+
+    dispatched = 0
+    for job in jobs:
+        printer = next(
+            (p for p in idle if p['user_id'] == job['user_id'] and is_compatible(p, job)),
+            None
+        )
+        if printer is None:
+            continue
+
+        # Whoever reserves first sends to this printer; the loser moves on
+        idle.remove(printer)
+        if not reserve_printer(printer['_id'], job['_id']):
+            continue
+
+        now = datetime.utcnow()
+        result = db.print_jobs.update_one(
+            {'_id': job['_id'], 'status': 'queued'},
+            {'$set': {
+                'printer_id': printer['_id'],
+                'status': 'uploading',
+                'transfer_state': 'pending',
+                'next_attempt_at': now,
+                'dispatched_at': now,
+                **_estimate_on(job, printer)
+            }}
+        )
+        if not result.modified_count:
+            # Cancelled or dispatched by another process
+            release_printer(printer['_id'], job['_id'])
+            continue
+
+        start_transfer(job['_id'])
+        dispatched += 1
+        logger.info(f"Dispatched print job {job['_id']} to printer {printer.get('name')}")
+
+    return dispatched
+
+
+def complete_printing_jobs(printer_id) -> int:
+    """Mark the printer's running job as completed (it went from printing to idle)"""
+    now = datetime.utcnow()
+    jobs = list(db.print_jobs.find({'printer_id': printer_id, 'status': 'printing'}, {'started_at': 1}))
+    for job in jobs:
+        started_at = job.get('started_at')
+        db.print_jobs.update_one(
+            {'_id': job['_id'], 'status': 'printing'},
+            {'$set': {
+                'status': 'completed',
+                'completed_at': now,
+                'actual_duration': int((now - started_at).total_seconds() // 60) if started_at else None,
+                'printed_minutes': printing_minutes(printer_id, started_at, now) if started_at else None
+            }}
+        )
+    if jobs:
+        for job in jobs:
+            release_printer(printer_id, job['_id'])
+        db.printers.update_one({'_id': printer_id}, {'$set': {'status': 'idle', 'updated_at': now}})
+        calibrate_estimates(printer_id)
+    return len(jobs)
+
+
+def calibrate_estimates(printer_id) -> Optional[float]:
+    """
+    Fit the printer's estimate_factor (actual / estimated print time).
+
+    Uses the median ratio over the printer's recent completed jobs that carry a
+    raw geometry estimate. The actual time is printed_minutes, the minutes the
+    printer's telemetry reported 'printing' for the job; jobs finished while
+    the 1 minute rollups were missing fall back to actual_duration (start to
+    the printing -> idle transition). Returns the stored factor, or None when
+    there is not enough history yet.
+    """
+    jobs = list(db.print_jobs.find(
+        {
+            'printer_id': printer_id,
+            'status': 'completed',
+            'actual_duration': {'$gt': 0},
+            'estimate.raw_minutes': {'$gt': 0}
+        },
+        {'actual_duration': 1, 'printed_minutes': 1, 'estimate.raw_minutes': 1}
+    ).sort('completed_at', -1).limit(settings.PRINT_ESTIMATE_CALIBRATION_JOBS))
+    if len(jobs) < settings.PRINT_ESTIMATE_MIN_SAMPLES:
+        return None
+
+    ratios = sorted(
+        (job.get('printed_minutes') or job['actual_duration']) / job['estimate']['raw_minutes']
+        for job in jobs
+    )
+    middle = len(ratios) // 2
+    median = ratios[middle] if len(ratios) % 2 else (ratios[middle - 1] + ratios[middle]) / 2
+    # Clamp so one mislabelled job (cancelled, paused overnight) can't wreck estimates
+    factor = round(min(max(median, 0.5), 3.0), 3)
+    db.printers.update_one({'_id': printer_id}, {'$set': {'estimate_factor': factor}})
+    logger.info(f"Printer {printer_id} estimate factor {factor} from {len(ratios)} prints")
+    return factor
+
+
+def estimate_queue(user_id: str) -> Dict[str, datetime]:
+    """
+    Estimated start time of each of a user's queued jobs.
+
+    Simulates the queue in FIFO order: every job goes to the compatible printer
+    that frees up first. Busy printers free up after their live time_remaining;
+    jobs run for their estimated_duration (or PRINT_QUEUE_DEFAULT_JOB_MINUTES).
+    Jobs with no usable printer (all offline/incompatible) are left out.
+    """
+    now = datetime.utcnow()
+    printers = list(db.printers.find({'user_id': user_id}))
+    busy = _busy_printer_ids([printer['_id'] for printer in printers])
+
+    available_at = {}
+    for printer in printers:
+        state = printer_state(printer)
+        if state == 'idle' and printer['_id'] not in busy:
+            available_at[printer['_id']] = now
+        elif state in ('printing', 'paused') or printer['_id'] in busy:
+            live = get_live_status(printer) or {}
+            remaining = live.get('time_remaining') or settings.PRINT_QUEUE_DEFAULT_JOB_MINUTES * 60
+            available_at[printer['_id']] = now + timedelta(seconds=remaining)
+
+    estimates = {}
+    for job in _queued_jobs(user_id):
+        candidates = [p for p in printers if p['_id'] in available_at and is_compatible(p, job)]
+        if not candidates:
+            continue
+        printer = min(candidates, key=lambda p: available_at[p['_id']])
+        start = available_at[printer['_id']]
+        estimates[str(job['_id'])] = start
+        duration = job.get('estimated_duration') or settings.PRINT_QUEUE_DEFAULT_JOB_MINUTES
+        available_at[printer['_id']] = start + timedelta(minutes=duration)
+
+    return estimates
@@ -0,0 +1,365 @@
+"""
+Print Transfers
+
+Runs printer file uploads as background jobs so the request that starts them
+returns immediately. Progress (bytes sent) is written to the print job as the
+file streams and a failed attempt schedules its retry with exponential
+backoff; resume_transfers() (run by the printer poller) starts retries that
+are due and jobs left mid-transfer by a restart.
+
+Printer upload APIs cannot append to a partial file, so a retry resends the
+file from the start. Each attempt holds a token on the job; every write it
+makes is conditional on that token, so an attempt written off as stalled
+stops at its next progress write instead of finishing alongside its retry.
+
+STL files are sliced to G-code first (services/slicer.py); identical
+mesh/profile pairs come straight from the G-code cache.
+"""
+
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from pymongo import ReturnDocument
+
+from services.print_estimator import MATERIAL_DENSITY, PrintProfile, material_words
+from services.slicer import SLICERS, PrusaSlicerCLI, SlicerError, SlicingPool
+from .mongodb import db
+
+logger = logging.getLogger(__name__)
+
+# Write progress at most this often (seconds) to keep MongoDB writes low
+PROGRESS_WRITE_INTERVAL = 1.0
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class TransferSuperseded(Exception):
+    """The attempt lost its job to a newer one (it was marked stalled)"""
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Process-wide transfer pool, created on first use"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PRINT_TRANSFER_WORKERS,
+                    thread_name_prefix='print-transfer'
+                )
+    return _executor
+
+
+_slicing_pool = None
+
+
+def get_slicing_pool() -> SlicingPool:
+    """Process-wide slicing pool for the configured SLICER_BACKEND"""
+    global _slicing_pool
+    if _slicing_pool is None:
+        with _executor_lock:
+            if _slicing_pool is None:
+                slicer_class = SLICERS[settings.SLICER_BACKEND]
+                if slicer_class is PrusaSlicerCLI:
+                    slicer = PrusaSlicerCLI(settings.SLICER_PATH, timeout=settings.SLICER_TIMEOUT)
+                else:
+                    slicer = slicer_class()
+                _slicing_pool = SlicingPool(
+                    slicer,
+                    Path(settings.MEDIA_ROOT) / 'gcode_cache',
+                    max_workers=settings.SLICER_WORKERS
+                )
+    return _slicing_pool
+
+
+# Slicer option for each PrintProfile field the slicer understands
+SLICER_OPTIONS = {
+    'layer_height': 'layer_height',
+    'line_width': 'extrusion_width',
+    'perimeters': 'perimeters',
+    'top_layers': 'top_solid_layers',
+    'bottom_layers': 'bottom_solid_layers',
+    'infill': 'fill_density',
+    'perimeter_speed': 'perimeter_speed',
+    'infill_speed': 'infill_speed',
+    'filament_diameter': 'filament_diameter',
+}
+
+# PrusaSlicer filament_type for each material the estimator knows
+SLICER_FILAMENT_TYPES = {'TPU': 'FLEX'}
+
+
+def job_material(printer: dict, material: Optional[str]) -> Optional[str]:
+    """
+    The known material a job prints in on this printer: the first one its
+    (free-text) material names that the printer has loaded, else the first
+    one it names at all.
+    """
+    named = [word for word in material_words(material) if word in MATERIAL_DENSITY]
+    loaded = set(material_words(' '.join(printer.get('materials') or [])))
+    return next((word for word in named if word in loaded), named[0] if named else None)
+
+
+def slicer_profile(printer: dict, material: Optional[str] = None) -> dict:
+    """
+    Slicer settings for a printer and material.
+
+    With a slicer config file for the printer type, the file is the profile
+    and only values the printer sets itself (print_profile, then
+    slicer_profile) override it. Without one, the estimator's print profile
+    for the printer fills in every setting. The material becomes the
+    filament_type, so it is part of the G-code cache key too.
+    """
+    config = settings.SLICER_CONFIGS.get(printer.get('printer_type'))
+    if config:
+        fields = printer.get('print_profile') or {}
+    else:
+        fields = asdict(PrintProfile.for_printer(printer))
+    options = {'config': config}
+    for field, option in SLICER_OPTIONS.items():
+        if field in fields:
+            value = fields[field]
+            options[option] = f'{round(value * 100)}%' if field == 'infill' else value
+    if material:
+        options['filament_type'] = SLICER_FILAMENT_TYPES.get(material, material)
+    options.update(printer.get('slicer_profile') or {})
+    return options
+
+
+def _owned(job: dict) -> dict:
+    """Filter matching the job only while this attempt still owns it"""
+    return {'_id': job['_id'], 'transfer_token': job['transfer_token']}
+
+
+def prepare_print_file(job: dict, printer: dict):
+    """
+    The file to upload for a job: G-code sliced from its STL (cached), or the
+    file itself when it is already printable or slicing is disabled.
+
+    Returns:
+        (path, filename on the printer)
+    """
+    if not settings.SLICER_BACKEND or not job['file_path'].lower().endswith('.stl'):
+        return job['file_path'], job['filename']
+
+    result = db.print_jobs.update_one(
+        _owned(job),
+        {'$set': {'transfer_state': 'slicing', 'transfer_heartbeat_at': datetime.utcnow()}}
+    )
+    if not result.matched_count:
+        raise TransferSuperseded()
+    gcode_path = get_slicing_pool().slice(
+        job['file_path'],
+        slicer_profile(printer, job_material(printer, job.get('material'))),
+        timeout=settings.SLICER_TIMEOUT
+    )
+    filename = Path(job['filename']).with_suffix('.gcode').name
+    result = db.print_jobs.update_one(
+        _owned(job),
+        {'$set': {
+            'transfer_state': 'sending',
+            'transfer_heartbeat_at': datetime.utcnow(),
+            'gcode_path': str(gcode_path),
+            'filename': filename,
+            'total_bytes': gcode_path.stat().st_size
+        }}
+    )
+    if not result.matched_count:
+        raise TransferSuperseded()
+    return str(gcode_path), filename
+
+
+def retry_delay(attempt: int) -> float:
+    """Backoff before retry number `attempt` (1-based)"""
+    return min(settings.PRINT_TRANSFER_RETRY_BASE * (2 ** (attempt - 1)),
+               settings.PRINT_TRANSFER_RETRY_MAX)
+
+
+def start_transfer(job_id):
+    """Queue a print job's upload on the background pool"""
+    _get_executor().submit(run_transfer, job_id)
+
+
+def _claim(job_id):
+    """Atomically take the job for a new attempt; None if it is not due or another worker has it"""
+    return db.print_jobs.find_one_and_update(
+        {
+            '_id': job_id,
+            'status': 'uploading',
+            'transfer_state': {'$in': ['pending', 'retrying']},
+            'next_attempt_at': {'$lte': datetime.utcnow()}
+        },
+        {
+            '$set': {
+                'transfer_state': 'sending',
+                'transfer_token': uuid.uuid4().hex,
+                'transfer_heartbeat_at': datetime.utcnow(),
+                'bytes_sent': 0
+            },
+            '$inc': {'transfer_attempts': 1}
+        },
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def _progress_writer(job: dict):
+    """
+    Progress callback that records bytes sent, throttled to one write per
+    interval; raises TransferSuperseded (aborting the upload) once the
+    attempt no longer owns the job
+    """
+    last_write = [0.0]
+
+    def progress(bytes_sent, total):
+        now = time.monotonic()
+        if now - last_write[0] < PROGRESS_WRITE_INTERVAL and bytes_sent < total:
+            return
+        last_write[0] = now
+        result = db.print_jobs.update_one(
+            _owned(job),
+            {'$set': {
+                'bytes_sent': bytes_sent,
+                'total_bytes': total,
+                'transfer_heartbeat_at': datetime.utcnow()
+            }}
+        )
+        if not result.matched_count:
+            raise TransferSuperseded()
+
+    return progress
+
+
+def run_transfer(job_id):
+    """
+    Make one upload attempt for a print job's file.
+
+    Runs on the transfer pool (from start_transfer or resume_transfers). Ends
+    with the job 'printing', 'failed', or 'retrying' with next_attempt_at set
+    for resume_transfers to pick up; the worker never waits out the backoff.
+    """
+    # Imported here to avoid a circular import with print_job_views
+    from .print_job_views import get_printer_client
+
+    job = _claim(job_id)
+    if not job:
+        return
+
+    attempt = job['transfer_attempts']
+    try:
+        printer = db.printers.find_one({'_id': job['printer_id']})
+        if not printer:
+            raise ValueError('Printer no longer exists')
+
+        client = get_printer_client(printer)
+        file_path, filename = prepare_print_file(job, printer)
+        result = client.upload_and_print(
+            file_path,
+            filename,
+            progress=_progress_writer(job)
+        )
+        if not result['success']:
+            raise RuntimeError(result.get('error', 'Unknown error'))
+    except TransferSuperseded:
+        logger.warning(f"Print job {job_id}: attempt {attempt} was superseded by a retry; stopped")
+        return
+    except Exception as e:
+        error = str(e)
+        # A mesh the slicer rejects will be rejected again
+        if isinstance(e, SlicerError) or attempt >= settings.PRINT_TRANSFER_MAX_ATTEMPTS:
+            logger.error(f"Print job {job_id} transfer failed after {attempt} attempts: {error}")
+            result = db.print_jobs.update_one(
+                _owned(job),
+                {'$set': {
+                    'status': 'failed',
+                    'transfer_state': 'failed',
+                    'transfer_error': error,
+                    'completed_at': datetime.utcnow()
+                }}
+            )
+            if result.matched_count:
+                # Imported here: print_scheduler imports this module
+                from .print_scheduler import release_printer
+                release_printer(job['printer_id'], job_id)
+            return
+
+        delay = retry_delay(attempt)
+        logger.warning(f"Print job {job_id} transfer attempt {attempt} failed ({error}); retrying in {delay}s")
+        db.print_jobs.update_one(
+            _owned(job),
+            {'$set': {
+                'transfer_state': 'retrying',
+                'transfer_error': error,
+                'next_attempt_at': datetime.utcnow() + timedelta(seconds=delay)
+            }}
+        )
+        return
+
+    now = datetime.utcnow()
+    result = db.print_jobs.update_one(
+        _owned(job),
+        {'$set': {
+            'status': 'printing',
+            'transfer_state': 'done',
+            'transfer_error': None,
+            'started_at': now
+        }}
+    )
+    if not result.matched_count:
+        logger.warning(f"Print job {job_id}: attempt {attempt} finished after being superseded")
+        return
+    db.printers.update_one(
+        {'_id': job['printer_id']},
+        {'$set': {'status': 'printing', 'updated_at': now}}
+    )
+    logger.info(f"Print job {job_id}: sent {filename} to printer {job['printer_id']}")
+
+
+def resume_transfers() -> int:
+    """
+    Restart transfers that no worker is running.
+
+    Picks up jobs whose retry is due and jobs stuck in 'sending' with no
+    progress for PRINT_TRANSFER_STALL_SECONDS, or in 'slicing' for longer than
+    the slicer timeout allows (e.g. the process restarted). A stalled job's
+    token is cleared in the same update, so if its attempt is only slow it
+    stops at its next write rather than uploading twice. Returns the number
+    of jobs queued.
+    """
+    now = datetime.utcnow()
+    stalled_before = now - timedelta(seconds=settings.PRINT_TRANSFER_STALL_SECONDS)
+    slicing_stalled_before = stalled_before - timedelta(seconds=settings.SLICER_TIMEOUT)
+
+    db.print_jobs.update_many(
+        {'status': 'uploading', '$or': [
+            {'transfer_state': 'sending', 'transfer_heartbeat_at': {'$lt': stalled_before}},
+            {'transfer_state': 'slicing', 'transfer_heartbeat_at': {'$lt': slicing_stalled_before}},
+        ]},
+        {'$set': {'transfer_state': 'retrying', 'transfer_token': None, 'next_attempt_at': now}}
+    )
+    jobs = db.print_jobs.find(
+        {'status': 'uploading', 'transfer_state': {'$in': ['pending', 'retrying']}, 'next_attempt_at': {'$lte': now}},
+        {'_id': 1}
+    )
+    count = 0
+    for job in jobs:
+        start_transfer(job['_id'])
+        count += 1
+    return count
+
+
+def wait_for_transfers():
+    """Block until queued transfers finish (for one-shot management commands)"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
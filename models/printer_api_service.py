@@ -4,11 +4,16 @@ Handles communication with Prusa (PrusaLink) and Snapmaker printers
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPDigestAuth
 import time
 import logging
-from typing import Optional, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from typing import Optional, Dict, Any, Iterable, Callable
 from dataclasses import dataclass
+from django.conf import settings
+from services.upload_stream import UploadBody, UploadSource, ProgressCallback, multipart_file_body
 
 logger = logging.getLogger(__name__)
 
@@ -81,11 +86,11 @@ class PrusaLinkAPI:
         """Get printer information"""
         return self._request('GET', '/api/v1/info')
     
-    def get_status(self) -> PrinterStatus:
+    def get_status(self, timeout: float = None) -> PrinterStatus:
         """Get current printer status"""
         status = PrinterStatus()
         
-        data = self._request('GET', '/api/v1/status')
+        data = self._request('GET', '/api/v1/status', timeout=timeout or self.timeout)
         if not data:
             return status
         
@@ -151,21 +156,28 @@ class PrusaLinkAPI:
         """Get files in storage"""
         return self._request('GET', f'/api/v1/files/{storage}{path}')
     
-    def upload_file(self, file_path: str, file_data: bytes, 
+    def upload_file(self, file_path: str, file_data: UploadSource,
                     storage: str = 'local', print_after_upload: bool = False,
-                    overwrite: bool = True) -> bool:
+                    overwrite: bool = True, progress: Optional[ProgressCallback] = None,
+                    timeout: float = None) -> bool:
         """
         Upload a file to the printer
         
+        The file is streamed in chunks, so memory use does not grow with file size.
+        
         Args:
             file_path: Path where the file should be stored (e.g., '/my_print.gcode')
-            file_data: The file content as bytes
+            file_data: Local file path, open binary file object, or bytes
             storage: Storage location ('local' or 'sdcard')
             print_after_upload: Whether to start printing immediately
             overwrite: Whether to overwrite existing file
+            progress: Called with (bytes_sent, total) as the upload proceeds
+            timeout: Socket timeout in seconds (default: self.timeout)
         """
+        body = UploadBody(file_data, progress=progress)
         headers = {
             'Content-Type': 'application/octet-stream',
+            'Content-Length': str(len(body)),
             'Print-After-Upload': '?1' if print_after_upload else '?0',
             'Overwrite': '?1' if overwrite else '?0'
         }
@@ -173,8 +185,9 @@ class PrusaLinkAPI:
         result = self._request(
             'PUT', 
             f'/api/v1/files/{storage}{file_path}',
-            data=file_data,
-            headers=headers
+            data=body,
+            headers=headers,
+            timeout=timeout or self.timeout
         )
         return result is not None
     
@@ -255,7 +268,7 @@ class SnapmakerAPI:
         
         return False
     
-    def get_status(self) -> PrinterStatus:
+    def get_status(self, timeout: float = None) -> PrinterStatus:
         """Get current printer status"""
         status = PrinterStatus()
         
@@ -263,7 +276,8 @@ class SnapmakerAPI:
             return status
         
         timestamp = int(time.time() * 1000)
-        data = self._request('GET', f'/api/v1/status?token={self.api_token}&{timestamp}')
+        data = self._request('GET', f'/api/v1/status?token={self.api_token}&{timestamp}',
+                             timeout=timeout or self.timeout)
         
         if not data:
             return status
@@ -303,13 +317,18 @@ class SnapmakerAPI:
         timestamp = int(time.time() * 1000)
         return self._request('GET', f'/api/v1/enclosure?token={self.api_token}&{timestamp}')
     
-    def upload_file(self, filename: str, file_data: bytes) -> bool:
+    def upload_file(self, filename: str, file_data: UploadSource,
+                    progress: Optional[ProgressCallback] = None, timeout: float = None) -> bool:
         """
         Upload a G-code file to the Snapmaker
         
+        The multipart body is streamed, so the file is never held in memory.
+        
         Args:
             filename: Name for the file on the printer
-            file_data: The file content as bytes
+            file_data: Local file path, open binary file object, or bytes
+            progress: Called with (bytes_sent, total) as the upload proceeds
+            timeout: Socket timeout in seconds (default: self.timeout)
         """
         if not self.api_token:
             logger.error("No API token - cannot upload")
@@ -317,31 +336,24 @@ class SnapmakerAPI:
         
         # Snapmaker requires multipart form with specific structure
         # Token part must NOT have Content-Type header
-        
-        # Build multipart manually to control headers
-        boundary = '----WebKitFormBoundary7MA4YWxkTrZu0gW'
-        
-        body = (
-            f'--{boundary}\r\n'
-            f'Content-Disposition: form-data; name="token"\r\n\r\n'
-            f'{self.api_token}\r\n'
-            f'--{boundary}\r\n'
-            f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
-            f'Content-Type: application/octet-stream\r\n\r\n'
-        ).encode('utf-8')
-        
-        body += file_data
-        body += f'\r\n--{boundary}--\r\n'.encode('utf-8')
+        body, content_type = multipart_file_body(
+            file_data,
+            filename,
+            fields={'token': self.api_token},
+            progress=progress
+        )
         
         headers = {
-            'Content-Type': f'multipart/form-data; boundary={boundary}'
+            'Content-Type': content_type,
+            'Content-Length': str(len(body))
         }
         
         result = self._request(
             'POST',
             '/api/v1/upload',
             data=body,
-            headers=headers
+            headers=headers,
+            timeout=timeout or self.timeout
         )
         
         return result is not None
@@ -409,6 +421,154 @@ class PrinterAPIFactory:
             raise ValueError(f"Unknown printer type: {printer_type}")
 
 
+class PrinterClientRegistry:
+    """
+    Keeps one API client per (printer_type, ip_address, api_key)
+    
+    Reusing a client reuses its requests.Session, so status polls ride on
+    kept-alive connections instead of opening a new TCP connection (and
+    authenticating again) every time. Call invalidate_printer_clients() when
+    a printer's connection details change.
+    """
+    
+    def __init__(self, factory: Callable, pool_maxsize: int = 4):
+        """
+        Args:
+            factory: Called as factory(printer_type, ip_address, api_key) to build a client
+            pool_maxsize: Keep-alive connections per printer (concurrent requests)
+        """
+        self.factory = factory
+        self.pool_maxsize = pool_maxsize
+        self._clients = {}
+        self._lock = threading.Lock()
+        _registries.append(self)
+    
+    def get(self, printer_type: str, ip_address: str, api_key: str = None):
+        """Return the cached client for this printer, creating it on first use"""
+        key = (printer_type, ip_address, api_key)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self.factory(printer_type, ip_address, api_key)
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+                    client.session.mount('http://', adapter)
+                    client.session.mount('https://', adapter)
+                    self._clients[key] = client
+        return client
+    
+    def invalidate(self, ip_address: str):
+        """Drop (and close) every cached client for a printer address"""
+        with self._lock:
+            stale = [key for key in self._clients if key[1] == ip_address]
+            clients = [self._clients.pop(key) for key in stale]
+        for client in clients:
+            client.session.close()
+
+
+# Every registry, so one call invalidates clients of all kinds
+_registries = []
+
+
+def invalidate_printer_clients(ip_address: str):
+    """Forget cached clients for a printer after its settings change or it is deleted"""
+    if not ip_address:
+        return
+    for registry in _registries:
+        registry.invalidate(ip_address)
+
+
+class PrinterFleet:
+    """
+    Fetches status from many printers concurrently
+    
+    All printers are queried in parallel and the whole batch shares one deadline,
+    so a grid of N printers costs roughly the slowest printer (capped at the
+    deadline) instead of the sum. Printers that miss the deadline are reported
+    offline with a timeout message.
+    """
+    
+    def __init__(self, max_workers: int = 16, deadline: float = 5.0):
+        self.max_workers = max_workers
+        self.deadline = deadline
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Shared worker pool, created on first use"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix='printer-fleet'
+                    )
+        return self._executor
+    
+    def _fetch(self, printer: Dict) -> PrinterStatus:
+        try:
+            api = printer_clients.get(
+                printer['printer_type'],
+                printer['ip_address'],
+                printer['api_key']
+            )
+            # No single request may outlive the batch deadline
+            return api.get_status(timeout=min(api.timeout, self.deadline))
+        except Exception as e:
+            logger.error(f"Error getting printer status: {e}")
+            return PrinterStatus(error_message=str(e))
+    
+    def get_statuses(self, printers: Iterable[Dict], key: str = '_id',
+                     deadline: float = None) -> Dict[str, PrinterStatus]:
+        """
+        Get the status of several printers at once
+        
+        Args:
+            printers: Printer documents with printer_type, ip_address and api_key
+            key: Field used to identify each printer in the result
+            deadline: Seconds to wait for the whole batch (default: self.deadline)
+        
+        Returns:
+            Dict mapping str(printer[key]) to its PrinterStatus
+        """
+        futures = {
+            self.executor.submit(self._fetch, printer): str(printer[key])
+            for printer in printers
+        }
+        if not futures:
+            return {}
+        
+        done, not_done = wait(futures, timeout=deadline or self.deadline)
+        
+        statuses = {futures[future]: future.result() for future in done}
+        for future in not_done:
+            logger.warning(f"Printer {futures[future]} missed the status deadline")
+            statuses[futures[future]] = PrinterStatus(error_message='Status request timed out')
+        return statuses
+    
+    def get_status(self, printer: Dict, deadline: float = None) -> PrinterStatus:
+        """Get one printer's status, bounded by the deadline"""
+        future = self.executor.submit(self._fetch, printer)
+        try:
+            return future.result(timeout=deadline or self.deadline)
+        except FutureTimeoutError:
+            logger.warning(f"Printer {printer.get('ip_address')} missed the status deadline")
+            return PrinterStatus(error_message='Status request timed out')
+
+
+# Shared by all printer views and the background poller
+printer_clients = PrinterClientRegistry(
+    PrinterAPIFactory.create,
+    pool_maxsize=settings.PRINTER_CLIENT_POOL_SIZE
+)
+printer_fleet = PrinterFleet(
+    max_workers=settings.PRINTER_FLEET_MAX_WORKERS,
+    deadline=settings.PRINTER_FLEET_DEADLINE
+)
+
+
 def format_time(seconds: int) -> str:
     """Format seconds into human-readable time string"""
     if seconds <= 0:
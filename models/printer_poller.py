@@ -0,0 +1,136 @@
+"""
+Printer Status Poller
+Refreshes live printer status in the background so page views never wait on printer HTTP calls
+"""
+
+import time
+import logging
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from .mongodb import db
+from .printer_api_service import PrinterStatus, printer_fleet
+from .printer_telemetry import record_telemetry
+from .print_transfer import resume_transfers
+
+logger = logging.getLogger(__name__)
+
+# Fields the poller needs from a printer document
+POLL_FIELDS = {'printer_type': 1, 'ip_address': 1, 'api_key': 1, 'live_status.status': 1}
+
+
+class PrinterPoller:
+    """
+    Polls every configured printer on its own cadence.
+
+    Online printers are polled every `interval` seconds. Each failed poll doubles
+    the delay for that printer, up to `max_backoff`, so offline devices stop
+    costing a timeout every cycle. The latest snapshot is written to the printer
+    document as `live_status` / `live_status_at`, and every sample is appended
+    to the telemetry history.
+    """
+
+    def __init__(self, interval: int = None, max_backoff: int = None):
+        self.interval = interval or settings.PRINTER_POLL_INTERVAL
+        self.max_backoff = max_backoff or settings.PRINTER_POLL_MAX_BACKOFF
+        # printer_id -> {'next_poll': monotonic time, 'failures': int}
+        self._schedule: Dict[str, Dict] = {}
+
+    def _due_printers(self, now: float):
+        """Configured printers whose next poll time has passed"""
+        printers = db.printers.find(
+            {'ip_address': {'$nin': ['', None]}, 'api_key': {'$nin': ['', None]}},
+            POLL_FIELDS
+        )
+        due = []
+        seen = set()
+        for printer in printers:
+            printer_id = str(printer['_id'])
+            seen.add(printer_id)
+            entry = self._schedule.get(printer_id)
+            if entry is None or entry['next_poll'] <= now:
+                due.append(printer)
+
+        # Forget printers that were deleted or unconfigured
+        for printer_id in set(self._schedule) - seen:
+            del self._schedule[printer_id]
+        return due
+
+    def _record(self, printer: dict, status: PrinterStatus, now: float):
+        """Store the snapshot and schedule the next poll"""
+        printer_id = str(printer['_id'])
+        entry = self._schedule.setdefault(printer_id, {'failures': 0})
+
+        if status.online:
+            entry['failures'] = 0
+            delay = self.interval
+        else:
+            entry['failures'] += 1
+            delay = min(self.interval * (2 ** entry['failures']), self.max_backoff)
+        entry['next_poll'] = now + delay
+
+        # Trusted until a little after the next scheduled poll
+        taken_at = datetime.utcnow()
+        db.printers.update_one(
+            {'_id': printer['_id']},
+            {'$set': {
+                'live_status': asdict(status),
+                'live_status_at': taken_at,
+                'live_status_expires_at': taken_at + timedelta(seconds=delay + settings.PRINTER_STATUS_GRACE)
+            }}
+        )
+        
+        # A finished print frees the printer for the next queued job
+        previous_state = (printer.get('live_status') or {}).get('status')
+        if status.online and status.status == 'idle' and previous_state in ('printing', 'paused'):
+            from .print_scheduler import complete_printing_jobs
+            complete_printing_jobs(printer['_id'])
+        
+        try:
+            record_telemetry(printer['_id'], status, taken_at)
+        except Exception as e:
+            logger.error(f"Failed to record telemetry for printer {printer_id}: {e}")
+
+    def poll_once(self) -> int:
+        """Poll all printers that are due. Returns the number polled."""
+        printers = self._due_printers(time.monotonic())
+        statuses = printer_fleet.get_statuses(printers)
+        now = time.monotonic()
+        for printer in printers:
+            self._record(printer, statuses[str(printer['_id'])], now)
+        
+        # Every cycle, even when no printer was due: queued jobs can go to a
+        # printer idle since its last poll, and transfer retries and stalls come
+        # due on their own clock
+        # (imported here: the scheduler reads snapshots through this module)
+        from .print_scheduler import dispatch_pending
+        dispatch_pending()
+        resume_transfers()
+        return len(printers)
+
+    def run_forever(self, tick: float = 1.0):
+        """Poll until interrupted, checking for due printers every `tick` seconds"""
+        while True:
+            try:
+                self.poll_once()
+            except Exception as e:
+                # Keep the poller alive through transient MongoDB errors
+                logger.error(f"Printer poll cycle failed: {e}")
+            time.sleep(tick)
+
+
+def get_live_status(printer: dict) -> Optional[dict]:
+    """
+    Return the printer's latest polled status if it is still trusted.
+
+    A snapshot expires shortly after the poll that should have replaced it, so
+    if the poller stops the caller falls back to querying the printer.
+    """
+    snapshot = printer.get('live_status')
+    expires_at = printer.get('live_status_expires_at')
+    if not snapshot or not expires_at or expires_at < datetime.utcnow():
+        return None
+    return snapshot
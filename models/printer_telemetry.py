@@ -0,0 +1,134 @@
+"""
+Printer Telemetry
+Time-series history of printer status with automatic downsampling
+
+Every poll writes one raw sample to a MongoDB time-series collection and folds
+the same values into 1 minute and 15 minute buckets (count/sum/min/max per
+field). Charts read whichever resolution covers the requested range, so long
+ranges never scan raw samples. All three collections expire old data via TTL.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from .mongodb import db
+from .printer_api_service import PrinterStatus
+
+logger = logging.getLogger(__name__)
+
+# Numeric PrinterStatus fields that are charted
+TELEMETRY_FIELDS = ('nozzle_temp', 'nozzle_target', 'bed_temp', 'bed_target', 'progress')
+
+EPOCH = datetime(1970, 1, 1)
+
+# Rollup resolution -> bucket size in seconds
+ROLLUP_SECONDS = {
+    '1m': 60,
+    '15m': 900,
+}
+
+# Longest range (hours) each resolution is used for; beyond that, the next one
+RESOLUTION_MAX_HOURS = (
+    ('raw', 2),
+    ('1m', 48),
+)
+
+
+def telemetry_collection(resolution: str):
+    """Collection holding samples for a resolution ('raw', '1m' or '15m')"""
+    if resolution == 'raw':
+        return db.printer_telemetry
+    return getattr(db, f'printer_telemetry_{resolution}')
+
+
+def record_telemetry(printer_id, status: PrinterStatus, at: datetime = None):
+    """Store one status sample and update its 1 minute and 15 minute buckets"""
+    at = at or datetime.utcnow()
+
+    sample = {'ts': at, 'printer_id': printer_id, 'state': status.status, 'online': status.online}
+    if status.online:
+        sample.update({field: float(getattr(status, field) or 0) for field in TELEMETRY_FIELDS})
+    db.printer_telemetry.insert_one(sample)
+
+    # Offline samples carry no readings, so buckets only aggregate online ones
+    if not status.online:
+        return
+
+    for resolution, seconds in ROLLUP_SECONDS.items():
+        elapsed = int((at - EPOCH).total_seconds())
+        bucket_start = EPOCH + timedelta(seconds=elapsed - elapsed % seconds)
+        update = {
+            '$inc': {'count': 1},
+            '$min': {},
+            '$max': {},
+            '$set': {'state': status.status},
+        }
+        for field in TELEMETRY_FIELDS:
+            value = sample[field]
+            update['$inc'][f'sum.{field}'] = value
+            update['$min'][f'min.{field}'] = value
+            update['$max'][f'max.{field}'] = value
+        telemetry_collection(resolution).update_one(
+            {'printer_id': printer_id, 'ts': bucket_start},
+            update,
+            upsert=True
+        )
+
+
+def printing_minutes(printer_id, since: datetime, until: datetime = None) -> int:
+    """
+    Minutes the printer reported 'printing' between since and until
+
+    Counts 1 minute buckets, so pauses and offline gaps are left out. Polls
+    are well under a minute apart, so every printing minute has a bucket.
+    """
+    until = until or datetime.utcnow()
+    return db.printer_telemetry_1m.count_documents({
+        'printer_id': printer_id,
+        'ts': {'$gte': since, '$lt': until},
+        'state': 'printing',
+    })
+
+
+def pick_resolution(hours: float) -> str:
+    """Coarsest-enough resolution for a chart covering `hours`"""
+    for resolution, max_hours in RESOLUTION_MAX_HOURS:
+        if hours <= max_hours:
+            return resolution
+    return '15m'
+
+
+def get_telemetry_series(printer_id, hours: float) -> Dict:
+    """
+    Chart points for the last `hours` of a printer's telemetry
+
+    Returns:
+        {'resolution': str, 'points': [{'ts', 'state', <field>...}, ...]}
+    """
+    resolution = pick_resolution(hours)
+    since = datetime.utcnow() - timedelta(hours=hours)
+    match = {'printer_id': printer_id, 'ts': {'$gte': since}}
+
+    if resolution == 'raw':
+        projection = {'_id': 0, 'ts': 1, 'state': 1, **{field: 1 for field in TELEMETRY_FIELDS}}
+        points: List[Dict] = list(
+            db.printer_telemetry.find({**match, 'online': True}, projection).sort('ts', 1)
+        )
+    else:
+        # Averages are computed server-side from the pre-aggregated buckets
+        points = list(telemetry_collection(resolution).aggregate([
+            {'$match': match},
+            {'$sort': {'ts': 1}},
+            {'$project': {
+                '_id': 0,
+                'ts': 1,
+                'state': 1,
+                **{field: {'$round': [{'$divide': [f'$sum.{field}', '$count']}, 1]}
+                   for field in TELEMETRY_FIELDS},
+                'nozzle_temp_max': '$max.nozzle_temp',
+                'bed_temp_max': '$max.bed_temp',
+            }},
+        ]))
+
+    return {'resolution': resolution, 'points': points}
@@ -12,10 +12,16 @@ from django.views.decorators.csrf import csrf_exempt
 from bson import ObjectId
 import json
 import logging
+from dataclasses import asdict
 from datetime import datetime
 
 from .mongodb import db, to_object_id, doc_to_dict
-from .printer_api_service import PrinterAPIFactory, PrusaLinkAPI, SnapmakerAPI, format_time
+from .printer_api_service import (
+    PrusaLinkAPI, SnapmakerAPI, format_time, printer_clients, printer_fleet,
+    invalidate_printer_clients
+)
+from .printer_poller import get_live_status
+from .printer_telemetry import get_telemetry_series
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +36,11 @@ def serialize_printer(printer: dict) -> dict:
     printer['id'] = str(printer['_id'])
     del printer['_id']
     
+    # Poller snapshots are applied separately (see apply_live_status)
+    printer.pop('live_status', None)
+    printer.pop('live_status_at', None)
+    printer.pop('live_status_expires_at', None)
+    
     # Add display values
     printer['printer_type_display'] = {
         'prusa': 'Prusa (3D Print)',
@@ -53,6 +64,32 @@ def serialize_printer(printer: dict) -> dict:
     return printer
 
 
+def apply_live_status(printer: dict, status: dict) -> dict:
+    """Overlay a live status snapshot (PrinterStatus fields) onto a serialized printer"""
+    if not status or not status.get('online'):
+        return printer
+    
+    for field in ('status', 'nozzle_temp', 'nozzle_target', 'bed_temp', 'bed_target',
+                  'progress', 'time_remaining', 'time_elapsed', 'current_file', 'job_id'):
+        printer[field] = status.get(field)
+    
+    # Update display values
+    printer['status_display'] = {
+        'idle': 'Idle',
+        'printing': 'Printing',
+        'paused': 'Paused',
+        'offline': 'Offline',
+        'error': 'Error'
+    }.get(status.get('status'), 'Unknown')
+    
+    if status.get('time_remaining'):
+        printer['time_remaining_display'] = format_time(status['time_remaining'])
+    if status.get('time_elapsed'):
+        printer['time_elapsed_display'] = format_time(status['time_elapsed'])
+    
+    return printer
+
+
 # ==================== Page Views ====================
 
 @login_required
@@ -103,17 +140,21 @@ def save_printer(request, printer_id=None):
         'build_volume_x': int(request.POST.get('build_volume_x', 0)),
         'build_volume_y': int(request.POST.get('build_volume_y', 0)),
         'build_volume_z': int(request.POST.get('build_volume_z', 0)),
+        'materials': [m.strip().upper() for m in request.POST.get('materials', '').split(',') if m.strip()],
         'status': request.POST.get('status', 'offline'),
         'current_mode': request.POST.get('current_mode', '3d_print'),
         'updated_at': datetime.utcnow()
     }
     
     if printer_id:
-        # Update existing
-        collection.update_one(
+        # Update existing; drop clients built from the old connection details
+        previous = collection.find_one_and_update(
             {'_id': ObjectId(printer_id), 'user_id': str(request.user.id)},
-            {'$set': printer_data}
+            {'$set': printer_data},
+            projection={'ip_address': 1}
         )
+        if previous:
+            invalidate_printer_clients(previous.get('ip_address'))
     else:
         # Create new
         printer_data['created_at'] = datetime.utcnow()
@@ -127,51 +168,24 @@ def save_printer(request, printer_id=None):
 @login_required
 @require_http_methods(["GET"])
 def api_get_printers(request):
-    """Get all printers for the current user with live status"""
+    """Get all printers for the current user with their latest polled status"""
     collection = get_printers_collection()
     printers = list(collection.find({'user_id': str(request.user.id)}))
     
-    # Update status from real printers
+    # Live status comes from the background poller. Printers without a fresh
+    # snapshot (poller not running yet) are queried together under one deadline.
+    live_statuses = {str(printer['_id']): get_live_status(printer) for printer in printers}
+    stale = [
+        printer for printer in printers
+        if live_statuses[str(printer['_id'])] is None
+        and printer.get('ip_address') and printer.get('api_key')
+    ]
+    for printer_id, status in printer_fleet.get_statuses(stale).items():
+        live_statuses[printer_id] = asdict(status)
+    
     for printer in printers:
-        printer = serialize_printer(printer)
-        
-        # Try to get live status if IP is configured
-        if printer.get('ip_address') and printer.get('api_key'):
-            try:
-                api = PrinterAPIFactory.create(
-                    printer['printer_type'],
-                    printer['ip_address'],
-                    printer['api_key']
-                )
-                status = api.get_status()
-                
-                if status.online:
-                    printer['status'] = status.status
-                    printer['nozzle_temp'] = status.nozzle_temp
-                    printer['nozzle_target'] = status.nozzle_target
-                    printer['bed_temp'] = status.bed_temp
-                    printer['bed_target'] = status.bed_target
-                    printer['progress'] = status.progress
-                    printer['time_remaining'] = status.time_remaining
-                    printer['time_elapsed'] = status.time_elapsed
-                    printer['current_file'] = status.current_file
-                    printer['job_id'] = status.job_id
-                    
-                    # Update display values
-                    printer['status_display'] = {
-                        'idle': 'Idle',
-                        'printing': 'Printing',
-                        'paused': 'Paused',
-                        'offline': 'Offline',
-                        'error': 'Error'
-                    }.get(status.status, 'Unknown')
-                    
-                    if status.time_remaining:
-                        printer['time_remaining_display'] = format_time(status.time_remaining)
-                    if status.time_elapsed:
-                        printer['time_elapsed_display'] = format_time(status.time_elapsed)
-            except Exception as e:
-                logger.error(f"Error getting printer status: {e}")
+        live_status = live_statuses[str(printer['_id'])]
+        apply_live_status(serialize_printer(printer), live_status)
     
     # Return HTML partial for HTMX or JSON for API
     if 'HX-Request' in request.headers:
@@ -192,12 +206,13 @@ def api_printer_detail(request, printer_id):
     collection = get_printers_collection()
     
     if request.method == 'DELETE':
-        result = collection.delete_one({
-            '_id': ObjectId(printer_id),
-            'user_id': str(request.user.id)
-        })
+        deleted = collection.find_one_and_delete(
+            {'_id': ObjectId(printer_id), 'user_id': str(request.user.id)},
+            projection={'ip_address': 1}
+        )
         
-        if result.deleted_count:
+        if deleted:
+            invalidate_printer_clients(deleted.get('ip_address'))
             return JsonResponse({'success': True})
         else:
             return JsonResponse({'success': False, 'error': 'Printer not found'}, status=404)
@@ -215,27 +230,7 @@ def api_printer_detail(request, printer_id):
     
     # Get live status
     if printer.get('ip_address') and printer.get('api_key'):
-        try:
-            api = PrinterAPIFactory.create(
-                printer['printer_type'],
-                printer['ip_address'],
-                printer['api_key']
-            )
-            status = api.get_status()
-            
-            if status.online:
-                printer['status'] = status.status
-                printer['nozzle_temp'] = status.nozzle_temp
-                printer['nozzle_target'] = status.nozzle_target
-                printer['bed_temp'] = status.bed_temp
-                printer['bed_target'] = status.bed_target
-                printer['progress'] = status.progress
-                printer['time_remaining'] = status.time_remaining
-                printer['time_elapsed'] = status.time_elapsed
-                printer['current_file'] = status.current_file
-                printer['job_id'] = status.job_id
-        except Exception as e:
-            logger.error(f"Error getting printer status: {e}")
+        apply_live_status(printer, asdict(printer_fleet.get_status(printer)))
     
     return JsonResponse({
         'success': True,
@@ -267,13 +262,14 @@ def api_upload_file(request, printer_id):
     print_after_upload = request.POST.get('print_after_upload') == 'true'
     
     try:
-        api = PrinterAPIFactory.create(
+        api = printer_clients.get(
             printer['printer_type'],
             printer['ip_address'],
             printer['api_key']
         )
         
-        file_data = uploaded_file.read()
+        # Stream the upload (Django spools large files to disk) instead of reading it all
+        file_data = uploaded_file
         filename = uploaded_file.name
         
         if isinstance(api, PrusaLinkAPI):
@@ -342,7 +338,7 @@ def control_print(request, printer_id, action):
         return JsonResponse({'success': False, 'error': 'Printer not configured for remote access'}, status=400)
     
     try:
-        api = PrinterAPIFactory.create(
+        api = printer_clients.get(
             printer['printer_type'],
             printer['ip_address'],
             printer['api_key']
@@ -388,6 +384,37 @@ def control_print(request, printer_id, action):
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
+@login_required
+@require_http_methods(["GET"])
+def api_printer_telemetry(request, printer_id):
+    """
+    Temperature/progress history for charts
+    
+    GET /api/printers/<printer_id>/telemetry/?hours=6
+    Short ranges return raw samples; longer ranges read 1 min or 15 min buckets.
+    """
+    printer = get_printers_collection().find_one(
+        {'_id': ObjectId(printer_id), 'user_id': str(request.user.id)},
+        {'_id': 1}
+    )
+    
+    if not printer:
+        return JsonResponse({'success': False, 'error': 'Printer not found'}, status=404)
+    
+    try:
+        hours = float(request.GET.get('hours', 6))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid hours'}, status=400)
+    hours = min(max(hours, 0.1), 24 * 365)
+    
+    series = get_telemetry_series(printer['_id'], hours)
+    return JsonResponse({
+        'success': True,
+        'hours': hours,
+        **series
+    })
+
+
 @login_required
 @require_http_methods(["POST"])
 def api_set_mode(request, printer_id):
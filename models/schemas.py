@@ -58,6 +58,9 @@ class PrinterSchema:
             'build_volume_z': build_volume_z,
             'status': kwargs.get('status', 'idle'),  # idle, printing, offline, error
             'current_mode': kwargs.get('current_mode'),  # For Snapmaker: 3d_print, cnc, laser
+            'materials': kwargs.get('materials', []),  # Loaded/supported materials; empty = any
+            'reserved_job': None,  # Job being sent to / printed on it (see print_scheduler.reserve_printer)
+            'reserved_at': None,
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow(),
             'last_online': None,
@@ -90,13 +93,30 @@ class PrintJobSchema:
             'user_id': str(user_id),  # Store as string for MongoDB users
             'model_id': ObjectId(model_id) if isinstance(model_id, str) else model_id,
             'printer_id': ObjectId(printer_id) if isinstance(printer_id, str) else printer_id,
-            'status': kwargs.get('status', 'queued'),  # queued, printing, completed, failed, cancelled
+            'status': kwargs.get('status', 'queued'),  # queued, uploading, printing, completed, failed, cancelled
             'notes': kwargs.get('notes'),
+            
+            # File transfer to the printer (see models/print_transfer.py)
+            'file_path': kwargs.get('file_path'),  # Local file sent to the printer
+            'filename': kwargs.get('filename'),  # Name on the printer
+            'transfer_state': kwargs.get('transfer_state'),  # pending, slicing, sending, retrying, done, failed
+            'gcode_path': None,  # Sliced G-code actually uploaded (see services/slicer.py)
+            'transfer_attempts': 0,
+            'transfer_error': None,
+            'bytes_sent': 0,
+            'total_bytes': kwargs.get('total_bytes'),
+            'next_attempt_at': kwargs.get('next_attempt_at'),
+            'transfer_heartbeat_at': None,
+            'transfer_token': None,  # Owner of the running attempt
+            
             'material': kwargs.get('material'),  # PLA, ABS, PETG, etc.
+            'dimensions': kwargs.get('dimensions'),  # {x, y, z} in mm, for printer matching
             'layer_height': kwargs.get('layer_height'),  # mm
             'infill_percentage': kwargs.get('infill_percentage'),  # 0-100
             'estimated_duration': kwargs.get('estimated_duration'),  # minutes
+            'estimate': kwargs.get('estimate'),  # print_estimator.PrintEstimate dict
             'actual_duration': None,
+            'printed_minutes': None,  # Minutes telemetry reported 'printing'
             'created_at': datetime.utcnow(),
             'started_at': None,
             'completed_at': None,
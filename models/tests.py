@@ -1,3 +1,154 @@
-from django.test import TestCase
+import tempfile
+from datetime import datetime
+from pathlib import Path
 
-# Create your tests here.
+import numpy as np
+from bson import ObjectId
+from django.test import SimpleTestCase
+
+from models.mongodb import InvalidCursor, find_page
+from services.plate_packer import pack_stl_files, plate_triangles
+from services.print_orientation import apply_orientation, optimize_orientation
+from services.stl_mesh import analyze_mesh, count_open_edges, read_stl, write_stl
+
+
+def box_triangles(x, y, z):
+    """Closed, outward-facing box mesh with one corner at the origin"""
+    corners = np.array([[i * x, j * y, k * z] for i in (0, 1) for j in (0, 1) for k in (0, 1)], dtype=np.float64)
+    faces = [
+        (0, 3, 2), (0, 1, 3),  # x = 0
+        (4, 7, 5), (4, 6, 7),  # x = x
+        (0, 5, 1), (0, 4, 5),  # y = 0
+        (2, 7, 6), (2, 3, 7),  # y = y
+        (0, 6, 4), (0, 2, 6),  # z = 0
+        (1, 7, 3), (1, 5, 7),  # z = z
+    ]
+    return corners[np.array(faces)]
+
+
+class StlMeshTests(SimpleTestCase):
+    def test_box_volume_and_area(self):
+        analysis = analyze_mesh(box_triangles(10, 20, 30))
+        self.assertEqual(analysis.triangle_count, 12)
+        self.assertAlmostEqual(analysis.volume, 6000.0)
+        self.assertAlmostEqual(analysis.surface_area, 2 * (10 * 20 + 10 * 30 + 20 * 30))
+        self.assertEqual(analysis.dimensions, {'x': 10.0, 'y': 20.0, 'z': 30.0})
+        self.assertTrue(analysis.watertight)
+
+    def test_open_edges(self):
+        triangles = box_triangles(10, 10, 10)
+        self.assertEqual(count_open_edges(triangles), 0)
+        # Dropping one triangle opens its three edges
+        self.assertEqual(count_open_edges(triangles[1:]), 3)
+        # Dropping a whole square face leaves its four outer edges open
+        self.assertEqual(count_open_edges(triangles[2:]), 4)
+
+    def test_negative_zero_matches_zero(self):
+        triangles = box_triangles(10, 10, 10)
+        triangles[0][triangles[0] == 0] = -0.0
+        self.assertEqual(count_open_edges(triangles), 0)
+
+
+class PlatePackerTests(SimpleTestCase):
+    def pack(self, parts, plate_x=100, plate_y=100):
+        with tempfile.TemporaryDirectory() as tmp:
+            files = {}
+            for key, triangles in parts.items():
+                files[key] = Path(tmp) / f'{key}.stl'
+                write_stl(files[key], triangles)
+            return pack_stl_files(files, plate_x, plate_y)
+
+    def test_oversize_part_rejected(self):
+        layout = self.pack({'small': box_triangles(10, 10, 10), 'huge': box_triangles(150, 20, 10)})
+        self.assertEqual(layout.oversized, ['huge'])
+        self.assertEqual(len(layout.plates), 1)
+        self.assertEqual(layout.plates[0].keys, ['small'])
+
+    def test_plate_is_centred(self):
+        layout = self.pack({'part': box_triangles(20, 10, 5)})
+        vertices = plate_triangles(layout.plates[0], 100, 100).reshape(-1, 3)
+        low, high = vertices.min(axis=0), vertices.max(axis=0)
+        np.testing.assert_allclose((low[:2] + high[:2]) / 2, [50, 50], atol=1e-6)
+        self.assertAlmostEqual(low[2], 0.0)
+
+
+class PrintOrientationTests(SimpleTestCase):
+    def test_tall_box_laid_flat(self):
+        # Standing on its small end; lying on a large face is lower with more bed contact
+        triangles = box_triangles(10, 20, 50)
+        orientation = optimize_orientation(triangles)
+        self.assertAlmostEqual(orientation.height, 10.0, places=3)
+        self.assertAlmostEqual(orientation.contact_area, 1000.0, places=1)
+        self.assertLess(orientation.score, orientation.original_score)
+
+        oriented = apply_orientation(triangles, orientation.rotation)
+        on_bed = np.all(np.abs(oriented[:, :, 2]) < 1e-6, axis=1)
+        self.assertEqual(int(on_bed.sum()), 2)
+
+    def test_written_mesh_keeps_orientation(self):
+        triangles = box_triangles(10, 20, 50)
+        orientation = optimize_orientation(triangles)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'oriented.stl'
+            write_stl(path, apply_orientation(triangles, orientation.rotation))
+            self.assertAlmostEqual(float(np.ptp(read_stl(path)[:, :, 2])), 10.0, places=3)
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        for key, direction in reversed(keys):
+            self.docs.sort(key=lambda doc: doc[key], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        return self.docs[:count]
+
+
+class FakeCollection:
+    """The subset of find() that find_page uses: equality, $lt, $and and $or"""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def matches(self, doc, query):
+        for key, condition in query.items():
+            if key == '$and':
+                if not all(self.matches(doc, part) for part in condition):
+                    return False
+            elif key == '$or':
+                if not any(self.matches(doc, part) for part in condition):
+                    return False
+            elif isinstance(condition, dict):
+                if not doc[key] < condition['$lt']:
+                    return False
+            elif doc.get(key) != condition:
+                return False
+        return True
+
+    def find(self, query, projection=None):
+        return FakeCursor([doc for doc in self.docs if self.matches(doc, query)])
+
+
+class FindPageTests(SimpleTestCase):
+    def test_pages_through_tied_created_at(self):
+        tied = datetime(2025, 1, 1, 12, 0, 0)
+        docs = [{'_id': ObjectId(), 'created_at': tied} for _ in range(5)]
+        docs.append({'_id': ObjectId(), 'created_at': datetime(2025, 1, 2)})
+        collection = FakeCollection(docs)
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = find_page(collection, {}, cursor=cursor, limit=2)
+            seen += [doc['_id'] for doc in page]
+            if cursor is None:
+                break
+
+        expected = [docs[-1]['_id']] + sorted((doc['_id'] for doc in docs[:5]), reverse=True)
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            find_page(FakeCollection([]), {}, cursor='not-a-cursor')
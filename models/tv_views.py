@@ -387,7 +387,7 @@ def _sync_lights_with_tv(tv: dict, power_state: str):
         tv: TV document from database
         power_state: 'on' or 'off'
     """
-    from .ledvance_controller import LedvanceLight
+    from .ledvance_views import light_manager, light_fleet
     
     linked_lights = tv.get('linked_lights', [])
     print(f"Syncing {len(linked_lights)} lights with TV state: {power_state}")
@@ -402,20 +402,14 @@ def _sync_lights_with_tv(tv: dict, power_state: str):
             
             if light:
                 print(f"Found light: {light.get('name')} at {light.get('ip')}")
-                # Create controller and turn on/off
-                controller = LedvanceLight(
-                    dev_id=light['dev_id'],
-                    ip=light['ip'],
-                    local_key=light['local_key'],
-                    name=light.get('name', light['dev_id']),
-                    version=light.get('version', 3.3)
-                )
+                # Registered controller; the fleet sends the command
+                controller = light_manager.sync_light(light)
                 
                 if power_state == 'on':
-                    result = controller.turn_on()
+                    result = light_fleet.run([controller], 'turn_on')[controller.dev_id]
                     print(f"Turn on {light.get('name')}: {result}")
                 else:
-                    result = controller.turn_off()
+                    result = light_fleet.run([controller], 'turn_off')[controller.dev_id]
                     print(f"Turn off {light.get('name')}: {result}")
             else:
                 print(f"Light not found: {light_id}")
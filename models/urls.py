@@ -48,12 +48,14 @@ urlpatterns = [
     path('api/printers/<str:printer_id>/resume/', printer_views.api_resume_print, name='api-printer-resume'),
     path('api/printers/<str:printer_id>/cancel/', printer_views.api_cancel_print, name='api-printer-cancel'),
     path('api/printers/<str:printer_id>/mode/', printer_views.api_set_mode, name='api-printer-mode'),
+    path('api/printers/<str:printer_id>/telemetry/', printer_views.api_printer_telemetry, name='api-printer-telemetry'),
     
     # Design workflow (3-stage) - Main CAD generation interface
     path('design/projects/', design_views.design_projects, name='design-projects'),
     path('design/projects/<str:project_id>/', design_views.design_project_detail, name='design-project-detail'),
     
     # Design workflow API endpoints
+    path('api/design/projects/', design_views.api_design_projects_page, name='api-design-projects-page'),
     path('api/design/create-project/', design_views.api_create_design_project, name='api-create-design-project'),
     path('api/design/refine-concept/<str:project_id>/', design_views.api_refine_concept, name='api-refine-concept'),
     path('api/design/approve-concept/<str:project_id>/', design_views.api_approve_concept, name='api-approve-concept'),
@@ -67,6 +69,11 @@ urlpatterns = [
     
     # Print job endpoints
     path('api/design/send-to-printer/<str:project_id>/<int:part_number>/', print_job_views.api_send_to_printer, name='api-send-to-printer'),
+    path('api/design/estimate/<str:project_id>/<int:part_number>/', print_job_views.api_estimate_part, name='api-estimate-part'),
+    path('api/design/orient-parts/<str:project_id>/', print_job_views.api_orient_parts, name='api-orient-parts'),
+    path('api/design/send-plate-to-printer/<str:project_id>/', print_job_views.api_send_plate_to_printer, name='api-send-plate-to-printer'),
+    path('api/print-jobs/<str:job_id>/status/', print_job_views.api_print_job_status, name='api-print-job-status'),
+    path('api/print-queue/', print_job_views.api_print_queue, name='api-print-queue'),
     path('api/printers/<str:printer_id>/status/', print_job_views.api_get_printer_status, name='api-printer-status'),
     
     # Ledvance Smart Lights API endpoints
@@ -15,7 +15,7 @@ def session_login_required(view_func):
     """
     @wraps(view_func)
     def wrapper(request, *args, **kwargs):
-        if 'user' not in request.session:
+        if SESSION_USER_KEY not in request.session:
             return redirect('/login/')
         return view_func(request, *args, **kwargs)
     return wrapper
@@ -24,15 +24,21 @@ from django.views.decorators.http import require_http_methods
 from django.template.loader import render_to_string
 from bson import ObjectId
 from datetime import datetime
+from urllib.parse import urlencode
 import logging
 import requests
 
-from models.mongodb import db, to_object_id, doc_to_dict, docs_to_list
+from models.mongodb import (
+    db, to_object_id, doc_to_dict, docs_to_list, find_page, cached_count,
+    invalidate_model_counts, models_count_key, InvalidCursor, MODEL_CARD_FIELDS,
+    MODEL_COUNT_STATUSES
+)
 from models.schemas import (
     Model3DSchema, PrinterSchema, PrintJobSchema, GenerationJobSchema,
     get_display_name, PRINTER_TYPE_DISPLAY, PRINTER_STATUS_DISPLAY,
     SNAPMAKER_MODE_DISPLAY, MODEL_STATUS_DISPLAY
 )
+from models.middleware import SESSION_USER_KEY, session_payload
 from services.meshy_client import MeshyClient
 from services.prompt_refinement import refine_prompt_with_llm
 from services.notifications import notify_owner
@@ -166,6 +172,7 @@ def api_generate(request):
                 # Insert into MongoDB
                 result = db.models.insert_one(model_doc)
                 model_id = result.inserted_id
+                invalidate_model_counts(str(request.user.id))
                 
                 # Start Meshy.ai generation with Meshy-6
                 result = meshy_client.create_text_to_3d_task(
@@ -252,19 +259,31 @@ def api_refine_prompt(request):
 def api_models_list(request):
     """
     HTMX endpoint to list user's 3D models.
-    Returns HTML grid of model cards.
+    Returns HTML grid of model cards, one page at a time.
+    
+    Without a cursor the full grid (with total count) is returned; with a
+    cursor only the next page of cards is returned, replacing the
+    infinite-scroll trigger at the end of the grid.
     """
+    user_id = str(request.user.id)
     filter_status = request.GET.get('status', 'all')
+    page_cursor = request.GET.get('cursor')
+    # Only statuses with a counter that invalidate_model_counts clears
+    if filter_status not in MODEL_COUNT_STATUSES:
+        return HttpResponse('Invalid status filter', status=400)
     
     # Build query
-    query = {'user_id': str(request.user.id)}
+    query = {'user_id': user_id}
     if filter_status != 'all':
         query['status'] = filter_status
     
     # Fetch models
-    models = list(db.models.find(query).sort('created_at', -1))
+    try:
+        models, next_cursor = find_page(db.models, query, MODEL_CARD_FIELDS, cursor=page_cursor)
+    except InvalidCursor:
+        return HttpResponse('Invalid page cursor', status=400)
     
-    if not models:
+    if not models and not page_cursor:
         return HttpResponse('''
             <div class="text-center py-12">
                 <svg class="w-24 h-24 mx-auto text-gray-300 mb-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
@@ -279,15 +298,29 @@ def api_models_list(request):
         ''')
     
     # Render model cards
-    html = '<div class="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">'
+    html = ''
     for model in models:
         model = doc_to_dict(model)
         # Add display names
         model['status_display'] = get_display_name(model['status'], MODEL_STATUS_DISPLAY)
         html += render_to_string('partials/model_card.html', {'model': model})
-    html += '</div>'
     
-    return HttpResponse(html)
+    # Infinite-scroll trigger for the next page
+    if next_cursor:
+        next_url = f"{request.path}?{urlencode({'status': filter_status, 'cursor': next_cursor})}"
+        html += (
+            f'<div hx-get="{next_url}" hx-trigger="revealed" hx-swap="outerHTML" '
+            f'class="col-span-full text-center py-4 text-gray-500">Loading more models...</div>'
+        )
+    
+    if page_cursor:
+        return HttpResponse(html)
+    
+    total = cached_count(models_count_key(user_id, filter_status), db.models, query)
+    return HttpResponse(
+        f'<p class="text-sm text-gray-500 mb-4">{total} model(s)</p>'
+        f'<div class="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">{html}</div>'
+    )
 
 
 @session_login_required
@@ -297,7 +330,10 @@ def api_model_status(request, model_id):
     HTMX endpoint to check model generation status.
     Returns updated model card HTML.
     """
-    model = db.models.find_one({'_id': to_object_id(model_id), 'user_id': str(request.user.id)})
+    model = db.models.find_one(
+        {'_id': to_object_id(model_id), 'user_id': str(request.user.id)},
+        MODEL_CARD_FIELDS
+    )
     
     if not model:
         return HttpResponse('Model not found', status=404)
@@ -305,7 +341,7 @@ def api_model_status(request, model_id):
     # Check if still processing
     if model['status'] == 'processing':
         # Check Meshy.ai status
-        job = db.generation_jobs.find_one({'model_id': model['_id']})
+        job = db.generation_jobs.find_one({'model_id': model['_id']}, {'meshy_task_id': 1})
         if job:
             try:
                 meshy_client = MeshyClient()
@@ -336,7 +372,8 @@ def api_model_status(request, model_id):
                             'completed_at': datetime.utcnow()
                         })
                     )
-                    model = db.models.find_one({'_id': model['_id']})
+                    invalidate_model_counts(str(request.user.id))
+                    model = db.models.find_one({'_id': model['_id']}, MODEL_CARD_FIELDS)
                 
                 elif status_data.get('status') == 'FAILED':
                     db.models.update_one(
@@ -346,7 +383,8 @@ def api_model_status(request, model_id):
                             'error_message': status_data.get('error', 'Generation failed')
                         })
                     )
-                    model = db.models.find_one({'_id': model['_id']})
+                    invalidate_model_counts(str(request.user.id))
+                    model = db.models.find_one({'_id': model['_id']}, MODEL_CARD_FIELDS)
             
             except Exception as e:
                 logger.error(f"Failed to check status: {e}")
@@ -368,6 +406,8 @@ def api_model_delete(request, model_id):
     if result.deleted_count == 0:
         return HttpResponse('Model not found', status=404)
     
+    invalidate_model_counts(str(request.user.id))
+    
     # Also delete generation job
     db.generation_jobs.delete_one({'model_id': to_object_id(model_id)})
     
@@ -682,19 +722,9 @@ def login_view(request):
     user = db.users.find_one({'username': username})
     
     if user and check_password(password, user['password']):
-        # Login successful - store user data in session
-        user_session_data = {
-            '_id': str(user['_id']),
-            'username': user['username'],
-            'email': user.get('email', ''),
-            'first_name': user.get('first_name', ''),
-            'last_name': user.get('last_name', ''),
-            'is_active': user.get('is_active', True),
-            'is_staff': user.get('is_staff', False),
-            'is_superuser': user.get('is_superuser', False),
-        }
-        
-        request.session['user'] = user_session_data
+        # Login successful - store the user id and claims in session;
+        # the rest of the user document is loaded on demand
+        request.session[SESSION_USER_KEY] = session_payload(user)
         
         # Update last_login
         db.users.update_one(
@@ -718,8 +748,8 @@ def login_view(request):
 def logout_view(request):
     """Custom logout view that works with GET requests."""
     # Clear the session
-    if 'user' in request.session:
-        del request.session['user']
+    if SESSION_USER_KEY in request.session:
+        del request.session[SESSION_USER_KEY]
     
     # Also logout from Django auth system if used
     from django.contrib.auth import logout
@@ -86,6 +86,72 @@ DATABASES = {
 MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
 MONGO_DB_NAME = os.getenv('MONGO_DB_NAME', 'nexaai')
 
+# MongoDB connection pool (per process; each gunicorn worker gets its own pool)
+MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', '50'))
+MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', '0'))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', '300000'))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', '5000'))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', '30000'))
+
+# Printer status poller (python manage.py poll_printers)
+PRINTER_POLL_INTERVAL = int(os.getenv('PRINTER_POLL_INTERVAL', '10'))
+PRINTER_POLL_MAX_BACKOFF = int(os.getenv('PRINTER_POLL_MAX_BACKOFF', '300'))
+# Seconds a snapshot stays trusted after its next poll was due (covers a stopped poller)
+PRINTER_STATUS_GRACE = int(os.getenv('PRINTER_STATUS_GRACE', '30'))
+# Concurrent status fetches (PrinterFleet): worker threads and overall deadline
+PRINTER_FLEET_MAX_WORKERS = int(os.getenv('PRINTER_FLEET_MAX_WORKERS', '16'))
+PRINTER_FLEET_DEADLINE = float(os.getenv('PRINTER_FLEET_DEADLINE', '5'))
+# Ledvance lights (models/ledvance_controller.py): worker threads shared by all status
+# fetches and light/group commands, and the status deadline;
+# lights slower than the deadline are shown with their last known (stale) status
+LEDVANCE_MAX_WORKERS = int(os.getenv('LEDVANCE_MAX_WORKERS', '32'))
+LEDVANCE_STATUS_DEADLINE = float(os.getenv('LEDVANCE_STATUS_DEADLINE', '2'))
+# Light service (manage.py run_light_service) owning the bulb connections; bulbs
+# usually accept one local connection, so with several web workers set this and
+# run one service per host. Unset: each request connects and disconnects itself
+LEDVANCE_SERVICE_ADDRESS = os.getenv('LEDVANCE_SERVICE_ADDRESS', '')
+LEDVANCE_SERVICE_TIMEOUT = float(os.getenv('LEDVANCE_SERVICE_TIMEOUT', '30'))
+# Shared secret the web workers send with every light service request (required by the service)
+LEDVANCE_SERVICE_SECRET = os.getenv('LEDVANCE_SERVICE_SECRET', '')
+# Light service only: background listener keeping light state current from the
+# bulbs' status pushes; heartbeat seconds keep idle bulb connections open
+LEDVANCE_LISTENER = os.getenv('LEDVANCE_LISTENER', 'True') == 'True'
+LEDVANCE_HEARTBEAT = float(os.getenv('LEDVANCE_HEARTBEAT', '10'))
+# Keep-alive connections kept per printer by the shared API clients
+PRINTER_CLIENT_POOL_SIZE = int(os.getenv('PRINTER_CLIENT_POOL_SIZE', '4'))
+# Background printer file transfers (models/print_transfer.py)
+PRINT_TRANSFER_WORKERS = int(os.getenv('PRINT_TRANSFER_WORKERS', '4'))
+PRINT_TRANSFER_MAX_ATTEMPTS = int(os.getenv('PRINT_TRANSFER_MAX_ATTEMPTS', '5'))
+PRINT_TRANSFER_RETRY_BASE = float(os.getenv('PRINT_TRANSFER_RETRY_BASE', '5'))
+PRINT_TRANSFER_RETRY_MAX = float(os.getenv('PRINT_TRANSFER_RETRY_MAX', '300'))
+PRINT_TRANSFER_STALL_SECONDS = int(os.getenv('PRINT_TRANSFER_STALL_SECONDS', '120'))
+# Print queue (models/print_scheduler.py)
+PRINT_QUEUE_DEFAULT_JOB_MINUTES = int(os.getenv('PRINT_QUEUE_DEFAULT_JOB_MINUTES', '60'))
+# Seconds after a print starts during which the printer counts as busy regardless of live status
+PRINT_QUEUE_START_GRACE = int(os.getenv('PRINT_QUEUE_START_GRACE', '300'))
+# STL -> G-code slicing before upload (services/slicer.py): 'prusaslicer', 'stub', or empty (default) to upload STL as-is
+SLICER_BACKEND = os.getenv('SLICER_BACKEND', '')
+SLICER_PATH = os.getenv('SLICER_PATH', 'prusa-slicer')
+SLICER_TIMEOUT = int(os.getenv('SLICER_TIMEOUT', '600'))
+SLICER_WORKERS = int(os.getenv('SLICER_WORKERS', '2'))
+# Slicer config (.ini exported from PrusaSlicer) per printer type
+SLICER_CONFIGS = {
+    'prusa': os.getenv('SLICER_CONFIG_PRUSA') or None,
+    'snapmaker': os.getenv('SLICER_CONFIG_SNAPMAKER') or None,
+}
+# Rotate parts into their best print orientation before upload (services/print_orientation.py)
+PRINT_AUTO_ORIENT = os.getenv('PRINT_AUTO_ORIENT', 'True') == 'True'
+# Gap in mm between parts packed onto one build plate (services/plate_packer.py)
+PRINT_PLATE_SPACING = float(os.getenv('PRINT_PLATE_SPACING', '5'))
+# Completed prints used to calibrate print time estimates (services/print_estimator.py)
+PRINT_ESTIMATE_CALIBRATION_JOBS = int(os.getenv('PRINT_ESTIMATE_CALIBRATION_JOBS', '20'))
+PRINT_ESTIMATE_MIN_SAMPLES = int(os.getenv('PRINT_ESTIMATE_MIN_SAMPLES', '3'))
+# Printer telemetry retention in seconds (raw samples, 1 min and 15 min buckets)
+PRINTER_TELEMETRY_RAW_TTL = int(os.getenv('PRINTER_TELEMETRY_RAW_TTL', str(24 * 3600)))
+PRINTER_TELEMETRY_1M_TTL = int(os.getenv('PRINTER_TELEMETRY_1M_TTL', str(7 * 24 * 3600)))
+PRINTER_TELEMETRY_15M_TTL = int(os.getenv('PRINTER_TELEMETRY_15M_TTL', str(365 * 24 * 3600)))
+
 # Authentication Backends - Not used, we use session-based auth
 # AUTHENTICATION_BACKENDS defaults to ['django.contrib.auth.backends.ModelBackend']
 
@@ -135,6 +201,59 @@ LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/generate/'
 LOGOUT_REDIRECT_URL = '/'
 
+# Caches
+# 'default' holds short-lived per-process data.
+# 'sessions' and 'counts' (list totals and dashboard stats, which the generation
+# worker invalidates too) must be shared by every gunicorn worker and management
+# command, so without Redis they use the file backend. Set REDIS_URL to move all
+# of them onto Redis (needs the `redis` package).
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'nexaai',
+        },
+        'sessions': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'nexaai-session',
+        },
+        'counts': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'nexaai-counts',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'sessions': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('SESSION_CACHE_DIR', str(BASE_DIR / '.session_cache')),
+            'OPTIONS': {'MAX_ENTRIES': int(os.getenv('SESSION_CACHE_MAX_ENTRIES', '1000000'))},
+        },
+        'counts': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('COUNT_CACHE_DIR', str(BASE_DIR / '.count_cache')),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+    }
+
+# Sessions are read from the cache instead of SQLite (no query per request).
+# Redis keeps them until they expire; the file cache culls entries once it is
+# full, so without Redis SQLite stays the store of record (written only when the
+# session changes, e.g. login) and a culled session is reloaded from it instead of
+# logging the user out.
+if REDIS_URL:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
 # Session serializer - use default JSON serializer
 # SESSION_SERIALIZER defaults to 'django.contrib.sessions.serializers.JSONSerializer'
 
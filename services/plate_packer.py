@@ -0,0 +1,236 @@
+"""
+Build Plate Packer
+
+Arranges several STL parts on one printer build plate so they print together.
+
+Each part's footprint is the convex hull of its vertices projected onto the
+plate (XY). The part is turned about Z so the hull's minimum-area bounding
+rectangle lines up with the plate axes, and the rectangles are packed in
+shelves (first-fit decreasing height) with a gap between parts. Parts that do
+not fit on the first plate start another one. The packed meshes are written
+out as one combined STL per plate.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .stl_mesh import read_stl, write_stl
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPACING = 5.0  # mm between parts
+
+
+def convex_hull_2d(points: np.ndarray) -> np.ndarray:
+    """
+    Convex hull of 2D points (quickhull), counter-clockwise.
+
+    Every step partitions all remaining candidate points with one vectorized
+    cross product, so the Python-level work grows with the hull size, not the
+    vertex count.
+    """
+    points = np.unique(np.asarray(points, dtype=np.float64), axis=0)
+    if len(points) < 3:
+        return points
+
+    left = points[np.argmin(points[:, 0])]
+    right = points[np.argmax(points[:, 0])]
+
+    def cross(a, b, candidates):
+        return (b[0] - a[0]) * (candidates[:, 1] - a[1]) - (b[1] - a[1]) * (candidates[:, 0] - a[0])
+
+    def hull_side(a, b, candidates):
+        """Hull vertices strictly left of a->b, in order from a to b"""
+        distances = cross(a, b, candidates)
+        outside = distances > 1e-12
+        if not outside.any():
+            return []
+        candidates, distances = candidates[outside], distances[outside]
+        farthest = candidates[np.argmax(distances)]
+        return hull_side(a, farthest, candidates) + [farthest] + hull_side(farthest, b, candidates)
+
+    # Lower chain (right of left->right) then upper chain, counter-clockwise
+    lower = hull_side(right, left, points)[::-1]
+    upper = hull_side(left, right, points)[::-1]
+    return np.array([left] + lower + [right] + upper)
+
+
+def min_area_rect(hull: np.ndarray) -> Tuple[float, float, float]:
+    """
+    Minimum-area bounding rectangle of a convex hull.
+
+    The optimal rectangle has a side collinear with a hull edge, so every edge
+    direction is tried at once: the hull is rotated by all edge angles in one
+    (edges, vertices, 2) array and the extents compared.
+
+    Returns:
+        (angle, width, depth): rotating by -angle about Z aligns the rectangle
+        with the axes
+    """
+    if len(hull) < 3:
+        width, depth = hull.max(axis=0) - hull.min(axis=0)
+        return 0.0, float(width), float(depth)
+
+    edges = np.roll(hull, -1, axis=0) - hull
+    angles = np.unique(np.mod(np.arctan2(edges[:, 1], edges[:, 0]), np.pi / 2))
+    cos, sin = np.cos(angles), np.sin(angles)
+    # Rotate by -angle: x' = x cos + y sin, y' = -x sin + y cos
+    xs = np.outer(cos, hull[:, 0]) + np.outer(sin, hull[:, 1])
+    ys = np.outer(-sin, hull[:, 0]) + np.outer(cos, hull[:, 1])
+    widths = xs.max(axis=1) - xs.min(axis=1)
+    depths = ys.max(axis=1) - ys.min(axis=1)
+    best = int(np.argmin(widths * depths))
+    return float(angles[best]), float(widths[best]), float(depths[best])
+
+
+def rotation_z(angle: float) -> np.ndarray:
+    """3x3 rotation about Z by `angle` radians"""
+    c, s = np.cos(angle), np.sin(angle)
+    return np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]])
+
+
+@dataclass
+class Footprint:
+    """A part's plate footprint, aligned so its bounding rectangle is axis-parallel"""
+    key: str
+    triangles: np.ndarray
+    angle: float          # rotation about Z applied to the mesh
+    width: float          # X extent after rotation
+    depth: float          # Y extent after rotation
+    height: float         # Z extent
+    z_min: float
+
+
+@dataclass
+class Placement:
+    footprint: Footprint
+    x: float
+    y: float
+    turned: bool          # rotated a further 90 degrees to fit
+
+
+@dataclass
+class Plate:
+    placements: List[Placement] = field(default_factory=list)
+    # Shelves as [y, shelf depth, next free x]
+    shelves: List[List[float]] = field(default_factory=list)
+
+    @property
+    def keys(self) -> List[str]:
+        return [placement.footprint.key for placement in self.placements]
+
+    def extents(self) -> Dict[str, float]:
+        """Bounding box of the packed parts (mm), in the build-volume dimension format"""
+        x = max((p.x + (p.footprint.depth if p.turned else p.footprint.width) for p in self.placements), default=0)
+        y = max((p.y + (p.footprint.width if p.turned else p.footprint.depth) for p in self.placements), default=0)
+        z = max((p.footprint.height for p in self.placements), default=0)
+        return {'x': round(x, 2), 'y': round(y, 2), 'z': round(z, 2)}
+
+
+@dataclass
+class PlateLayout:
+    plates: List[Plate]
+    oversized: List[str]  # keys of parts larger than the plate
+
+
+def footprint(key: str, triangles: np.ndarray) -> Footprint:
+    """Compute a part's footprint from its triangles"""
+    vertices = np.asarray(triangles, dtype=np.float64).reshape(-1, 3)
+    hull = convex_hull_2d(vertices[:, :2])
+    angle, width, depth = min_area_rect(hull)
+    z_min, z_max = vertices[:, 2].min(), vertices[:, 2].max()
+    return Footprint(key, triangles, angle, width, depth, float(z_max - z_min), float(z_min))
+
+
+def _place_on(plate: Plate, width: float, depth: float, plate_x: float, plate_y: float,
+              spacing: float) -> Optional[Tuple[float, float]]:
+    """First shelf with room for a width x depth rectangle (opening a new shelf if needed)"""
+    for shelf in plate.shelves:
+        y, shelf_depth, next_x = shelf
+        if depth <= shelf_depth and next_x + width <= plate_x:
+            shelf[2] = next_x + width + spacing
+            return next_x, y
+
+    y = sum(shelf[1] for shelf in plate.shelves) + spacing * len(plate.shelves)
+    if y + depth <= plate_y and width <= plate_x:
+        plate.shelves.append([y, depth, width + spacing])
+        return 0.0, y
+    return None
+
+
+def pack_footprints(footprints: List[Footprint], plate_x: float, plate_y: float,
+                    spacing: float = DEFAULT_SPACING) -> PlateLayout:
+    """
+    Shelf-pack footprints onto as few plates as possible.
+
+    Parts go in order of decreasing depth (first-fit decreasing height); each
+    is tried lying along X first, then turned 90 degrees.
+    """
+    plates: List[Plate] = []
+    oversized: List[str] = []
+
+    def orientations(fp):
+        # Long side along X keeps shelves shallow
+        wide = (max(fp.width, fp.depth), min(fp.width, fp.depth), fp.depth > fp.width)
+        return [wide, (wide[1], wide[0], not wide[2])]
+
+    ordered = sorted(footprints, key=lambda fp: min(fp.width, fp.depth), reverse=True)
+    for fp in ordered:
+        if not any(w <= plate_x and d <= plate_y for w, d, _ in orientations(fp)):
+            oversized.append(fp.key)
+            continue
+
+        placed = False
+        new_plate = Plate()
+        for plate in plates + [new_plate]:
+            for width, depth, turned in orientations(fp):
+                position = _place_on(plate, width, depth, plate_x, plate_y, spacing)
+                if position is not None:
+                    if plate is new_plate:
+                        plates.append(plate)
+                    plate.placements.append(Placement(fp, position[0], position[1], turned))
+                    placed = True
+                    break
+            if placed:
+                break
+
+    return PlateLayout(plates, oversized)
+
+
+def plate_triangles(plate: Plate, plate_x: float, plate_y: float) -> np.ndarray:
+    """All of a plate's parts moved into place, with the group centred on the bed"""
+    extents = plate.extents()
+    offset_x = max(0.0, (plate_x - extents['x']) / 2)
+    offset_y = max(0.0, (plate_y - extents['y']) / 2)
+
+    meshes = []
+    for placement in plate.placements:
+        fp = placement.footprint
+        angle = fp.angle + (np.pi / 2 if placement.turned else 0.0)
+        vertices = np.asarray(fp.triangles, dtype=np.float64).reshape(-1, 3) @ rotation_z(-angle).T
+        low = vertices.min(axis=0)
+        vertices -= [low[0] - placement.x - offset_x, low[1] - placement.y - offset_y, fp.z_min]
+        meshes.append(vertices.reshape(-1, 3, 3))
+    return np.concatenate(meshes) if meshes else np.empty((0, 3, 3))
+
+
+def pack_stl_files(files: Dict[str, Union[str, Path]], plate_x: float, plate_y: float,
+                   spacing: float = DEFAULT_SPACING) -> PlateLayout:
+    """
+    Pack STL files (key -> path) onto plates of plate_x x plate_y mm.
+    Use write_plate() to export each resulting plate.
+    """
+    footprints = [footprint(key, read_stl(path)) for key, path in files.items()]
+    layout = pack_footprints(footprints, plate_x, plate_y, spacing)
+    logger.info(f"Packed {len(footprints) - len(layout.oversized)} parts onto {len(layout.plates)} plate(s)")
+    return layout
+
+
+def write_plate(plate: Plate, path: Union[str, Path], plate_x: float, plate_y: float):
+    """Write a packed plate as one combined binary STL"""
+    write_stl(path, plate_triangles(plate, plate_x, plate_y),
+              header=f"NexaAI plate: {', '.join(plate.keys)}")
@@ -0,0 +1,196 @@
+"""
+Print Time and Material Estimator
+
+Predicts print time and filament use for an STL on a printer profile without
+slicing. The model follows what a slicer would lay down:
+
+- layers: part height / layer height
+- walls: outline length per layer (the mesh is cut at sampled heights, all
+  triangles of a cut at once) x perimeter count x layers
+- top/bottom skins: projected area of up/down-facing surfaces x skin layers
+- infill: the remaining volume x infill density
+
+Extruded volume gives grams (material density) and, divided by each feature's
+volumetric speed, print time; per-layer overhead, heat-up and a per-printer
+calibration factor (fitted from completed jobs) are added on top.
+"""
+
+import re
+import math
+import logging
+from dataclasses import dataclass, asdict, replace
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Heights at which the outline is measured
+SAMPLE_LAYERS = 32
+
+# g/cm^3
+MATERIAL_DENSITY = {
+    'PLA': 1.24,
+    'PETG': 1.27,
+    'ABS': 1.04,
+    'ASA': 1.07,
+    'TPU': 1.21,
+    'NYLON': 1.14,
+    'PC': 1.20,
+}
+DEFAULT_DENSITY = MATERIAL_DENSITY['PLA']
+
+
+def material_words(text: Optional[str]) -> List[str]:
+    """Upper-case words of a free-text material description, in order ('PLA+ or PETG' -> ['PLA', 'OR', 'PETG'])"""
+    return re.findall(r'[A-Z0-9]+', (text or '').upper())
+
+
+@dataclass
+class PrintProfile:
+    """Slicer settings the estimate is based on (mm, mm/s, seconds)"""
+    layer_height: float = 0.2
+    line_width: float = 0.45
+    perimeters: int = 2
+    top_layers: int = 5
+    bottom_layers: int = 4
+    infill: float = 0.15
+    perimeter_speed: float = 45.0
+    infill_speed: float = 80.0
+    layer_change_seconds: float = 2.0
+    heatup_seconds: float = 180.0
+    filament_diameter: float = 1.75
+    # Multiplier fitted from completed prints (see print_scheduler.calibrate_estimates)
+    time_factor: float = 1.0
+
+    @classmethod
+    def for_printer(cls, printer: Optional[dict]) -> 'PrintProfile':
+        """Defaults for the printer type, overridden by the printer's print_profile and calibration"""
+        if not printer:
+            return cls()
+        profile = PRINTER_PROFILES.get(printer.get('printer_type'), cls())
+        overrides = {key: value for key, value in (printer.get('print_profile') or {}).items()
+                     if key in cls.__dataclass_fields__}
+        if printer.get('estimate_factor'):
+            overrides['time_factor'] = printer['estimate_factor']
+        return replace(profile, **overrides)
+
+
+PRINTER_PROFILES = {
+    'prusa': PrintProfile(),
+    'snapmaker': PrintProfile(perimeter_speed=30.0, infill_speed=50.0, heatup_seconds=240.0),
+}
+
+
+@dataclass
+class PrintEstimate:
+    minutes: int          # calibrated
+    raw_minutes: float    # before the calibration factor
+    grams: float
+    filament_meters: float
+    layers: int
+    volume: float         # part volume, mm^3
+    extruded_volume: float
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def outline_lengths(triangles: np.ndarray, heights: np.ndarray) -> np.ndarray:
+    """
+    Total cross-section outline length at each height.
+
+    A triangle spanning the plane is cut along exactly two of its edges; the
+    segment between the two cut points is summed over all spanning triangles.
+    """
+    tris = np.asarray(triangles, dtype=np.float64)
+    z = tris[:, :, 2]
+    z_min, z_max = z.min(axis=1), z.max(axis=1)
+    lengths = np.zeros(len(heights))
+
+    for i, height in enumerate(heights):
+        crossing = (z_min < height) & (z_max > height)
+        if not crossing.any():
+            continue
+        t = tris[crossing]
+        # Cut point on each edge (a -> b) and whether that edge spans the plane
+        points, valid = [], []
+        for a, b in ((0, 1), (1, 2), (2, 0)):
+            za, zb = t[:, a, 2], t[:, b, 2]
+            spans = (za - height) * (zb - height) < 0
+            with np.errstate(invalid='ignore', divide='ignore'):
+                ratio = np.where(spans, (height - za) / (zb - za), 0.0)
+            points.append(t[:, a, :2] + ratio[:, None] * (t[:, b, :2] - t[:, a, :2]))
+            valid.append(spans)
+        lengths[i] = sum(
+            np.linalg.norm(points[p] - points[q], axis=1)[valid[p] & valid[q]].sum()
+            for p, q in ((0, 1), (1, 2), (2, 0))
+        )
+    return lengths
+
+
+def estimate_print(triangles: np.ndarray, profile: PrintProfile = None,
+                   material: Optional[str] = None) -> PrintEstimate:
+    """
+    Estimate print time and filament for a mesh (in its print orientation).
+
+    Args:
+        triangles: (n, 3, 3) vertices, as returned by read_stl()
+        profile: Printer profile (default: PrintProfile())
+        material: Material name for the density (default PLA)
+    """
+    profile = profile or PrintProfile()
+    tris = np.asarray(triangles, dtype=np.float64)
+    if len(tris) == 0:
+        return PrintEstimate(0, 0.0, 0.0, 0.0, 0, 0.0, 0.0)
+
+    v0, v1, v2 = tris[:, 0], tris[:, 1], tris[:, 2]
+    crosses = np.cross(v1 - v0, v2 - v0)
+    volume = abs(np.einsum('ij,ij->', v0, np.cross(v1, v2))) / 6
+
+    z = tris[:, :, 2]
+    bottom, top = z.min(), z.max()
+    layers = max(1, math.ceil((top - bottom) / profile.layer_height))
+
+    # Mid-layer sample heights, offset so the plane never passes through a vertex exactly
+    samples = min(SAMPLE_LAYERS, layers)
+    heights = bottom + (np.arange(samples) + 0.5) * (top - bottom) / samples + 1e-6
+    outline = outline_lengths(tris, heights).mean() * layers
+
+    bead = profile.line_width * profile.layer_height
+    wall_volume = outline * profile.perimeters * bead
+
+    # Projected area of up- and down-facing surfaces (|n_z| x area = crosses_z / 2)
+    up = crosses[:, 2].clip(min=0).sum() / 2
+    down = -crosses[:, 2].clip(max=0).sum() / 2
+    skin_volume = (up * profile.top_layers + down * profile.bottom_layers) * profile.layer_height
+
+    # Thin parts are all shell: never extrude more than the part holds
+    shell_volume = min(wall_volume + skin_volume, volume)
+    wall_share = wall_volume / (wall_volume + skin_volume) if wall_volume + skin_volume else 1.0
+    infill_volume = (volume - shell_volume) * profile.infill
+    extruded = shell_volume + infill_volume
+
+    seconds = (
+        shell_volume * wall_share / (bead * profile.perimeter_speed)
+        + (shell_volume * (1 - wall_share) + infill_volume) / (bead * profile.infill_speed)
+        + layers * profile.layer_change_seconds
+        + profile.heatup_seconds
+    )
+    raw_minutes = seconds / 60
+
+    density = next(
+        (MATERIAL_DENSITY[word] for word in material_words(material) if word in MATERIAL_DENSITY),
+        DEFAULT_DENSITY
+    )
+    filament_area = math.pi * (profile.filament_diameter / 2) ** 2
+
+    return PrintEstimate(
+        minutes=max(1, round(float(raw_minutes) * profile.time_factor)),
+        raw_minutes=round(float(raw_minutes), 2),
+        grams=round(float(extruded) / 1000 * density, 1),
+        filament_meters=round(float(extruded) / filament_area / 1000, 2),
+        layers=layers,
+        volume=round(float(volume), 1),
+        extruded_volume=round(float(extruded), 1),
+    )
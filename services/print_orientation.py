@@ -0,0 +1,214 @@
+"""
+Print Orientation Optimizer
+
+Picks the rotation a part should be printed in. Candidate "down" directions
+are the normals of the part's largest faces (flat faces make the best bed
+contact) plus an even sample of the sphere. Each candidate is scored on
+
+- overhang area: downward faces steeper than the overhang limit (supports)
+- bed contact area: faces lying flat on the bed (adhesion)
+- build height: more layers, longer prints
+
+With d the down direction, a vertex's height after rotation is simply -d.v,
+so all candidates are scored together as (candidates x faces) matrix products,
+processed in chunks to bound memory. Large meshes are ranked on a sample (all
+of the largest faces plus a scaled uniform sample of the rest); the winner's
+numbers are then recomputed on the full mesh.
+"""
+
+import logging
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Union
+
+import numpy as np
+
+from .stl_mesh import DEFAULT_OVERHANG_ANGLE, BED_TOLERANCE, read_stl, write_stl
+
+logger = logging.getLogger(__name__)
+
+SPHERE_SAMPLES = 64
+FACE_CANDIDATES = 32
+# Matrix cells (candidates x faces) scored per chunk
+CHUNK_CELLS = 4_000_000
+# Meshes with more faces are ranked on a sample of this size
+SEARCH_FACES = 20_000
+
+# Score weights; each term is normalised (areas by surface area, height by the
+# mesh's largest dimension) so the weights are comparable
+OVERHANG_WEIGHT = 1.0
+CONTACT_WEIGHT = 0.5
+HEIGHT_WEIGHT = 0.3
+
+# Faces within this angle (degrees) of facing straight down count as bed contact
+FLAT_ANGLE = 1.0
+
+
+@dataclass
+class Orientation:
+    """Chosen rotation and its score terms"""
+    rotation: List[List[float]]  # 3x3 matrix applied to the original vertices
+    down: List[float]            # original-frame direction that faces the bed
+    overhang_area: float
+    contact_area: float
+    height: float
+    score: float
+    original_score: float        # score of the part as exported
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def fibonacci_sphere(count: int) -> np.ndarray:
+    """`count` roughly evenly spaced unit vectors"""
+    i = np.arange(count) + 0.5
+    polar = np.arccos(1 - 2 * i / count)
+    azimuth = np.pi * (1 + 5 ** 0.5) * i
+    return np.column_stack([np.cos(azimuth) * np.sin(polar), np.sin(azimuth) * np.sin(polar), np.cos(polar)])
+
+
+def rotation_to_down(direction: np.ndarray) -> np.ndarray:
+    """Rotation matrix turning `direction` to point straight down (-Z)"""
+    d = direction / np.linalg.norm(direction)
+    target = np.array([0.0, 0.0, -1.0])
+    axis = np.cross(d, target)
+    sin = np.linalg.norm(axis)
+    cos = float(np.dot(d, target))
+    if sin < 1e-9:
+        # Already down, or straight up (flip about X)
+        return np.eye(3) if cos > 0 else np.diag([1.0, -1.0, -1.0])
+    axis /= sin
+    k = np.array([[0, -axis[2], axis[1]], [axis[2], 0, -axis[0]], [-axis[1], axis[0], 0]])
+    return np.eye(3) + sin * k + (1 - cos) * (k @ k)
+
+
+def candidate_directions(normals: np.ndarray, areas: np.ndarray) -> np.ndarray:
+    """Normals of the largest (merged) faces plus a sphere sample, deduplicated"""
+    # Merge coplanar triangles: quantise normals to a 0.01 grid packed into one int key.
+    # The key only groups faces; each group's direction is the area-weighted mean of its
+    # actual normals, since a grid-snapped normal is tilted enough to lift a large face
+    # off the bed.
+    grid = np.rint(normals * 100).astype(np.int64) + 100
+    keys = (grid[:, 0] * 201 + grid[:, 1]) * 201 + grid[:, 2]
+    unique, inverse = np.unique(keys, return_inverse=True)
+    inverse = inverse.ravel()
+    face_area = np.bincount(inverse, weights=areas, minlength=len(unique))
+    top = np.argsort(face_area)[::-1][:FACE_CANDIDATES]
+    summed = np.column_stack([
+        np.bincount(inverse, weights=normals[:, k] * areas, minlength=len(unique)) for k in range(3)
+    ])
+    largest = summed[top]
+
+    candidates = np.vstack([[[0.0, 0.0, -1.0]], largest, fibonacci_sphere(SPHERE_SAMPLES)])
+    lengths = np.linalg.norm(candidates, axis=1)
+    candidates = candidates[lengths > 0] / lengths[lengths > 0, None]
+    _, first = np.unique(np.round(candidates, 3), axis=0, return_index=True)
+    return candidates[np.sort(first)]
+
+
+def _face_geometry(triangles: np.ndarray):
+    """Non-degenerate triangles with their unit normals and areas"""
+    tris = np.asarray(triangles, dtype=np.float64)
+    crosses = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+    doubled = np.linalg.norm(crosses, axis=1)
+    keep = doubled > 0
+    return tris[keep], crosses[keep] / doubled[keep, None], doubled[keep] / 2
+
+
+def _search_sample(areas: np.ndarray, size: int = SEARCH_FACES):
+    """
+    Face indices and area weights for ranking candidates on a large mesh:
+    the largest half of the sample exactly, the rest uniformly (weighted up)
+    """
+    if len(areas) <= size:
+        return np.arange(len(areas)), np.ones(len(areas))
+    largest = np.argpartition(areas, -(size // 2))[-(size // 2):]
+    rest = np.setdiff1d(np.arange(len(areas)), largest, assume_unique=True)
+    sampled = np.random.default_rng(0).choice(rest, size - len(largest), replace=False)
+    weights = np.concatenate([np.ones(len(largest)), np.full(len(sampled), len(rest) / len(sampled))])
+    return np.concatenate([largest, sampled]), weights
+
+
+def score_orientations(tris: np.ndarray, normals: np.ndarray, areas: np.ndarray, directions: np.ndarray,
+                       overhang_angle: float = DEFAULT_OVERHANG_ANGLE, surface: float = None,
+                       size: float = None) -> Dict[str, np.ndarray]:
+    """
+    Score every down direction against the faces (from _face_geometry).
+
+    Returns:
+        {'overhang_area', 'contact_area', 'height', 'score'} arrays, one value per direction
+    """
+    surface = surface or areas.sum() or 1.0
+    flat = tris.reshape(-1, 3)
+    size = size or np.ptp(flat, axis=0).max() or 1.0
+    overhang_cos = np.cos(np.radians(overhang_angle))
+    flat_cos = np.cos(np.radians(FLAT_ANGLE))
+
+    count = len(directions)
+    overhang = np.empty(count)
+    contact = np.empty(count)
+    height = np.empty(count)
+
+    chunk = max(1, CHUNK_CELLS // max(len(tris), 1))
+    for start in range(0, count, chunk):
+        down = directions[start:start + chunk]
+        # Heights after rotation: z' = -d.v
+        z = -(down @ flat.T).reshape(len(down), -1, 3)
+        z_low = z.min(axis=(1, 2))
+        height[start:start + chunk] = z.max(axis=(1, 2)) - z_low
+        on_bed = z.max(axis=2) <= z_low[:, None] + BED_TOLERANCE
+        # Rotated normal's Z: -d.n (-1 = facing straight down)
+        normal_z = -(down @ normals.T)
+        overhang[start:start + chunk] = ((normal_z < -overhang_cos) & ~on_bed) @ areas
+        contact[start:start + chunk] = ((normal_z < -flat_cos) & on_bed) @ areas
+
+    score = (OVERHANG_WEIGHT * overhang / surface
+             - CONTACT_WEIGHT * contact / surface
+             + HEIGHT_WEIGHT * height / size)
+    return {'overhang_area': overhang, 'contact_area': contact, 'height': height, 'score': score}
+
+
+def optimize_orientation(triangles: np.ndarray, overhang_angle: float = DEFAULT_OVERHANG_ANGLE) -> Orientation:
+    """Best print orientation for a mesh (lowest score)"""
+    tris, normals, areas = _face_geometry(triangles)
+    surface = areas.sum() or 1.0
+    size = np.ptp(tris.reshape(-1, 3), axis=0).max() or 1.0
+
+    directions = candidate_directions(normals, areas)
+    sample, weights = _search_sample(areas)
+    ranking = score_orientations(tris[sample], normals[sample], areas[sample] * weights, directions,
+                                 overhang_angle, surface, size)
+    best = int(np.argmin(ranking['score']))
+
+    # Exact numbers for the winner and the exported orientation (directions[0])
+    final = score_orientations(tris, normals, areas, directions[[best, 0]], overhang_angle, surface, size)
+    if final['score'][1] <= final['score'][0]:
+        best, index = 0, 1
+    else:
+        index = 0
+    return Orientation(
+        rotation=rotation_to_down(directions[best]).round(9).tolist(),
+        down=directions[best].round(6).tolist(),
+        overhang_area=round(float(final['overhang_area'][index]), 2),
+        contact_area=round(float(final['contact_area'][index]), 2),
+        height=round(float(final['height'][index]), 2),
+        score=round(float(final['score'][index]), 4),
+        original_score=round(float(final['score'][1]), 4),
+    )
+
+
+def apply_orientation(triangles: np.ndarray, rotation) -> np.ndarray:
+    """Rotate a mesh and move it onto the bed (min corner at the origin)"""
+    vertices = np.asarray(triangles, dtype=np.float64).reshape(-1, 3) @ np.asarray(rotation).T
+    vertices -= vertices.min(axis=0)
+    return vertices.reshape(-1, 3, 3)
+
+
+def orient_stl(source: Union[str, Path], destination: Union[str, Path]) -> Orientation:
+    """Write `source` rotated into its best print orientation to `destination`"""
+    triangles = read_stl(source)
+    orientation = optimize_orientation(triangles)
+    write_stl(destination, apply_orientation(triangles, orientation.rotation),
+              header=f"NexaAI oriented: {Path(source).name}")
+    logger.info(f"Oriented {Path(source).name}: score {orientation.original_score} -> {orientation.score}")
+    return orientation
@@ -11,6 +11,7 @@ import requests
 import logging
 from pathlib import Path
 from typing import Dict, Any, Optional
+from services.upload_stream import ProgressCallback, multipart_file_body
 from requests.auth import HTTPDigestAuth
 
 logger = logging.getLogger(__name__)
@@ -85,13 +86,15 @@ class PrusaLinkClient:
                 'error': str(e)
             }
     
-    def upload_file(self, file_path: str, filename: Optional[str] = None) -> Dict[str, Any]:
+    def upload_file(self, file_path: str, filename: Optional[str] = None,
+                    progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
         """
         Upload a file to the printer.
         
         Args:
             file_path: Path to STL/GCODE file
             filename: Optional custom filename (default: use original)
+            progress: Called with (bytes_sent, total) while the file streams
             
         Returns:
             Dict with:
@@ -111,14 +114,19 @@ class PrusaLinkClient:
             if filename is None:
                 filename = file_path.name
             
-            # Upload file
-            with open(file_path, 'rb') as f:
-                files = {'file': (filename, f, 'application/octet-stream')}
-                response = self.session.post(
-                    f"{self.base_url}/files/local",
-                    files=files
-                )
-                response.raise_for_status()
+            # Stream the file as multipart instead of building the body in memory
+            body, content_type = multipart_file_body(
+                file_path,
+                filename,
+                content_type='application/octet-stream',
+                progress=progress
+            )
+            response = self.session.post(
+                f"{self.base_url}/files/local",
+                data=body,
+                headers={'Content-Type': content_type, 'Content-Length': str(len(body))}
+            )
+            response.raise_for_status()
             
             logger.info(f"✓ Uploaded file: {filename}")
             
@@ -167,13 +175,15 @@ class PrusaLinkClient:
                 'error': str(e)
             }
     
-    def upload_and_print(self, file_path: str, filename: Optional[str] = None) -> Dict[str, Any]:
+    def upload_and_print(self, file_path: str, filename: Optional[str] = None,
+                         progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
         """
         Upload a file and immediately start printing.
         
         Args:
             file_path: Path to STL/GCODE file
             filename: Optional custom filename
+            progress: Called with (bytes_sent, total) while the file streams
             
         Returns:
             Dict with:
@@ -182,7 +192,7 @@ class PrusaLinkClient:
                 - error: Error message if failed
         """
         # Upload file
-        upload_result = self.upload_file(file_path, filename)
+        upload_result = self.upload_file(file_path, filename, progress=progress)
         
         if not upload_result['success']:
             return upload_result
@@ -0,0 +1,217 @@
+"""
+Slicing Stage
+
+Turns STL files into printer G-code before upload. Slicers are pluggable:
+
+- prusaslicer: the PrusaSlicer command line (also has Snapmaker profiles)
+- stub: writes placeholder G-code without slicing, for tests and development
+
+Results are cached on disk by (mesh hash, profile hash), so re-printing a part
+with the same settings skips slicing entirely. Slicing runs on a small worker
+pool; concurrent requests for the same mesh and profile share one job.
+"""
+
+import os
+import abc
+import json
+import hashlib
+import logging
+import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class SlicerError(Exception):
+    """Slicing failed (bad mesh, bad profile or slicer missing); retrying won't help"""
+
+
+class Slicer(abc.ABC):
+    """Base class: converts an STL file to G-code with the given profile"""
+
+    name = 'base'
+
+    @abc.abstractmethod
+    def version(self) -> str:
+        """Identifies slicer output; part of the cache key"""
+
+    @abc.abstractmethod
+    def slice(self, stl_path: Union[str, Path], output_path: Union[str, Path], profile: Dict):
+        """Write G-code for stl_path to output_path; raises SlicerError on failure"""
+
+
+class PrusaSlicerCLI(Slicer):
+    """
+    PrusaSlicer's command line.
+
+    The profile's optional 'config' entry is a PrusaSlicer .ini exported from
+    the GUI (printer, filament and print settings); every other entry is
+    passed as a --key value override, e.g. {'layer_height': 0.2}.
+    """
+
+    name = 'prusaslicer'
+
+    def __init__(self, executable: str = 'prusa-slicer', timeout: int = 600):
+        self.executable = executable
+        self.timeout = timeout
+        self._version = None
+
+    def version(self) -> str:
+        if self._version is None:
+            try:
+                result = subprocess.run([self.executable, '--help'], capture_output=True, text=True, timeout=30)
+                self._version = (result.stdout.splitlines() or [''])[0].strip()
+            except (OSError, subprocess.SubprocessError) as e:
+                raise SlicerError(f"PrusaSlicer not available ({self.executable}): {e}")
+        return self._version
+
+    def command(self, stl_path, output_path, profile: Dict) -> list:
+        command = [self.executable, '--export-gcode']
+        if profile.get('config'):
+            command += ['--load', str(profile['config'])]
+        for key, value in sorted(profile.items()):
+            if key == 'config' or value is None:
+                continue
+            command += [f"--{key.replace('_', '-')}", str(value)]
+        return command + ['--output', str(output_path), str(stl_path)]
+
+    def slice(self, stl_path, output_path, profile):
+        try:
+            result = subprocess.run(
+                self.command(stl_path, output_path, profile),
+                capture_output=True, text=True, timeout=self.timeout
+            )
+        except subprocess.TimeoutExpired:
+            raise SlicerError(f"PrusaSlicer timed out after {self.timeout}s")
+        except OSError as e:
+            raise SlicerError(f"PrusaSlicer not available ({self.executable}): {e}")
+        if result.returncode != 0 or not Path(output_path).exists():
+            raise SlicerError((result.stderr or result.stdout).strip()[-500:] or 'PrusaSlicer failed')
+
+
+class StubSlicer(Slicer):
+    """Writes a small, deterministic placeholder G-code file (no printing moves)"""
+
+    name = 'stub'
+
+    def version(self) -> str:
+        return 'stub-1'
+
+    def slice(self, stl_path, output_path, profile):
+        # Imported here so the stub (and this module) work without NumPy
+        from .stl_mesh import read_stl
+
+        triangles = read_stl(stl_path)
+        if len(triangles) == 0:
+            raise SlicerError('Mesh has no triangles')
+        height = float(triangles[:, :, 2].max() - triangles[:, :, 2].min())
+        layer_height = float(profile.get('layer_height') or 0.2)
+        layers = max(1, int(round(height / layer_height)))
+
+        lines = [
+            '; generated by NexaAI stub slicer',
+            f'; source: {Path(stl_path).name}',
+            f'; profile: {json.dumps(profile, sort_keys=True, default=str)}',
+            f'; layer_count: {layers}',
+            'G28 ; home',
+        ]
+        lines += [f';LAYER:{layer}\nG1 Z{(layer + 1) * layer_height:.3f}' for layer in range(layers)]
+        lines.append('M84 ; motors off')
+        Path(output_path).write_text('\n'.join(lines) + '\n')
+
+
+SLICERS = {
+    PrusaSlicerCLI.name: PrusaSlicerCLI,
+    StubSlicer.name: StubSlicer,
+}
+
+
+def file_hash(path: Union[str, Path]) -> str:
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def profile_hash(slicer: Slicer, profile: Dict) -> str:
+    """Hash of everything that affects the G-code besides the mesh"""
+    digest = hashlib.sha256()
+    digest.update(f'{slicer.name}\0{slicer.version()}\0'.encode())
+    digest.update(json.dumps(profile, sort_keys=True, default=str).encode())
+    if profile.get('config') and Path(profile['config']).exists():
+        digest.update(file_hash(profile['config']).encode())
+    return digest.hexdigest()
+
+
+class SlicingPool:
+    """
+    Slices on a bounded thread pool (the work happens in slicer subprocesses)
+    with an on-disk G-code cache keyed by (mesh hash, profile hash).
+    """
+
+    def __init__(self, slicer: Slicer, cache_dir: Union[str, Path], max_workers: int = 2):
+        self.slicer = slicer
+        self.cache_dir = Path(cache_dir)
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        # cache key -> Future, so concurrent requests for the same job share it
+        self._in_flight: Dict[str, Future] = {}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='slicer')
+            return self._executor
+
+    def cache_path(self, stl_path, profile: Dict) -> Path:
+        key = f"{file_hash(stl_path)[:32]}-{profile_hash(self.slicer, profile)[:32]}"
+        return self.cache_dir / f'{key}.gcode'
+
+    def _slice(self, stl_path, output: Path, profile: Dict) -> Path:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        partial = output.with_name(f'{output.name}.{os.getpid()}.{threading.get_ident()}.part')
+        try:
+            self.slicer.slice(stl_path, partial, profile)
+            # Atomic, so readers never see a half-written cache entry
+            os.replace(partial, output)
+        finally:
+            if partial.exists():
+                partial.unlink()
+        logger.info(f"Sliced {Path(stl_path).name} with {self.slicer.name} -> {output.name}")
+        return output
+
+    def submit(self, stl_path, profile: Dict) -> Future:
+        """Future resolving to the G-code path (immediately for cache hits)"""
+        output = self.cache_path(stl_path, profile)
+        if output.exists():
+            future = Future()
+            future.set_result(output)
+            return future
+
+        key = output.name
+        executor = self._get_executor()
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future
+            future = executor.submit(self._slice, stl_path, output, profile)
+            self._in_flight[key] = future
+        # Outside the lock: the callback runs at once if the job already finished
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def _forget(self, key: str):
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def slice(self, stl_path, profile: Dict, timeout: Optional[float] = None) -> Path:
+        """Slice (or fetch from cache) and wait for the G-code path"""
+        return self.submit(stl_path, profile).result(timeout=timeout)
@@ -11,6 +11,7 @@ import requests
 import logging
 from pathlib import Path
 from typing import Dict, Any, Optional
+from services.upload_stream import ProgressCallback, multipart_file_body
 import time
 
 logger = logging.getLogger(__name__)
@@ -93,13 +94,15 @@ class SnapmakerClient:
                 'error': str(e)
             }
     
-    def upload_file(self, file_path: str, filename: Optional[str] = None) -> Dict[str, Any]:
+    def upload_file(self, file_path: str, filename: Optional[str] = None,
+                    progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
         """
         Upload a file to Snapmaker.
         
         Args:
             file_path: Path to file (STL/GCODE for 3D print, NC for CNC, etc.)
             filename: Optional custom filename
+            progress: Called with (bytes_sent, total) while the file streams
             
         Returns:
             Dict with:
@@ -119,14 +122,19 @@ class SnapmakerClient:
             if filename is None:
                 filename = file_path.name
             
-            # Upload file
-            with open(file_path, 'rb') as f:
-                files = {'file': (filename, f)}
-                response = self.session.post(
-                    f"{self.base_url}/upload",
-                    files=files
-                )
-                response.raise_for_status()
+            # Stream the file as multipart instead of building the body in memory
+            body, content_type = multipart_file_body(
+                file_path,
+                filename,
+                content_type=None,
+                progress=progress
+            )
+            response = self.session.post(
+                f"{self.base_url}/upload",
+                data=body,
+                headers={'Content-Type': content_type, 'Content-Length': str(len(body))}
+            )
+            response.raise_for_status()
             
             logger.info(f"✓ Uploaded file to Snapmaker: {filename}")
             
@@ -172,19 +180,21 @@ class SnapmakerClient:
                 'error': str(e)
             }
     
-    def upload_and_print(self, file_path: str, filename: Optional[str] = None) -> Dict[str, Any]:
+    def upload_and_print(self, file_path: str, filename: Optional[str] = None,
+                         progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
         """
         Upload a file and immediately start the job.
         
         Args:
             file_path: Path to file
             filename: Optional custom filename
+            progress: Called with (bytes_sent, total) while the file streams
             
         Returns:
             Dict with success status
         """
         # Upload file
-        upload_result = self.upload_file(file_path, filename)
+        upload_result = self.upload_file(file_path, filename, progress=progress)
         
         if not upload_result['success']:
             return upload_result
@@ -0,0 +1,216 @@
+"""
+STL Mesh I/O and Analysis
+
+Reads binary and ASCII STL files into a NumPy triangle array, writes binary
+STL back out, and measures meshes for printing (bounding box, volume, surface
+area, overhang area, watertightness). Binary files are memory-mapped, so large
+meshes are not copied into Python objects; every operation works on the whole
+(n, 3, 3) vertex array at once.
+"""
+
+import os
+import re
+import logging
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BINARY_HEADER_SIZE = 80
+
+# Faces leaning more than this many degrees from vertical need support
+DEFAULT_OVERHANG_ANGLE = 45.0
+# Faces within this height (mm) of the lowest point rest on the bed
+BED_TOLERANCE = 0.05
+
+# Binary STL triangle record: normal, three vertices, attribute byte count
+BINARY_TRIANGLE = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('attr', '<u2'),
+])
+
+_VERTEX_RE = re.compile(
+    rb'vertex\s+([-+0-9.eE]+)\s+([-+0-9.eE]+)\s+([-+0-9.eE]+)'
+)
+
+
+def _is_binary(path: Union[str, Path], size: int) -> bool:
+    """
+    Binary if the triangle count in the header matches the file size.
+    ('solid' at the start is not reliable - many exporters write it in binary headers.)
+    """
+    if size < BINARY_HEADER_SIZE + 4:
+        return False
+    with open(path, 'rb') as f:
+        f.seek(BINARY_HEADER_SIZE)
+        count = int(np.frombuffer(f.read(4), dtype='<u4')[0])
+    return size == BINARY_HEADER_SIZE + 4 + count * BINARY_TRIANGLE.itemsize
+
+
+def read_stl(path: Union[str, Path]) -> np.ndarray:
+    """
+    Load an STL file as triangle vertices.
+
+    Args:
+        path: Binary or ASCII STL file
+
+    Returns:
+        float32 array of shape (n_triangles, 3, 3); a read-only memory-mapped
+        view for binary files
+    """
+    size = os.path.getsize(path)
+    if _is_binary(path, size):
+        count = (size - BINARY_HEADER_SIZE - 4) // BINARY_TRIANGLE.itemsize
+        if count == 0:
+            return np.empty((0, 3, 3), dtype=np.float32)
+        records = np.memmap(path, dtype=BINARY_TRIANGLE, mode='r',
+                            offset=BINARY_HEADER_SIZE + 4, shape=(count,))
+        return records['vertices']
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    coords = np.array(_VERTEX_RE.findall(data), dtype=np.float32)
+    if len(coords) % 3:
+        raise ValueError(f"Malformed ASCII STL (vertex count not a multiple of 3): {path}")
+    return coords.reshape(-1, 3, 3)
+
+
+def triangle_normals(triangles: np.ndarray) -> np.ndarray:
+    """Unit normals of each triangle (zero for degenerate triangles)"""
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    return np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+
+def write_stl(path: Union[str, Path], triangles: np.ndarray, header: str = 'NexaAI'):
+    """Write triangles (n, 3, 3) as a binary STL file"""
+    triangles = np.asarray(triangles, dtype=np.float32)
+    records = np.zeros(len(triangles), dtype=BINARY_TRIANGLE)
+    records['vertices'] = triangles
+    records['normal'] = triangle_normals(triangles)
+
+    with open(path, 'wb') as f:
+        f.write(header.encode('ascii', 'replace')[:BINARY_HEADER_SIZE].ljust(BINARY_HEADER_SIZE, b' '))
+        f.write(np.uint32(len(records)).tobytes())
+        records.tofile(f)
+
+
+@dataclass
+class MeshAnalysis:
+    """Printability metrics of a triangle mesh (mm, mm^2, mm^3)"""
+    triangle_count: int
+    bbox_min: List[float]
+    bbox_max: List[float]
+    dimensions: Dict[str, float]
+    volume: float
+    surface_area: float
+    overhang_area: float
+    watertight: bool
+    open_edges: int
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _mix64(h: np.ndarray) -> np.ndarray:
+    """splitmix64 finaliser (in place): spreads key bits so distinct keys rarely collide"""
+    h ^= h >> np.uint64(31)
+    h *= np.uint64(0xBF58476D1CE4E5B9)
+    h ^= h >> np.uint64(29)
+    return h
+
+
+def count_open_edges(triangles: np.ndarray) -> int:
+    """
+    Number of edges not shared by exactly two triangles (0 for a closed mesh).
+
+    Vertices are matched by their exact float32 coordinates (-0.0 counted as
+    0.0), hashed to 64 bits, so edges can be counted with one sort of a flat
+    uint64 array instead of building a vertex index. A hash collision (odds
+    around 1e-7 for a million-triangle mesh) merges two edges' runs, which can
+    hide two open edges (1 + 1) or report two closed ones as open (2 + 2).
+    """
+    # Adding 0.0 turns -0.0 into 0.0, which has different bits but is the same point
+    coords = np.asarray(triangles, dtype=np.float32) + np.float32(0.0)
+    bits = np.ascontiguousarray(coords).view(np.uint32).astype(np.uint64)
+    # Hash each vertex: x and y bits side by side, mixed with z
+    with np.errstate(over='ignore'):
+        vertex = (bits[..., 0] << np.uint64(32)) | bits[..., 1]
+        vertex ^= _mix64(bits[..., 2] * np.uint64(0x9E3779B97F4A7C15))
+        _mix64(vertex)
+        following = np.roll(vertex, -1, axis=1)
+        # Undirected edge key from its two vertex hashes
+        edges = _mix64(np.minimum(vertex, following)) ^ np.maximum(vertex, following)
+    edges = edges.ravel()
+    edges.sort()
+    # Run lengths of equal keys = triangles sharing each edge
+    starts = np.flatnonzero(np.concatenate(([True], edges[1:] != edges[:-1], [True])))
+    return int((np.diff(starts) != 2).sum())
+
+
+def analyze_mesh(triangles: np.ndarray, overhang_angle: float = DEFAULT_OVERHANG_ANGLE) -> MeshAnalysis:
+    """
+    Measure a mesh for printing, fully vectorized over the triangle array.
+
+    Args:
+        triangles: (n, 3, 3) vertices, as returned by read_stl()
+        overhang_angle: Faces tilted further than this from vertical (degrees)
+            and facing down need support; faces on the bed are not counted
+
+    Returns:
+        MeshAnalysis. Volume is the signed-tetrahedron sum, which is only
+        meaningful when the mesh is watertight (every edge shared by exactly
+        two triangles).
+    """
+    count = len(triangles)
+    if count == 0:
+        zero = {'x': 0.0, 'y': 0.0, 'z': 0.0}
+        return MeshAnalysis(0, [0.0] * 3, [0.0] * 3, zero, 0.0, 0.0, 0.0, False, 0)
+
+    # One contiguous 1D array per vertex coordinate keeps every step a flat ufunc
+    # (the transposed views alone are strided; one copy makes the rows contiguous)
+    coords = np.ascontiguousarray(np.asarray(triangles, dtype=np.float64).transpose(1, 2, 0))
+    (x0, y0, z0), (x1, y1, z1), (x2, y2, z2) = coords
+    low = np.array([min(x0.min(), x1.min(), x2.min()), min(y0.min(), y1.min(), y2.min()), min(z0.min(), z1.min(), z2.min())])
+    high = np.array([max(x0.max(), x1.max(), x2.max()), max(y0.max(), y1.max(), y2.max()), max(z0.max(), z1.max(), z2.max())])
+    size = high - low
+
+    # Face normals (unnormalised, length = twice the triangle area)
+    ux, uy, uz = x1 - x0, y1 - y0, z1 - z0
+    vx, vy, vz = x2 - x0, y2 - y0, z2 - z0
+    nx = uy * vz - uz * vy
+    ny = uz * vx - ux * vz
+    nz = ux * vy - uy * vx
+    doubled_areas = np.sqrt(nx * nx + ny * ny + nz * nz)
+    surface_area = doubled_areas.sum() / 2
+    # Divergence theorem: sum of signed tetrahedra against the origin
+    volume = abs((x0 * (y1 * z2 - z1 * y2) + y0 * (z1 * x2 - x1 * z2) + z0 * (x1 * y2 - y1 * x2)).sum()) / 6
+
+    # Downward faces steeper than the overhang limit, excluding the first layer
+    limit = -np.cos(np.radians(overhang_angle))
+    on_bed = np.maximum(np.maximum(z0, z1), z2) <= low[2] + BED_TOLERANCE
+    overhanging = (nz < limit * doubled_areas) & ~on_bed
+    overhang_area = doubled_areas[overhanging].sum() / 2
+
+    open_edges = count_open_edges(triangles)
+
+    return MeshAnalysis(
+        triangle_count=count,
+        bbox_min=[round(float(v), 3) for v in low],
+        bbox_max=[round(float(v), 3) for v in high],
+        dimensions={axis: round(float(v), 2) for axis, v in zip('xyz', size)},
+        volume=round(float(volume), 2),
+        surface_area=round(float(surface_area), 2),
+        overhang_area=round(float(overhang_area), 2),
+        watertight=open_edges == 0,
+        open_edges=open_edges,
+    )
+
+
+def analyze_stl(path: Union[str, Path], overhang_angle: float = DEFAULT_OVERHANG_ANGLE) -> MeshAnalysis:
+    """read_stl() + analyze_mesh()"""
+    return analyze_mesh(read_stl(path), overhang_angle)
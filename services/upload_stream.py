@@ -0,0 +1,150 @@
+"""
+Streaming upload bodies for printer file transfers.
+
+Files are read and sent in fixed-size chunks, so memory use stays constant no
+matter how large the G-code/STL is. Bodies report their length up front (so
+requests sends a Content-Length instead of chunked encoding, which printer
+firmware often rejects) and can call a progress callback as bytes go out.
+"""
+
+import io
+import os
+import uuid
+import logging
+from pathlib import Path
+from typing import Callable, Optional, Tuple, Union, BinaryIO
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+# progress(bytes_sent, total_bytes)
+ProgressCallback = Callable[[int, int], None]
+UploadSource = Union[str, Path, bytes, BinaryIO]
+
+
+class UploadBody:
+    """
+    Iterable request body streaming a file between optional prefix/suffix bytes.
+
+    Pass an instance as ``data=`` to requests. Iterating again (e.g. on retry)
+    starts over from the beginning of the file.
+    """
+
+    def __init__(self, source: UploadSource, prefix: bytes = b'', suffix: bytes = b'',
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 progress: Optional[ProgressCallback] = None):
+        """
+        Args:
+            source: File path, open binary file object, or bytes
+            prefix: Bytes sent before the file (e.g. multipart headers)
+            suffix: Bytes sent after the file (e.g. closing boundary)
+            chunk_size: Bytes read per chunk
+            progress: Called with (bytes_sent, total) after every chunk
+        """
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        self.source = source
+        self.prefix = prefix
+        self.suffix = suffix
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.file_size = self._file_size()
+        self.bytes_sent = 0
+
+    def _file_size(self) -> int:
+        if isinstance(self.source, (str, Path)):
+            return os.path.getsize(self.source)
+        if hasattr(self.source, 'size') and self.source.size is not None:
+            # Django UploadedFile
+            return self.source.size
+        # Bodies always send the whole file from the start
+        size = self.source.seek(0, os.SEEK_END)
+        self.source.seek(0)
+        return size
+
+    def __len__(self) -> int:
+        return len(self.prefix) + self.file_size + len(self.suffix)
+
+    def _sent(self, count: int):
+        self.bytes_sent += count
+        if self.progress:
+            try:
+                self.progress(self.bytes_sent, len(self))
+            except Exception as e:
+                # A broken progress reporter must not abort the transfer
+                logger.warning(f"Upload progress callback failed: {e}")
+
+    def _chunks(self, f):
+        while True:
+            chunk = f.read(self.chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    def __iter__(self):
+        self.bytes_sent = 0
+        if self.prefix:
+            yield self.prefix
+            self._sent(len(self.prefix))
+
+        if isinstance(self.source, (str, Path)):
+            with open(self.source, 'rb') as f:
+                for chunk in self._chunks(f):
+                    yield chunk
+                    self._sent(len(chunk))
+        else:
+            if hasattr(self.source, 'seek'):
+                self.source.seek(0)
+            for chunk in self._chunks(self.source):
+                yield chunk
+                self._sent(len(chunk))
+
+        if self.suffix:
+            yield self.suffix
+            self._sent(len(self.suffix))
+
+
+def multipart_file_body(source: UploadSource, filename: str, field: str = 'file',
+                        fields: Optional[dict] = None,
+                        content_type: Optional[str] = 'application/octet-stream',
+                        progress: Optional[ProgressCallback] = None) -> Tuple[UploadBody, str]:
+    """
+    Build a streaming multipart/form-data body with one file part.
+
+    Args:
+        source: File path, open binary file object, or bytes
+        filename: Filename reported to the server
+        field: Form field name of the file part
+        fields: Plain form fields sent before the file (no Content-Type header)
+        content_type: Content-Type of the file part (None to omit it)
+        progress: Called with (bytes_sent, total) as the body is sent
+
+    Returns:
+        (body, Content-Type header value)
+    """
+    boundary = f'----NexaAIFormBoundary{uuid.uuid4().hex}'
+
+    prefix = ''
+    for name, value in (fields or {}).items():
+        prefix += (
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+            f'{value}\r\n'
+        )
+    prefix += (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+    )
+    if content_type:
+        prefix += f'Content-Type: {content_type}\r\n'
+    prefix += '\r\n'
+    suffix = f'\r\n--{boundary}--\r\n'
+
+    body = UploadBody(
+        source,
+        prefix=prefix.encode('utf-8'),
+        suffix=suffix.encode('utf-8'),
+        progress=progress
+    )
+    return body, f'multipart/form-data; boundary={boundary}'